@@ -1,6 +1,7 @@
 import os
 import torch
 import sys
+import queue
 from threading import Event, Thread
 from uuid import uuid4
 from typing import List, Tuple
@@ -19,11 +20,20 @@ from optimum.intel.openvino import OVModelForCausalLM
 from transformers import AutoConfig, AutoTokenizer
 import webbrowser
 import openvino as ov
+import openvino_genai
 
 core=ov.Core()
 
 max_new_tokens = 256
 
+# openvino_genai chat session state, the pipeline keeps the KV cache of the turns in chat_session_history
+genai_pipe = None
+chat_session_id = None
+chat_session_history = None
+chat_turn = 0
+stop_generation = Event()
+generation_thread = None
+
 english_examples = [
     ["Hello there! How are you doing?"],
     ["What is OpenVINO?"],
@@ -35,7 +45,10 @@ english_examples = [
 ]
 
 def request_cancel():
-    ov_model.request.cancel()
+    if genai_pipe is not None:
+        stop_generation.set()
+    else:
+        ov_model.request.cancel()
     
 def get_uuid():
     """
@@ -58,6 +71,10 @@ def bot(history, temperature, top_p, top_k, repetition_penalty, conversation_id)
 
     """
 
+    if genai_pipe is not None:
+        yield from bot_chat_session(history, temperature, top_p, top_k, repetition_penalty, conversation_id)
+        return
+
     # Construct the input message string for the model by concatenating the current system message and conversation history
     # Tokenize the messages string
     input_ids = convert_history_to_token(history)
@@ -98,6 +115,110 @@ def bot(history, temperature, top_p, top_k, repetition_penalty, conversation_id)
         history[-1][1] = partial_text
         yield history
 
+def bot_chat_session(history, temperature, top_p, top_k, repetition_penalty, conversation_id):
+    """
+    callback function for running chatbot with an openvino_genai chat session
+
+    The session keeps the KV cache of the previous turns, so each turn only prefills the new user message instead of
+    re-tokenizing and re-prefilling the whole history. The session is restarted for a new conversation, e.g. after Clear,
+    and when the history grows over 2000 tokens. A history that does not continue the session, e.g. after an edit,
+    is run without a session and pays the full prefill.
+
+    Params: same as bot
+    """
+    global chat_session_id, chat_session_history, chat_turn, generation_thread
+
+    # Stop cancels the gradio generator before the generation thread ends, wait for it before reusing the pipeline
+    if generation_thread is not None:
+        generation_thread.join()
+
+    if convert_history_to_genai_tokens(history).get_shape()[1] > 2000:
+        history = [history[-1]]
+    continues_session = conversation_id == chat_session_id and chat_session_history == history[:-1]
+    if not continues_session:
+        genai_pipe.finish_chat()
+        chat_session_id, chat_session_history, chat_turn = None, None, 0
+        if len(history) == 1:
+            # start_chat takes the raw system prompt, the pipeline applies the chat template to it
+            genai_pipe.start_chat(DEFAULT_SYSTEM_PROMPT)
+            chat_session_id, chat_session_history = conversation_id, []
+
+    config = genai_pipe.get_generation_config()
+    config.max_new_tokens = max_new_tokens
+    config.do_sample = temperature > 0.0
+    if config.do_sample:
+        config.temperature = temperature
+        config.top_p = top_p
+        if top_k > 0:
+            config.top_k = int(top_k)
+    config.repetition_penalty = repetition_penalty
+    if stop_tokens is not None:
+        config.stop_strings = set(stop_tokens)
+
+    if chat_session_id is not None:
+        inputs = history[-1][0]
+    else:
+        inputs = convert_history_to_genai_tokens(history)
+
+    new_texts = queue.Queue()
+    stop_generation.clear()
+    first_text_time = []
+
+    def streamer(subword):
+        if not first_text_time:
+            first_text_time.append(time.perf_counter())
+        new_texts.put(subword)
+        return stop_generation.is_set()
+
+    def generate_and_signal_complete():
+        """
+        genration function for single thread
+        """
+        try:
+            start_time = time.perf_counter()
+            genai_pipe.generate(inputs, config, streamer)
+            if first_text_time:
+                mode = "chat session" if chat_session_id is not None else "full prefill"
+                print(f"Turn {chat_turn + 1}: TTFT {(first_text_time[0] - start_time) * 1000:.1f} ms ({mode})")
+        finally:
+            new_texts.put(None)
+
+    generation_thread = Thread(target=generate_and_signal_complete)
+    generation_thread.start()
+
+    partial_text = ""
+    while (new_text := new_texts.get()) is not None:
+        partial_text = text_processor(partial_text, new_text)
+        history[-1][1] = partial_text
+        yield history
+    generation_thread.join()
+
+    if chat_session_id is not None:
+        chat_session_history = [list(item) for item in history]
+        chat_turn += 1
+
+
+def convert_history_to_genai_tokens(history: List[Tuple[str, str]]):
+    """
+    function for conversion history to tokens with the chat template of the openvino_genai tokenizer, the same template
+    the chat session applies, so a full prefill sees the same prompt as a chat session
+    Params:
+      history: dialogue history
+    Returns:
+      history in token format
+    """
+    messages = [{"role": "system", "content": DEFAULT_SYSTEM_PROMPT}]
+    for user_msg, model_msg in history:
+        if user_msg:
+            messages.append({"role": "user", "content": user_msg})
+        if model_msg:
+            messages.append({"role": "assistant", "content": model_msg})
+    genai_tok = genai_pipe.get_tokenizer()
+    prompt = genai_tok.apply_chat_template(messages, add_generation_prompt=True)
+    # The template already adds the special tokens of the model
+    return genai_tok.encode(prompt, add_special_tokens=False).input_ids
+
+
 def convert_history_to_token(history: List[Tuple[str, str]]):
     """
     function for conversion history stored as list pairs of user and assistant messages to tokens according to model expected conversation template
@@ -295,7 +416,7 @@ model_list=["tiny-llama-1b-chat"]
 
 def main(argv):
     global model_id,model_name,start_message,history_template,current_message_template,stop_tokens,tokenizer_kwargs,pt_model_name
-    global tok,ov_model,text_processor
+    global tok,ov_model,text_processor,genai_pipe
     
     print("select you wanted model:\n")
     for i in range(0,len(model_list)):
@@ -315,7 +436,9 @@ def main(argv):
 
     pt_model_name = model_list[model_sel].split("-")[0]
 
-    ov_config = {"PERFORMANCE_HINT": "LATENCY", "NUM_STREAMS": "1", "CACHE_DIR": ""}
+    # OpenVINO keys the compiled blobs by model, device and config, so one cache directory per model is enough
+    cache_dir = Path(__file__).parent/str(model_list[model_sel])/"model_cache"
+    ov_config = {"PERFORMANCE_HINT": "LATENCY", "NUM_STREAMS": "1", "CACHE_DIR": str(cache_dir)}
     model_dir=int4_model_dir
 
     examples = english_examples
@@ -341,13 +464,22 @@ def main(argv):
             os.system("cls")
             print("Not invild input!!!!!!!!!!!!!!!!!")
             
-    ov_model = OVModelForCausalLM.from_pretrained(
-    model_dir,
-    device=device_dict[str(sel_dev)],
-    ov_config=ov_config,
-    config=AutoConfig.from_pretrained(model_dir, trust_remote_code=True),
-    trust_remote_code=True,
-    )
+    # openvino_genai needs the tokenizer converted to OpenVINO, models exported without it fall back to optimum
+    if (Path(model_dir) / "openvino_tokenizer.xml").exists():
+        # The stateful SDPA backend keeps the KV cache of the chat in its state, the paged attention backend
+        # drops the start_chat system message in openvino_genai 2025.1
+        genai_pipe = openvino_genai.LLMPipeline(
+            str(model_dir), device_dict[str(sel_dev)], {**ov_config, "ATTENTION_BACKEND": "SDPA"}
+        )
+    else:
+        print("openvino_tokenizer.xml not found, running without chat session KV cache reuse")
+        ov_model = OVModelForCausalLM.from_pretrained(
+        model_dir,
+        device=device_dict[str(sel_dev)],
+        ov_config=ov_config,
+        config=AutoConfig.from_pretrained(model_dir, trust_remote_code=True),
+        trust_remote_code=True,
+        )
     
     with gr.Blocks(
         theme=gr.themes.Soft(),
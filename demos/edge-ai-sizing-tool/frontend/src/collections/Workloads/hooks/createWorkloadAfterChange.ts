@@ -5,6 +5,7 @@ import { Workload } from '@/payload-types'
 import { CollectionAfterChangeHook } from 'payload'
 import { deletePm2Process, startPm2Process, stopPm2Process } from '@/lib/pm2Lib'
 import { normalizeUseCase } from '@/lib/normalizeUsecase'
+import { canSwitchWorkerModel, switchWorkerModel } from '@/lib/workerModel'
 import path from 'path'
 
 const ASSETS_PATH =
@@ -30,6 +31,26 @@ function isDLStreamerMetadata(metadata: unknown): metadata is WorkloadMetadata {
   )
 }
 
+// Whether an update of a running workload only changes its model, so the worker can switch models in place
+function isModelOnlyChange(doc: Workload, previousDoc: Workload): boolean {
+  const metadata = doc.metadata as WorkloadMetadata | null
+  const previousMetadata = previousDoc.metadata as WorkloadMetadata | null
+  const deviceNames = (workload: Workload) =>
+    workload.devices.map((device) => device.device).join(',')
+  return (
+    previousDoc.status === 'active' &&
+    doc.id === previousDoc.id &&
+    doc.usecase === previousDoc.usecase &&
+    doc.port === previousDoc.port &&
+    deviceNames(doc) === deviceNames(previousDoc) &&
+    doc.source?.type === previousDoc.source?.type &&
+    doc.source?.name === previousDoc.source?.name &&
+    metadata?.numStreams === previousMetadata?.numStreams &&
+    (doc.model !== previousDoc.model ||
+      metadata?.customModel?.name !== previousMetadata?.customModel?.name)
+  )
+}
+
 export const createWorkloadAfterChange: CollectionAfterChangeHook<
   Workload
 > = async ({ doc, previousDoc, operation }) => {
@@ -43,14 +64,6 @@ export const createWorkloadAfterChange: CollectionAfterChangeHook<
   } else if (previousDoc.status === 'inactive' && doc.status === 'active') {
     await startPm2Process(newPm2Name, '', '')
   } else if (doc.status === 'prepare') {
-    if (
-      operation === 'update' &&
-      doc.id === previousDoc.id &&
-      prevPm2Name !== undefined
-    ) {
-      await stopPm2Process(prevPm2Name)
-      await deletePm2Process(prevPm2Name)
-    }
     const devicesName = doc.devices.reduce((acc, device) => {
       const deviceName = device.device || ''
       if (acc === '') {
@@ -109,7 +122,40 @@ export const createWorkloadAfterChange: CollectionAfterChangeHook<
         params += ' --number_of_streams ' + numStreams
       }
     }
-    await startPm2Process(newPm2Name, usecaseName, params)
+
+    const restart = async () => {
+      if (
+        operation === 'update' &&
+        doc.id === previousDoc.id &&
+        prevPm2Name !== undefined
+      ) {
+        await stopPm2Process(prevPm2Name)
+        await deletePm2Process(prevPm2Name)
+      }
+      await startPm2Process(newPm2Name, usecaseName, params)
+    }
+
+    if (
+      operation === 'update' &&
+      doc.port &&
+      canSwitchWorkerModel(usecaseName) &&
+      isModelOnlyChange(doc, previousDoc)
+    ) {
+      // The running worker loads the new model and updates the workload status itself,
+      // it is only restarted when it cannot switch
+      switchWorkerModel(doc.port, modelName).catch((error) => {
+        console.error(
+          `Failed to switch the model of ${newPm2Name}, restarting it: ${error.message}`,
+        )
+        restart().catch((restartError) =>
+          console.error(
+            `Failed to restart ${newPm2Name}: ${restartError.message}`,
+          ),
+        )
+      })
+    } else {
+      await restart()
+    }
   }
   return doc
 }
@@ -0,0 +1,47 @@
+// Copyright (C) 2025 Intel Corporation
+// SPDX-License-Identifier: Apache-2.0
+
+// Workers that can load another model in the running process through /api/model
+const SWITCHABLE_WORKERS = [
+  'text-generation',
+  'automatic-speech-recognition',
+  'text-to-image',
+  'object-detection',
+]
+
+export function canSwitchWorkerModel(workerName: string): boolean {
+  return SWITCHABLE_WORKERS.includes(workerName.replace(/\s+/g, '-'))
+}
+
+/**
+ * Ask the running worker on the given port to switch to another model.
+ * The worker keeps previously loaded models warm, so switching back and forth
+ * does not restart the process. Rejects when the worker could not switch.
+ *
+ * @param port - Port of the running worker.
+ * @param modelName - Model name or path, as passed to the worker --model argument.
+ */
+export async function switchWorkerModel(
+  port: number,
+  modelName: string,
+): Promise<void> {
+  if (!Number.isInteger(port) || port < 1 || port > 65535) {
+    throw new Error(`Invalid port: ${port}`)
+  }
+
+  const response = await fetch(`http://localhost:${port}/api/model`, {
+    method: 'POST',
+    headers: {
+      Accept: 'application/json',
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({ model_name: modelName }),
+  })
+  const result = await response.json()
+  if (!response.ok || result.status !== 'success') {
+    throw new Error(result.message ?? `Worker returned ${response.status}`)
+  }
+  console.log(
+    `Switched worker on port ${port} to ${modelName} in ${result.data.switch_time_s} s`,
+  )
+}
@@ -6,10 +6,18 @@ import sys
 import subprocess
 import platform
 import logging
+import threading
+import queue
+import collections
+import asyncio
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict
+import numpy as np
 import librosa
 import openvino_genai
-from fastapi import FastAPI
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request as HTTPRequest
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 import argparse
 from pydantic import BaseModel
@@ -23,6 +31,9 @@ import openvino as ov
 import urllib.parse
 import zipfile
 from huggingface_hub import whoami
+from model_cache import CompiledModelCache
+from export_cache import get_exported_model
+from model_pool import ModelPool, get_model_size
 
 logging.basicConfig(
     level=logging.INFO,
@@ -60,9 +71,7 @@ def optimum_cli(model_id, output_dir, additional_args: Dict[str, str] = None):
             env=env,
         )
     except Exception as e:
-        logging.error(f"optimum-cli failed: {e}")
-        update_payload_status(args.id, status="failed")
-        sys.exit(1)
+        raise RuntimeError(f"optimum-cli failed: {e}") from e
 
 
 def update_payload_status(workload_id: int, status):
@@ -139,6 +148,48 @@ parser.add_argument(
 parser.add_argument(
     "--id", type=int, default=1, help="Workload ID to update the workload status"
 )
+parser.add_argument(
+    "--chunk-length-s",
+    type=float,
+    default=30.0,
+    help="Length in seconds of the windows long audio is split into, Whisper attends to 30 s at most (default: 30)",
+)
+parser.add_argument(
+    "--chunk-overlap-s",
+    type=float,
+    default=2.0,
+    help="Overlap in seconds between consecutive windows, so words on a window edge are transcribed whole (default: 2)",
+)
+parser.add_argument(
+    "--num-pipelines",
+    type=int,
+    default=1,
+    help="Number of pipeline instances transcribing windows in parallel, of one or several requests (default: 1)",
+)
+parser.add_argument(
+    "--vad-threshold",
+    type=float,
+    default=0.01,
+    help="RMS level above which a 30 ms frame of /ws/transcribe audio counts as speech (default: 0.01)",
+)
+parser.add_argument(
+    "--vad-silence-ms",
+    type=int,
+    default=600,
+    help="Silence in ms that ends an utterance on /ws/transcribe and emits its final transcript (default: 600)",
+)
+parser.add_argument(
+    "--partial-interval-s",
+    type=float,
+    default=1.0,
+    help="Seconds of new audio between partial transcripts of the running utterance on /ws/transcribe (default: 1)",
+)
+parser.add_argument(
+    "--model-pool-size-gb",
+    type=float,
+    default=8.0,
+    help="Memory budget in GB of the models kept loaded after switching models through /api/model (default: 8)",
+)
 
 args = parser.parse_args()
 
@@ -146,54 +197,238 @@ args = parser.parse_args()
 models_dir = "models"
 custom_models_dir = "../custom_models/automatic-speech-recognition"
 os.makedirs(models_dir, exist_ok=True)
+# Files of a whisper export in models/<model id> made before exports were cached
+LEGACY_EXPORT_FILES = (
+    "openvino_encoder_model.xml",
+    "openvino_encoder_model.bin",
+    "openvino_decoder_model.xml",
+    "openvino_decoder_model.bin",
+    "openvino_tokenizer.xml",
+    "openvino_tokenizer.bin",
+    "openvino_detokenizer.xml",
+    "openvino_detokenizer.bin",
+)
 
-# handle custom model in zip format
-if args.model_name.endswith(".zip"):
-    model_zipfile_name = os.path.splitext(os.path.basename(args.model_name))[0]
-    model = os.path.join(models_dir, model_zipfile_name)
-    if not os.path.exists(model):
-        logging.info(f"Extracting {args.model_name} to {model}")
-        try:
-            with zipfile.ZipFile(args.model_name, 'r') as zip_ref:
-                zip_ref.extractall(model)
-        except Exception as e:
-            logging.error(f"Failed to extract zip file {args.model_name}: {e}")
-            update_payload_status(args.id, status="failed")
-            sys.exit(1)
-    else:
-        logging.info(f"Model directory {model} already exists and is not empty, skipping extraction.")
-else:
-    # handle custom model uploaded to directory
-    model = os.path.join(custom_models_dir, args.model_name)
-    if not os.path.exists(model):
-        # predefined model or hugging face model id
-        model = os.path.join(models_dir, args.model_name)
-        if platform.system() == "Windows":
-            current_dir = os.getcwd()
-            model = os.path.join(current_dir, model).replace("/", "\\")
-        logging.info(f"Model: {model}")
+def prepare_model(model_name):
+    """
+    Return the directory of the OpenVINO model, extracting or converting it first when needed.
+    Raises RuntimeError when the model cannot be prepared.
+    """
+    # handle custom model in zip format
+    if model_name.endswith(".zip"):
+        model_zipfile_name = os.path.splitext(os.path.basename(model_name))[0]
+        model = os.path.join(models_dir, model_zipfile_name)
+        if not os.path.exists(model):
+            logging.info(f"Extracting {model_name} to {model}")
+            try:
+                with zipfile.ZipFile(model_name, 'r') as zip_ref:
+                    zip_ref.extractall(model)
+            except Exception as e:
+                raise RuntimeError(f"Failed to extract zip file {model_name}: {e}") from e
+        else:
+            logging.info(f"Model directory {model} already exists and is not empty, skipping extraction.")
     else:
-        logging.info(f"Custom Model: {model} exists.")
-
-# download model if it doesn't exist
-if not os.path.exists(model):
-    logging.info(f"Model {model} not found. Downloading...")
-    additional_args = None
-    if "NPU" in available_devices:
-        additional_args = {"disable-stateful": None}
-    optimum_cli(args.model_name, model, additional_args)
-
-if os.path.realpath(model) != os.path.abspath(
-    model
-):  # Check if the model path is a symlink
-    logging.error(
-        f"Model file {model} is a symlink or contains a symlink in its path. Refusing to open for security reasons."
-    )
-    update_payload_status(args.id, status="failed")
-    sys.exit(1)
+        # handle custom model uploaded to directory
+        model = os.path.join(custom_models_dir, model_name)
+        if not os.path.exists(model):
+            # hugging face model id, exported once per configuration
+            additional_args = None
+            legacy_files = LEGACY_EXPORT_FILES
+            if "NPU" in available_devices:
+                additional_args = {"disable-stateful": None}
+                # Exports made before NPU was available are stateful, without the separate decoder with past
+                legacy_files += ("openvino_decoder_with_past_model.xml", "openvino_decoder_with_past_model.bin")
+            # The pre-cache code picked the arguments from the available devices the same way
+            model = get_exported_model(
+                model_name, models_dir, optimum_cli, additional_args, additional_args, legacy_files
+            )
+            if platform.system() == "Windows":
+                current_dir = os.getcwd()
+                model = os.path.join(current_dir, model).replace("/", "\\")
+            logging.info(f"Model: {model}")
+        else:
+            logging.info(f"Custom Model: {model} exists.")
+
+    if os.path.realpath(model) != os.path.abspath(
+        model
+    ):  # Check if the model path is a symlink
+        raise RuntimeError(
+            f"Model file {model} is a symlink or contains a symlink in its path. Refusing to open for security reasons."
+        )
+    return model
+
+
+SAMPLE_RATE = 16000
+
+
+def split_windows(num_samples, window_samples, overlap_samples):
+    """
+    Return the (start, end) sample ranges of the windows covering num_samples, consecutive windows overlap by
+    overlap_samples.
+    """
+    stride = window_samples - overlap_samples
+    windows = [(0, min(window_samples, num_samples))]
+    while windows[-1][1] < num_samples:
+        start = windows[-1][0] + stride
+        windows.append((start, min(start + window_samples, num_samples)))
+    return windows
+
+
+def stitch_windows(windows, results, overlap_s, duration_s):
+    """
+    Merge the timestamped chunks of overlapping windows. Each overlap is split in the middle, a chunk is kept by the
+    window that owns its midpoint, so a segment transcribed by both windows appears once.
+    Returns the text and the chunks with timestamps relative to the start of the audio.
+    """
+    chunks = []
+    for index, ((start, _), result) in enumerate(zip(windows, results)):
+        offset_s = start / SAMPLE_RATE
+        own_start_s = offset_s + overlap_s / 2 if index > 0 else 0.0
+        own_end_s = windows[index + 1][0] / SAMPLE_RATE + overlap_s / 2 if index + 1 < len(windows) else duration_s
+        if not result.chunks:
+            # No timestamps, keep the whole text of the window
+            chunks.append({"start_s": offset_s, "end_s": own_end_s, "text": str(result).strip()})
+            continue
+        for chunk in result.chunks:
+            # The end timestamp of the last chunk of a window may be missing
+            end_s = offset_s + chunk.end_ts if chunk.end_ts >= chunk.start_ts else own_end_s
+            chunk_start_s = offset_s + chunk.start_ts
+            if own_start_s <= (chunk_start_s + end_s) / 2 < own_end_s:
+                chunks.append({"start_s": chunk_start_s, "end_s": end_s, "text": chunk.text.strip()})
+    chunks = [
+        {"start_s": round(chunk["start_s"], 2), "end_s": round(chunk["end_s"], 2), "text": chunk["text"]}
+        for chunk in chunks
+        if chunk["text"]
+    ]
+    return " ".join(chunk["text"] for chunk in chunks), chunks
+
+
+class ChunkedTranscriber:
+    """
+    Transcribe audio of any length on a set of WhisperPipeline instances.
+    Audio longer than one window is split into overlapping windows that are transcribed with timestamps and stitched
+    back together. The windows of all requests share one queue, so up to len(pipes) windows, of one long request or
+    of several short ones, run at the same time.
+
+    Requests and live streams hold the transcriber through in_use, so closing it after it was evicted from the model
+    pool waits for the last of them instead of shutting the executor down under a running stream.
+    """
+
+    def __init__(self, pipes, window_s, overlap_s):
+        if not 0 <= overlap_s < window_s:
+            raise ValueError("The chunk overlap must be shorter than the chunk length")
+        self.window_samples = int(window_s * SAMPLE_RATE)
+        self.overlap_samples = int(overlap_s * SAMPLE_RATE)
+        self.overlap_s = overlap_s
+        self.pipes = queue.Queue()
+        for pipe in pipes:
+            self.pipes.put(pipe)
+        self.executor = ThreadPoolExecutor(max_workers=len(pipes))
+        self.lock = threading.Lock()
+        self.users = 0
+        self.closing = False
+        self.closed = False
+
+    def __generate(self, raw_speech, task, language, return_timestamps=False):
+        # Runs on the executor, waiting for an idle pipeline must never block the event loop
+        pipe = self.pipes.get()
+        try:
+            generation_config = pipe.get_generation_config()
+            generation_config.task = task
+            generation_config.language = f"<|{language}|>"
+            if return_timestamps:
+                generation_config.return_timestamps = True
+            return pipe.generate(raw_speech, generation_config)
+        finally:
+            self.pipes.put(pipe)
+
+    async def generate(self, raw_speech, task, language):
+        """
+        Transcribe at most one window of 16 kHz float32 samples without blocking the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self.executor, self.__generate, raw_speech, task, language)
+        return str(result).strip()
+
+    async def transcribe(self, raw_speech, task, language):
+        """
+        Transcribe 16 kHz float32 samples without blocking the event loop.
+        Returns the text, the timestamped chunks and the number of windows.
+        """
+        if len(raw_speech) <= self.window_samples:
+            windows = [(0, len(raw_speech))]
+        else:
+            windows = split_windows(len(raw_speech), self.window_samples, self.overlap_samples)
+        return_timestamps = len(windows) > 1
+
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    self.executor, self.__generate, raw_speech[start:end], task, language, return_timestamps
+                )
+                for start, end in windows
+            )
+        )
+        if len(windows) == 1:
+            return str(results[0]).strip(), [], 1
+        text, chunks = stitch_windows(windows, results, self.overlap_s, len(raw_speech) / SAMPLE_RATE)
+        return text, chunks, len(windows)
+
+    @contextlib.contextmanager
+    def in_use(self):
+        """
+        Keep the transcriber open while the block runs, raises RuntimeError when it is already closed.
+        """
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("The model was unloaded")
+            self.users += 1
+        try:
+            yield self
+        finally:
+            with self.lock:
+                self.users -= 1
+                shutdown = self.closing and self.users == 0
+                self.closed = self.closed or shutdown
+            if shutdown:
+                # Runs on the event loop, a partial transcript of a dropped stream may still finish meanwhile
+                self.executor.shutdown(wait=False)
+
+    def close(self):
+        """
+        Shut the executor down, once the requests and streams that use the transcriber are done.
+        """
+        with self.lock:
+            self.closing = True
+            if self.users > 0:
+                logging.info(f"Closing the transcriber after its {self.users} active requests and streams end")
+                return
+            self.closed = True
+        self.executor.shutdown(wait=True)
+
+
+def load_pipeline(model_path):
+    model_cache = CompiledModelCache(model_path, args.device)
+    start_time = time.perf_counter()
+    pipes = [
+        openvino_genai.WhisperPipeline(model_path, args.device, **model_cache.properties)
+        for _ in range(args.num_pipelines)
+    ]
+    model_cache.record_load(time.perf_counter() - start_time)
+    return ChunkedTranscriber(pipes, args.chunk_length_s, args.chunk_overlap_s)
+
+
+def get_pooled_pipeline(model_name, model_path):
+    return model_pool.get(model_name, lambda: load_pipeline(model_path), get_model_size(model_path))
+
+
+model_pool = ModelPool(args.model_pool_size_gb, on_evict=ChunkedTranscriber.close)
+# Serializes model switches
+model_switch_lock = threading.Lock()
 
 try:
-    pipe = openvino_genai.WhisperPipeline(model, args.device)
+    transcriber, _ = get_pooled_pipeline(args.model_name, prepare_model(args.model_name))
     update_payload_status(args.id, status="active")
 except Exception as e:
     logging.error(f"Failed to load model: {e}")
@@ -207,20 +442,84 @@ class Request(BaseModel):
     language: str
 
 
+def load_audio(audio_file):
+    """
+    Decode an audio file object into 16 kHz mono float32 samples.
+    Returns the samples with the decode and resample times in seconds.
+    """
+    start_time = time.perf_counter()
+    samples, sample_rate = librosa.load(audio_file, sr=None, mono=True)
+    decode_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    if sample_rate != SAMPLE_RATE:
+        samples = librosa.resample(samples, orig_sr=sample_rate, target_sr=SAMPLE_RATE)
+    raw_speech = np.ascontiguousarray(samples, dtype=np.float32)
+    resample_time = time.perf_counter() - start_time
+    return raw_speech, decode_time, resample_time
+
+
+async def transcribe_audio(audio_file, task, language):
+    # Hold the model the request arrived on, a model switch meanwhile must not close it
+    with transcriber.in_use() as request_transcriber:
+        # Decoding and resampling long audio takes a while, keep the event loop serving other requests meanwhile
+        raw_speech, decode_time, resample_time = await run_in_threadpool(load_audio, audio_file)
+        audio_duration = len(raw_speech) / SAMPLE_RATE
+
+        start_time = time.perf_counter()
+        text, chunks, num_windows = await request_transcriber.transcribe(raw_speech, task, language)
+        inference_time = time.perf_counter() - start_time
+
+    return {
+        "text": text,
+        "chunks": chunks,
+        "generation_time_s": round(inference_time, 1),
+        "decode_time_s": round(decode_time, 3),
+        "resample_time_s": round(resample_time, 3),
+        "inference_time_s": round(inference_time, 3),
+        "audio_duration_s": round(audio_duration, 2),
+        "num_windows": num_windows,
+        "real_time_factor": round(inference_time / audio_duration, 3) if audio_duration > 0 else 0.0,
+    }
+
+
 @app.post("/infer")
 async def process_audio(request: Request):
+    """
+    Transcribe audio sent as a base64 data URL in JSON.
+    """
     try:
-        file = request.file.split(",")[1]
-        audio_data = base64.b64decode(file)
-        audio_file = io.BytesIO(audio_data)
-        raw_speech, _ = librosa.load(audio_file, sr=16000)
-        start_time = time.perf_counter()
-        result = pipe.generate(
-            raw_speech.tolist(), task=request.task, language=f"<|{request.language}|>"
+        audio_file = io.BytesIO(base64.b64decode(request.file.split(",")[1]))
+        return await transcribe_audio(audio_file, request.task, request.language)
+    except Exception as e:
+        logging.error(f"Error processing audio: {e}")
+        return JSONResponse(
+            {"status": False, "message": "An error occurred while processing the audio"}
         )
-        inference_time = time.perf_counter() - start_time
 
-        return {"text": str(result), "generation_time_s": round(inference_time, 1)}
+
+@app.post("/infer/audio")
+async def process_audio_upload(request: HTTPRequest, task: str = "transcribe", language: str = "en"):
+    """
+    Transcribe audio sent as is, without the base64 overhead of /infer. Either the file bytes as the request body
+    with Content-Type application/octet-stream (or audio/*), or a multipart/form-data upload with a "file" field
+    and optional "task" and "language" fields. task and language can also be given as query parameters.
+    """
+    content_type = request.headers.get("content-type", "")
+    try:
+        if content_type.startswith("multipart/form-data"):
+            form = await request.form()
+            upload = form.get("file")
+            if upload is None or isinstance(upload, str):
+                return JSONResponse({"status": False, "message": "The form has no file field"})
+            # The upload is spooled to a file object that is decoded in place
+            return await transcribe_audio(upload.file, form.get("task", task), form.get("language", language))
+
+        body = await request.body()
+        if not body:
+            return JSONResponse({"status": False, "message": "The request has no audio"})
+        # BytesIO shares the body buffer until it is written to
+        return await transcribe_audio(io.BytesIO(body), task, language)
     except Exception as e:
         logging.error(f"Error processing audio: {e}")
         return JSONResponse(
@@ -228,6 +527,224 @@ async def process_audio(request: Request):
         )
 
 
+class LiveTranscription:
+    """
+    Transcribe a live 16 kHz stream utterance by utterance.
+    An energy VAD splits the stream in 30 ms frames and starts an utterance at the first speech frame, with a short
+    pre-roll so the first syllable is not cut. While the utterance runs its audio so far is transcribed again every
+    --partial-interval-s as a partial transcript. It ends after --vad-silence-ms of silence, or at --chunk-length-s
+    since Whisper attends to one window, and is transcribed a last time as the final transcript.
+    Every transcript reports its latency from the arrival of the audio it covers and the real-time factor.
+    """
+
+    FRAME_SAMPLES = SAMPLE_RATE * 30 // 1000
+    PRE_ROLL_FRAMES = 10
+    MIN_PARTIAL_SAMPLES = SAMPLE_RATE // 2
+
+    def __init__(self, transcriber, send, task, language):
+        self.transcriber = transcriber
+        self.send = send
+        self.task = task
+        self.language = language
+        self.silence_frames = max(1, args.vad_silence_ms * SAMPLE_RATE // 1000 // self.FRAME_SAMPLES)
+        self.max_utterance_frames = int(args.chunk_length_s * SAMPLE_RATE) // self.FRAME_SAMPLES
+        self.partial_samples = int(args.partial_interval_s * SAMPLE_RATE)
+        self.remainder = np.zeros(0, dtype=np.float32)
+        self.pre_roll = collections.deque(maxlen=self.PRE_ROLL_FRAMES)
+        self.utterance = []
+        self.utterance_start = 0
+        self.silent_frames = 0
+        self.position = 0
+        self.last_partial_position = 0
+        self.partial_task = None
+        self.final_latencies = []
+        self.inference_time = 0.0
+        self.transcribed_duration = 0.0
+
+    async def add_audio(self, samples):
+        """
+        Feed float32 samples in [-1, 1] as they arrive.
+        """
+        arrival_time = time.perf_counter()
+        samples = np.concatenate([self.remainder, samples])
+        num_frames = len(samples) // self.FRAME_SAMPLES
+        self.remainder = samples[num_frames * self.FRAME_SAMPLES:]
+        for frame in samples[: num_frames * self.FRAME_SAMPLES].reshape(num_frames, self.FRAME_SAMPLES):
+            self.position += self.FRAME_SAMPLES
+            is_speech = np.sqrt(np.mean(frame**2)) >= args.vad_threshold
+            if not self.utterance:
+                if is_speech:
+                    self.utterance = list(self.pre_roll) + [frame]
+                    self.utterance_start = self.position - len(self.utterance) * self.FRAME_SAMPLES
+                    self.last_partial_position = self.utterance_start
+                    self.silent_frames = 0
+                else:
+                    self.pre_roll.append(frame)
+                continue
+
+            self.utterance.append(frame)
+            self.silent_frames = 0 if is_speech else self.silent_frames + 1
+            if self.silent_frames >= self.silence_frames or len(self.utterance) >= self.max_utterance_frames:
+                await self.__finish_utterance(arrival_time)
+
+        partial_running = self.partial_task is not None and not self.partial_task.done()
+        utterance_samples = self.position - self.utterance_start
+        if (
+            self.utterance
+            and not partial_running
+            and utterance_samples >= self.MIN_PARTIAL_SAMPLES
+            and self.position - self.last_partial_position >= self.partial_samples
+        ):
+            self.last_partial_position = self.position
+            self.partial_task = asyncio.ensure_future(
+                self.__emit("partial", np.concatenate(self.utterance), self.utterance_start, arrival_time)
+            )
+
+    async def finish(self):
+        """
+        Transcribe the running utterance and send the summary of the session.
+        """
+        if self.utterance:
+            await self.__finish_utterance(time.perf_counter())
+        elif self.partial_task is not None:
+            await self.partial_task
+        stream_duration = self.position / SAMPLE_RATE
+        await self.send(
+            {
+                "type": "summary",
+                "audio_duration_s": round(stream_duration, 2),
+                "transcribed_duration_s": round(self.transcribed_duration, 2),
+                "inference_time_s": round(self.inference_time, 3),
+                "real_time_factor": round(self.inference_time / stream_duration, 3) if stream_duration > 0 else 0.0,
+                "num_utterances": len(self.final_latencies),
+                "mean_final_latency_s": round(float(np.mean(self.final_latencies)), 3) if self.final_latencies else 0.0,
+                "max_final_latency_s": round(max(self.final_latencies), 3) if self.final_latencies else 0.0,
+            }
+        )
+
+    async def __finish_utterance(self, arrival_time):
+        # Keep at most the pre-roll length of trailing silence
+        trailing = max(0, self.silent_frames - self.PRE_ROLL_FRAMES)
+        frames = self.utterance[: len(self.utterance) - trailing]
+        start = self.utterance_start
+        self.utterance = []
+        self.pre_roll.clear()
+        if self.partial_task is not None:
+            # Partial and final transcripts of an utterance are sent in order
+            await self.partial_task
+            self.partial_task = None
+        await self.__emit("final", np.concatenate(frames), start, arrival_time)
+
+    async def __emit(self, kind, raw_speech, start, arrival_time):
+        start_time = time.perf_counter()
+        text = await self.transcriber.generate(raw_speech, self.task, self.language)
+        inference_time = time.perf_counter() - start_time
+        latency = time.perf_counter() - arrival_time
+        duration = len(raw_speech) / SAMPLE_RATE
+        self.inference_time += inference_time
+        if kind == "final":
+            self.final_latencies.append(latency)
+            self.transcribed_duration += duration
+        await self.send(
+            {
+                "type": kind,
+                "text": text,
+                "start_s": round(start / SAMPLE_RATE, 2),
+                "end_s": round((start + len(raw_speech)) / SAMPLE_RATE, 2),
+                "latency_s": round(latency, 3),
+                "inference_time_s": round(inference_time, 3),
+                "real_time_factor": round(inference_time / duration, 3),
+            }
+        )
+
+
+SAMPLE_FORMATS = {
+    "s16le": lambda data: np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0,
+    "f32le": lambda data: np.frombuffer(data, dtype="<f4").astype(np.float32),
+}
+
+
+@app.websocket("/ws/transcribe")
+async def transcribe_stream(websocket: WebSocket, task: str = "transcribe", language: str = "en", sample_format: str = "s16le"):
+    """
+    Transcribe live audio. Send 16 kHz mono PCM as binary messages, s16le by default or f32le with
+    ?sample_format=f32le, and the text message "end" to flush the last utterance.
+    Partial and final transcripts are sent as JSON messages as they are ready, a summary follows "end".
+    """
+    await websocket.accept()
+    if sample_format not in SAMPLE_FORMATS:
+        await websocket.send_json({"type": "error", "message": f"Unsupported sample format {sample_format}"})
+        await websocket.close()
+        return
+
+    try:
+        # The stream keeps the model it connected on, switching models meanwhile closes it after the stream ends
+        with transcriber.in_use() as session_transcriber:
+            session = LiveTranscription(session_transcriber, websocket.send_json, task, language)
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes") is not None:
+                    await session.add_audio(SAMPLE_FORMATS[sample_format](message["bytes"]))
+                elif message.get("text", "").strip() == "end":
+                    await session.finish()
+                    await websocket.close()
+                    break
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logging.error(f"Error transcribing the stream: {e}")
+        try:
+            await websocket.send_json({"type": "error", "message": "An error occurred while transcribing the stream"})
+            await websocket.close()
+        except Exception:
+            pass
+
+
+class ModelRequest(BaseModel):
+    model_name: str
+
+
+@app.post("/api/model")
+def switch_model(request: ModelRequest):
+    """
+    Switch the worker to another model without restarting it. Models loaded before are kept in the model pool within
+    --model-pool-size-gb, switching back to one of them does not load it again.
+    """
+    global transcriber
+    with model_switch_lock:
+        start_time = time.perf_counter()
+        try:
+            transcriber, cached = get_pooled_pipeline(request.model_name, prepare_model(request.model_name))
+        except Exception as e:
+            # The worker keeps serving the current model
+            logging.error(f"Failed to switch to model {request.model_name}: {e}")
+            return JSONResponse({"status": False, "message": f"Failed to load model {request.model_name}"})
+        switch_time_s = time.perf_counter() - start_time
+    logging.info(f"Switched to model {request.model_name} in {switch_time_s:.2f} s ({'pooled' if cached else 'loaded'})")
+    update_payload_status(args.id, status="active")
+    return JSONResponse(
+        {
+            "data": {"model_name": request.model_name, "pooled": cached, "switch_time_s": round(switch_time_s, 2)},
+            "status": "success",
+        }
+    )
+
+
+@app.get("/api/models")
+def get_loaded_models():
+    """
+    Return the models kept loaded in the model pool, the active one last.
+    """
+    return JSONResponse(
+        {
+            "data": {"models": model_pool.describe(), "max_memory_gb": args.model_pool_size_gb},
+            "status": "success",
+        }
+    )
+
+
 uvicorn.run(
     app,
     host="127.0.0.1",
@@ -5,8 +5,11 @@ import os
 import re
 import sys
 import cv2
+import json
 import time
 import math
+import tempfile
+import collections
 import socket
 import signal
 import logging
@@ -16,16 +19,28 @@ import requests
 import argparse
 import threading
 import urllib.parse
-import numpy as np
 import subprocess as sp
 
 from pathlib import Path
 from fastapi import FastAPI
+from pydantic import BaseModel
 from contextlib import asynccontextmanager
 from yolo_download import export_yolo_model
+from stream_density import find_stream_density
+from model_cache import CompiledModelCache
+from autotune import load_tuned_config, tune
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse, JSONResponse
 
+try:
+    import gi
+
+    gi.require_version("Gst", "1.0")
+    from gi.repository import GLib, Gst
+except (ImportError, ValueError):
+    # PyGObject is only needed by the in-process pipeline runner
+    Gst = None
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(levelname)s - %(message)s",
@@ -54,6 +69,17 @@ MODEL_DIR = Path("./models")
 CUSTOM_MODELS_DIR = Path("../custom_models/object-detection-(DLStreamer)")
 RTSP_SERVER_URL = "rtsp://localhost:8554"
 
+FPS_PATTERN = re.compile(
+    r"FpsCounter\(.*\): total=(\d+\.\d+) fps, number-streams=(\d+), per-stream=(\d+\.\d+) fps(?: \((.*?)\))?"
+)
+# Structures logged by the DLStreamer latency_tracer on stderr
+ELEMENT_LATENCY_PATTERN = re.compile(
+    r"latency_tracer_element, name=\(string\)infer(\d+), frame_latency=\(double\)([\d.]+), avg=\(double\)([\d.]+)"
+)
+PIPELINE_LATENCY_PATTERN = re.compile(
+    r"latency_tracer_pipeline, frame_latency=\(double\)([\d.]+), avg=\(double\)([\d.]+)"
+)
+
 
 def update_payload_status(workload_id: int, status):
     """
@@ -106,6 +132,11 @@ async def lifespan(app: FastAPI):
         "number_streams": None,
         "average_fps_per_stream": None,
         "fps_streams": None,
+        "inference_latency_ms": None,
+        "inference_latency_streams": None,
+        "pipeline_latency_ms": None,
+        "estimated_dropped_frames": None,
+        "estimated_dropped_frames_streams": None,
         "timestamp": None,
     }
     thread = threading.Thread(target=main, daemon=True)
@@ -153,8 +184,9 @@ def parse_arguments():
     parser.add_argument(
         "--model_precision",
         type=str,
+        choices=["FP32", "FP16", "INT8"],
         default="FP16",
-        help="Model precision (default: FP16)",
+        help="Model precision, INT8 is quantized with NNCF on frames of the bundled media on first use (default: FP16)",
     )
     parser.add_argument(
         "--device",
@@ -207,15 +239,53 @@ def parse_arguments():
         default=480,
         help="Height limit for the video stream (default: 480)",
     )
+    parser.add_argument(
+        "--pipeline_runner",
+        type=str,
+        default="subprocess",
+        choices=["subprocess", "gst"],
+        help="Run the pipeline with gst-launch-1.0 in a subprocess, or in-process with PyGObject so streams can be added and removed at runtime through /api/streams (default: subprocess)",
+    )
+    parser.add_argument(
+        "--latency_tracer",
+        action="store_true",
+        help="Report inference and pipeline latency of the subprocess runner from the DLStreamer latency tracer, which logs every buffer of every element to stderr and costs CPU time, the gst runner measures inference latency with pad probes instead",
+    )
+    parser.add_argument(
+        "--density_target_fps",
+        type=float,
+        default=0,
+        help="Search the maximum number of streams that each reach this FPS, requires --pipeline_runner gst, 0 disables the search (default: 0)",
+    )
+    parser.add_argument(
+        "--density_max_streams",
+        type=int,
+        default=64,
+        help="Upper bound of the stream density search (default: 64)",
+    )
+    parser.add_argument(
+        "--density_report",
+        type=str,
+        default="./stream_density.json",
+        help="Path of the stream density JSON report (default: ./stream_density.json)",
+    )
+    parser.add_argument(
+        "--autotune",
+        action="store_true",
+        help="Tune the OpenVINO configuration of the model for the device before running it when it was not tuned yet, a configuration tuned earlier is always used",
+    )
     return parser.parse_args()
 
 
 args = parse_arguments()
+pipeline_runner = None
+density_report = None
 
 
-def build_compositor_props(num_streams, final_width, final_height):
+def build_grid_layout(num_streams, final_width, final_height):
     """
-    Method to dynamically split a single final_width * final_height compositor output window into a grid of N sub-windows.
+    Method to dynamically split a single final_width * final_height output window into a grid of N sub-windows.
+    Returns a list of (xpos, ypos, width, height) tuples, one per stream.
     """
     # Determine how many columns and rows a square-ish grid would need
     grid_cols = math.ceil(math.sqrt(num_streams))
@@ -225,14 +295,22 @@ def build_compositor_props(num_streams, final_width, final_height):
     sub_width = final_width // grid_cols
     sub_height = final_height // grid_rows
 
-    comp_props = []
+    layout = []
     for i in range(num_streams):
         row = i // grid_cols
         col = i % grid_cols
+        layout.append((col * sub_width, row * sub_height, sub_width, sub_height))
+    return layout
 
-        xpos = col * sub_width
-        ypos = row * sub_height
 
+def build_compositor_props(num_streams, final_width, final_height):
+    """
+    Method to dynamically split a single final_width * final_height compositor output window into a grid of N sub-windows.
+    """
+    comp_props = []
+    for i, (xpos, ypos, sub_width, sub_height) in enumerate(
+        build_grid_layout(num_streams, final_width, final_height)
+    ):
         comp_props.append(
             f"sink_{i}::xpos={xpos} "
             f"sink_{i}::ypos={ypos} "
@@ -243,45 +321,10 @@ def build_compositor_props(num_streams, final_width, final_height):
     return " ".join(comp_props)
 
 
-def build_pipeline(
-    tcp_port,
-    input,
-    inference_mode,
-    model_full_path,
-    model_label_path,
-    device,
-    decode_device,
-    batch_size=1,
-    number_of_streams=1,
-):
+def build_decode_element(input, decode_device):
     """
-    Build the DLStreamer pipeline for MJPEG streaming.
+    Return the decode elements for an input on the given decode device.
     """
-
-    # Check if input is a videofile
-    if input.endswith((".mp4", ".avi", ".mov")):
-        source_command = [" multifilesrc", f"location={input}", "loop=true"]
-    elif input.startswith("rtsp://"):
-        source_command = ["rtspsrc", f"location={input}", "protocols=tcp"]
-    else:
-        # Default to webcam
-        if number_of_streams > 1:
-            source_command = [
-                "v4l2src",
-                f"device={input}",
-                "!",
-                "videoconvert",
-                "!",
-                "tee",
-                "name=camtee",
-                "!",
-                "multiqueue",
-                "name=camq",
-            ]
-        else:
-            source_command = ["v4l2src", f"device={input}"]
-
-    # Configure decode element
     if "CPU" in decode_device:
         if input.startswith("/dev/video"):
             decode_element = ["decodebin3", "!", "videoconvert", "!", "video/x-raw"]
@@ -308,8 +351,16 @@ def build_pipeline(
     else:
         logging.error("Incorrect parameter DECODE_DEVICE. Supported values: CPU, GPU")
         sys.exit(1)
+    return decode_element
+
 
-    # Configure inference command
+def build_inference_command(
+    inference_mode, model_full_path, model_label_path, device, decode_device, batch_size=1, cache_dir=None, tuned_config=None
+):
+    """
+    Return the inference element with its properties. The compiled model is cached in cache_dir when given,
+    tuned_config is a configuration from the autotuner.
+    """
     inference_command = [
         f"{inference_mode}",
         f"model={model_full_path}",
@@ -319,12 +370,93 @@ def build_pipeline(
     if model_label_path is not None:
         inference_command.append(f"labels-file={model_label_path}")
 
+    ie_config = {}
+    if cache_dir is not None:
+        ie_config["CACHE_DIR"] = cache_dir
+    if tuned_config is not None:
+        ie_config.update(tuned_config["config"])
+    if ie_config:
+        inference_command.append("ie-config=" + ",".join(f"{key}={value}" for key, value in ie_config.items()))
+
     if "GPU" in decode_device and "GPU" in device:
         inference_command.append(f"batch-size={batch_size}")
-        inference_command.append("nireq=4")
+        inference_command.append(f"nireq={tuned_config['num_requests'] if tuned_config is not None else 4}")
         inference_command.append("pre-process-backend=va-surface-sharing")
-    elif "GPU" in decode_device and "CPU" in device:
-        inference_command.append("pre-process-backend=va")
+    else:
+        if tuned_config is not None:
+            inference_command.append(f"nireq={tuned_config['num_requests']}")
+        if "GPU" in decode_device and "CPU" in device:
+            inference_command.append("pre-process-backend=va")
+    return inference_command
+
+
+def build_inference_branch(inference_command, stream_index, metrics_fifo=None):
+    """
+    Return the inference elements of one stream. The inference element is named infer<stream_index> so the latency
+    tracer and the pad probes of the gst runner find it per stream, and the frame metadata is published as JSON
+    lines to metrics_fifo when given.
+    """
+    branch = inference_command + [f"name=infer{stream_index}"]
+    if metrics_fifo is not None:
+        branch += [
+            "!",
+            "gvametaconvert",
+            "add-empty-results=true",
+            "!",
+            "gvametapublish",
+            "method=file",
+            "file-format=json-lines",
+            f"file-path={metrics_fifo}",
+        ]
+    return branch
+
+
+def build_pipeline(
+    tcp_port,
+    input,
+    inference_mode,
+    model_full_path,
+    model_label_path,
+    device,
+    decode_device,
+    batch_size=1,
+    number_of_streams=1,
+    metrics_fifos=None,
+    cache_dir=None,
+    tuned_config=None,
+):
+    """
+    Build the DLStreamer pipeline for MJPEG streaming.
+    When metrics_fifos is given, the metadata of every frame of stream i is published as JSON lines to metrics_fifos[i].
+    """
+
+    # Check if input is a videofile
+    if input.endswith((".mp4", ".avi", ".mov")):
+        source_command = [" multifilesrc", f"location={input}", "loop=true"]
+    elif input.startswith("rtsp://"):
+        source_command = ["rtspsrc", f"location={input}", "protocols=tcp"]
+    else:
+        # Default to webcam
+        if number_of_streams > 1:
+            source_command = [
+                "v4l2src",
+                f"device={input}",
+                "!",
+                "videoconvert",
+                "!",
+                "tee",
+                "name=camtee",
+                "!",
+                "multiqueue",
+                "name=camq",
+            ]
+        else:
+            source_command = ["v4l2src", f"device={input}"]
+
+    decode_element = build_decode_element(input, decode_device)
+    inference_command = build_inference_command(
+        inference_mode, model_full_path, model_label_path, device, decode_device, batch_size, cache_dir, tuned_config
+    )
 
     comp_props_str = build_compositor_props(
         args.number_of_streams, args.width_limit, args.height_limit
@@ -360,7 +492,9 @@ def build_pipeline(
                 + decode_element
                 + [
                     "!",
-                    *inference_command,
+                    *build_inference_branch(
+                        inference_command, i, metrics_fifos[i] if metrics_fifos else None
+                    ),
                     "!",
                     "queue",
                     "!",
@@ -380,7 +514,9 @@ def build_pipeline(
                 + ["!"]
                 + decode_element
                 + ["!"]
-                + inference_command
+                + build_inference_branch(
+                    inference_command, i, metrics_fifos[i] if metrics_fifos else None
+                )
                 + [
                     "!",
                     "queue",
@@ -410,46 +546,459 @@ def stop_signal_handler(sig, frame):
 signal.signal(signal.SIGINT, stop_signal_handler)
 
 
-def run_pipeline(pipeline):
+class PipelineMetricsCollector:
+    """
+    Aggregate structured metrics of the pipeline and publish them to app.state.pipeline_metrics once per interval.
+    FPS and dropped frames of every stream come from the gvametapublish JSON lines of that stream. Dropped frames
+    are a heuristic, estimated from gaps in the frame timestamps, and reported as estimated_dropped_frames.
+    The gst runner measures inference latency with pad probes, the subprocess runner reads it from the DLStreamer
+    latency tracer records on stderr when --latency_tracer is set.
+    """
+
+    def __init__(self, window=2.0, interval=1.0, on_first_frame=None):
+        self.window = window
+        self.interval = interval
+        # Called once with the seconds from the collector creation to the first inference result
+        self.on_first_frame = on_first_frame
+        self.start_time = time.perf_counter()
+        self.lock = threading.Lock()
+        self.frame_times = []
+        self.last_timestamps = []
+        self.frame_durations = []
+        self.dropped_frames = []
+        self.readers = set()
+        self.inference_latency = {}
+        self.pipeline_latency = None
+        self.last_update = 0.0
+        self.received = False
+
+    def add_stream(self, metrics_fifo):
+        """
+        Track one more stream and start a reader for its FIFO. Must run before the pipeline opens the FIFO for writing.
+        """
+        with self.lock:
+            stream_index = len(self.frame_times)
+            self.frame_times.append(collections.deque())
+            self.last_timestamps.append(None)
+            self.frame_durations.append(None)
+            self.dropped_frames.append(0)
+            self.inference_latency.pop(stream_index, None)
+            # A stream added again at the same index reuses the reader of its FIFO
+            if metrics_fifo in self.readers:
+                return
+            self.readers.add(metrics_fifo)
+        threading.Thread(
+            target=self.read_fifo, args=(stream_index, metrics_fifo), daemon=True
+        ).start()
+
+    def remove_stream(self):
+        """
+        Stop tracking the last stream.
+        """
+        with self.lock:
+            for values in (self.frame_times, self.last_timestamps, self.frame_durations, self.dropped_frames):
+                values.pop()
+            self.inference_latency.pop(len(self.frame_times), None)
+
+    def set_inference_latency(self, stream_index, latency):
+        with self.lock:
+            if stream_index < len(self.frame_times):
+                self.inference_latency[stream_index] = latency
+
+    def read_fifo(self, stream_index, path):
+        while True:
+            # Blocks until the pipeline opens the FIFO, reopened when the pipeline restarts
+            with open(path, "r") as fifo:
+                for line in fifo:
+                    try:
+                        timestamp = json.loads(line).get("timestamp")
+                    except ValueError:
+                        continue
+                    self.add_frame(stream_index, timestamp)
+
+    def add_frame(self, stream_index, timestamp):
+        now = time.time()
+        with self.lock:
+            if stream_index >= len(self.frame_times):
+                # The stream was removed
+                return
+            first_frame = not self.received
+            self.received = True
+            frame_times = self.frame_times[stream_index]
+            frame_times.append(now)
+            while frame_times[0] < now - self.window:
+                frame_times.popleft()
+
+            last_timestamp = self.last_timestamps[stream_index]
+            self.last_timestamps[stream_index] = timestamp
+            # Timestamps restart when a looping source rewinds
+            if timestamp is not None and last_timestamp is not None and timestamp > last_timestamp:
+                delta = timestamp - last_timestamp
+                frame_duration = self.frame_durations[stream_index]
+                if frame_duration is None or delta < frame_duration:
+                    self.frame_durations[stream_index] = delta
+                elif delta > 1.5 * frame_duration:
+                    self.dropped_frames[stream_index] += round(delta / frame_duration) - 1
+        if first_frame and self.on_first_frame is not None:
+            self.on_first_frame(time.perf_counter() - self.start_time)
+        self.publish()
+
+    def add_tracer_line(self, line):
+        """
+        Record a latency tracer line, returns False when the line is not a latency record.
+        """
+        if "latency_tracer" not in line:
+            return False
+        match = ELEMENT_LATENCY_PATTERN.search(line)
+        if match:
+            with self.lock:
+                self.inference_latency[int(match.group(1))] = float(match.group(3))
+        else:
+            match = PIPELINE_LATENCY_PATTERN.search(line)
+            if match:
+                with self.lock:
+                    self.pipeline_latency = float(match.group(2))
+        return True
+
+    def publish(self):
+        with self.lock:
+            now = time.time()
+            if now - self.last_update < self.interval or not self.frame_times:
+                return
+            self.last_update = now
+            number_of_streams = len(self.frame_times)
+
+            fps_streams = {}
+            for stream_index, frame_times in enumerate(self.frame_times):
+                elapsed = frame_times[-1] - frame_times[0] if frame_times else 0
+                fps = (len(frame_times) - 1) / elapsed if elapsed > 0 else 0.0
+                fps_streams[f"stream_id {stream_index + 1}"] = fps
+            inference_latency_streams = {
+                f"stream_id {stream_index + 1}": latency
+                for stream_index, latency in sorted(self.inference_latency.items())
+            }
+            dropped_frames_streams = {
+                f"stream_id {stream_index + 1}": dropped
+                for stream_index, dropped in enumerate(self.dropped_frames)
+            }
+            pipeline_latency = self.pipeline_latency
+
+        total_fps = sum(fps_streams.values())
+        app.state.pipeline_metrics.update(
+            {
+                "total_fps": total_fps,
+                "number_streams": number_of_streams,
+                "average_fps_per_stream": total_fps / number_of_streams,
+                "fps_streams": fps_streams,
+                "inference_latency_ms": (
+                    sum(inference_latency_streams.values()) / len(inference_latency_streams)
+                    if inference_latency_streams
+                    else None
+                ),
+                "inference_latency_streams": inference_latency_streams,
+                "pipeline_latency_ms": pipeline_latency,
+                "estimated_dropped_frames": sum(dropped_frames_streams.values()),
+                "estimated_dropped_frames_streams": dropped_frames_streams,
+                "timestamp": now,
+            }
+        )
+
+
+def create_metrics_fifos(number_of_streams, metrics_dir=None):
+    """
+    Create one named pipe per stream for the gvametapublish JSON lines, existing pipes in metrics_dir are reused.
+    """
+    if metrics_dir is None:
+        metrics_dir = tempfile.mkdtemp(prefix="dlstreamer-metrics-")
+    metrics_fifos = [
+        os.path.join(metrics_dir, f"stream_{i}.jsonl") for i in range(number_of_streams)
+    ]
+    for path in metrics_fifos:
+        if not os.path.exists(path):
+            os.mkfifo(path)
+    return metrics_fifos
+
+
+def drain_stdout(process, collector):
+    """
+    Log the pipeline stdout. The FpsCounter output is only used until structured metrics arrive.
+    """
+    for line in process.stdout:
+        line = line.strip()
+        logging.info(line)
+        if collector is None or not collector.received:
+            metrics = filter_result(line)
+            if metrics:
+                app.state.pipeline_metrics.update(metrics)
+
+
+def drain_stderr(process, collector):
+    """
+    Feed the latency tracer records to the collector and log everything else as errors.
+    """
+    for line in process.stderr:
+        if collector is not None and collector.add_tracer_line(line):
+            continue
+        logging.error(line.strip())
+
+
+def run_pipeline(pipeline, collector=None):
     """
     Run the GStreamer pipeline and process its output in real-time.
+    stdout and stderr are drained concurrently so the pipeline never blocks on a full pipe.
     Handles EOS for looping and updates pipeline metrics.
     """
     logging.info("Starting GStreamer pipeline...")
+    process = None
     try:
         env = os.environ.copy() #add
         env['LD_LIBRARY_PATH'] = '/opt/opencv:' + env.get('LD_LIBRARY_PATH', '') #add
+        if collector is not None and args.latency_tracer:
+            # Per frame latency of the pipeline and of every element, logged on stderr next to the user's GST_DEBUG
+            env["GST_TRACERS"] = "latency_tracer(flags=pipeline+element)"
+            env["GST_DEBUG"] = ",".join(filter(None, (env.get("GST_DEBUG"), "GST_TRACER:7")))
+            env["GST_DEBUG_NO_COLOR"] = "1"
         process = sp.Popen(pipeline, stdout=sp.PIPE, stderr=sp.PIPE, text=True, env=env)
-        # Monitor the pipeline's stdout
-        for line in process.stdout:
-            logging.info(line.strip())
-            # Process each line of output using filter_result
-            metrics = filter_result(line.strip())
-            if metrics:
-                app.state.pipeline_metrics.update(metrics)
-
-        # Capture any errors from stderr
-        for error_line in process.stderr:
-            logging.error(error_line.strip())
+        drain_threads = [
+            threading.Thread(target=drain, args=(process, collector), daemon=True)
+            for drain in (drain_stdout, drain_stderr)
+        ]
+        for thread in drain_threads:
+            thread.start()
+        for thread in drain_threads:
+            thread.join()
+        process.wait()
 
         # Check if the process exited due to EOS
-        if process.returncode == 0 or process.returncode is None:
+        if process.returncode == 0:
             logging.info("Pipeline reached EOS. Restarting...")
-            process.communicate()
         else:
             logging.error(f"Pipeline exited with error code: {process.returncode}")
 
     except Exception as e:
         logging.error(f"Unexpected error: {e}")
-        if process and process.poll() is None:
-            process.terminate()
-            process.wait()
     finally:
         if process and process.poll() is None:
             process.terminate()
             process.wait()
 
 
+def request_pad(element, template):
+    """
+    Request a pad from element, request_pad_simple replaced get_request_pad in GStreamer 1.20.
+    """
+    if hasattr(element, "request_pad_simple"):
+        return element.request_pad_simple(template)
+    return element.get_request_pad(template)
+
+
+class GstPipelineRunner:
+    """
+    Run the DLStreamer pipeline in-process with PyGObject, so streams can be attached to or detached from the
+    compositor while the pipeline keeps playing. Every stream is a source -> decode -> inference bin linked to a
+    compositor request pad, and the compositor grid is recomputed whenever the number of streams changes.
+    With a webcam input every stream branches off one tee, since the device can only be opened once.
+    Inference latency is measured with pad probes around each inference element.
+    """
+
+    def __init__(
+        self,
+        tcp_port,
+        input,
+        inference_mode,
+        model_full_path,
+        model_label_path,
+        device,
+        decode_device,
+        batch_size=1,
+        collector=None,
+        width=640,
+        height=480,
+        cache_dir=None,
+        tuned_config=None,
+    ):
+        Gst.init(None)
+        self.collector = collector
+        self.metrics_dir = tempfile.mkdtemp(prefix="dlstreamer-metrics-") if collector is not None else None
+        self.width = width
+        self.height = height
+        self.branches = []
+        # Branches get unique names, so messages of a branch being removed can be told apart
+        self.branch_count = 0
+        self.removed_branches = set()
+        self.loop = None
+
+        if input.endswith((".mp4", ".avi", ".mov")):
+            self.source_command = ["multifilesrc", f"location={input}", "loop=true"]
+        elif input.startswith("rtsp://"):
+            self.source_command = ["rtspsrc", f"location={input}", "protocols=tcp"]
+        else:
+            self.source_command = None
+        self.decode_element = build_decode_element(input, decode_device)
+        self.inference_command = build_inference_command(
+            inference_mode, model_full_path, model_label_path, device, decode_device, batch_size, cache_dir, tuned_config
+        )
+
+        description = f"compositor name=comp ! jpegenc ! multipartmux boundary=frame ! tcpserversink host=127.0.0.1 port={tcp_port}"
+        if self.source_command is None:
+            description += f" v4l2src device={input} ! videoconvert ! tee name=camtee allow-not-linked=true"
+        self.pipeline = Gst.parse_launch(description)
+        self.compositor = self.pipeline.get_by_name("comp")
+        self.tee = self.pipeline.get_by_name("camtee")
+
+    def __build_branch(self, stream_index, metrics_fifo):
+        branch = (
+            self.decode_element
+            + ["!"]
+            + build_inference_branch(self.inference_command, stream_index, metrics_fifo)
+            + ["!", "queue", "!", "gvafpscounter", "!", "gvawatermark", "!", "videoconvert", "name=output"]
+        )
+        if self.source_command is not None:
+            branch = self.source_command + ["!"] + branch
+        else:
+            branch = ["queue", "name=input", "max-size-buffers=10", "leaky=downstream", "!"] + branch
+
+        # Ghost pads are added by name, the rtspsrc pads only appear once the stream is negotiated
+        branch_bin = Gst.parse_bin_from_description(" ".join(branch), False)
+        branch_bin.add_pad(Gst.GhostPad.new("src", branch_bin.get_by_name("output").get_static_pad("src")))
+        if self.source_command is None:
+            branch_bin.add_pad(Gst.GhostPad.new("sink", branch_bin.get_by_name("input").get_static_pad("sink")))
+        return branch_bin
+
+    def __probe_inference_latency(self, branch, stream_index):
+        inference = branch.get_by_name(f"infer{stream_index}")
+        start_times = {}
+        latencies = collections.deque(maxlen=100)
+
+        def on_sink_buffer(pad, info):
+            start_times[info.get_buffer().pts] = time.time()
+            return Gst.PadProbeReturn.OK
+
+        def on_src_buffer(pad, info):
+            start_time = start_times.pop(info.get_buffer().pts, None)
+            if start_time is not None and self.collector is not None:
+                latencies.append((time.time() - start_time) * 1000)
+                self.collector.set_inference_latency(stream_index, sum(latencies) / len(latencies))
+            return Gst.PadProbeReturn.OK
+
+        inference.get_static_pad("sink").add_probe(Gst.PadProbeType.BUFFER, on_sink_buffer)
+        inference.get_static_pad("src").add_probe(Gst.PadProbeType.BUFFER, on_src_buffer)
+
+    def __add_stream(self):
+        stream_index = len(self.branches)
+        metrics_fifo = None
+        if self.collector is not None:
+            metrics_fifo = create_metrics_fifos(stream_index + 1, self.metrics_dir)[stream_index]
+            self.collector.add_stream(metrics_fifo)
+
+        branch = self.__build_branch(stream_index, metrics_fifo)
+        branch.set_name(f"branch{self.branch_count}")
+        self.branch_count += 1
+        self.__probe_inference_latency(branch, stream_index)
+        self.pipeline.add(branch)
+        sink_pad = request_pad(self.compositor, "sink_%u")
+        branch.get_static_pad("src").link(sink_pad)
+        tee_pad = None
+        if self.tee is not None:
+            tee_pad = request_pad(self.tee, "src_%u")
+            tee_pad.link(branch.get_static_pad("sink"))
+        branch.sync_state_with_parent()
+        self.branches.append((branch, sink_pad, tee_pad))
+
+    def __remove_stream(self):
+        branch, sink_pad, tee_pad = self.branches.pop()
+        if self.collector is not None:
+            self.collector.remove_stream()
+        self.removed_branches.add(branch.get_name())
+        # Hold the next buffer of the branch output, so nothing is pushed into the compositor pad while the branch
+        # is shut down. The branch stays linked until it is stopped, an unlinked output fails with NOT_LINKED.
+        disposing = threading.Event()
+        branch.get_static_pad("src").add_probe(
+            Gst.PadProbeType.BLOCK_DOWNSTREAM, self.__on_branch_blocked, (branch, sink_pad, tee_pad, disposing)
+        )
+
+    def __on_branch_blocked(self, pad, info, userdata):
+        branch, sink_pad, tee_pad, disposing = userdata
+        if not disposing.is_set():
+            disposing.set()
+            # State changes are not allowed from the streaming thread
+            GLib.idle_add(self.__dispose_branch, branch, sink_pad, tee_pad)
+        # Stay blocked, stopping the branch flushes the pad and releases the streaming thread
+        return Gst.PadProbeReturn.OK
+
+    def __dispose_branch(self, branch, sink_pad, tee_pad):
+        if tee_pad is not None:
+            tee_pad.unlink(branch.get_static_pad("sink"))
+            self.tee.release_request_pad(tee_pad)
+        branch.set_state(Gst.State.NULL)
+        branch.get_static_pad("src").unlink(sink_pad)
+        self.compositor.release_request_pad(sink_pad)
+        self.pipeline.remove(branch)
+        return GLib.SOURCE_REMOVE
+
+    def __is_removed_branch_message(self, message):
+        element = message.src
+        while element is not None and element.get_parent() not in (None, self.pipeline):
+            element = element.get_parent()
+        return element is not None and element.get_name() in self.removed_branches
+
+    def __update_layout(self):
+        layout = build_grid_layout(len(self.branches), self.width, self.height)
+        for (_, sink_pad, _), (xpos, ypos, width, height) in zip(self.branches, layout):
+            sink_pad.set_property("xpos", xpos)
+            sink_pad.set_property("ypos", ypos)
+            sink_pad.set_property("width", width)
+            sink_pad.set_property("height", height)
+
+    def __apply_stream_count(self, number_of_streams):
+        while len(self.branches) < number_of_streams:
+            self.__add_stream()
+        while len(self.branches) > number_of_streams:
+            self.__remove_stream()
+        self.__update_layout()
+        logging.info(f"Running {number_of_streams} streams")
+        return GLib.SOURCE_REMOVE
+
+    def set_stream_count(self, number_of_streams):
+        """
+        Attach or detach streams while the pipeline is playing. Safe to call from any thread.
+        """
+        GLib.idle_add(self.__apply_stream_count, number_of_streams)
+
+    def __on_message(self, bus, message):
+        if message.type in (Gst.MessageType.ERROR, Gst.MessageType.EOS) and self.__is_removed_branch_message(message):
+            # A branch being shut down may fail or end on its way to NULL, the other streams keep running
+            kind = "error" if message.type == Gst.MessageType.ERROR else "EOS"
+            logging.debug(f"Ignoring {kind} from removed stream element {message.src.get_name()}")
+            return
+        if message.type == Gst.MessageType.ERROR:
+            error, debug = message.parse_error()
+            logging.error(f"Pipeline error from {message.src.get_name()}: {error.message} {debug or ''}")
+            self.loop.quit()
+        elif message.type == Gst.MessageType.WARNING:
+            warning, _ = message.parse_warning()
+            logging.warning(f"Pipeline warning from {message.src.get_name()}: {warning.message}")
+        elif message.type == Gst.MessageType.EOS:
+            logging.info("Pipeline reached EOS.")
+            self.loop.quit()
+
+    def run(self, number_of_streams=1):
+        """
+        Start number_of_streams streams and run the pipeline until it fails or reaches EOS.
+        """
+        self.loop = GLib.MainLoop()
+        bus = self.pipeline.get_bus()
+        bus.add_signal_watch()
+        bus.connect("message", self.__on_message)
+        self.__apply_stream_count(number_of_streams)
+        self.pipeline.set_state(Gst.State.PLAYING)
+        try:
+            self.loop.run()
+        finally:
+            self.pipeline.set_state(Gst.State.NULL)
+            bus.remove_signal_watch()
+
+
 def filter_result(output):
     """
     Extract the FPS metrics from the command output.
@@ -460,10 +1009,7 @@ def filter_result(output):
     Returns:
         dict: A dictionary containing the total FPS, the number of streams, the average FPS per stream, a mapping of individual stream FPS values and timestamp.
     """
-    fps_pattern = re.compile(
-        r"FpsCounter\(.*\): total=(\d+\.\d+) fps, number-streams=(\d+), per-stream=(\d+\.\d+) fps(?: \((.*?)\))?"
-    )
-    match = fps_pattern.search(output)
+    match = FPS_PATTERN.search(output)
     if match:
         total_fps_str = match.group(1)
         number_streams_str = match.group(2)
@@ -540,14 +1086,73 @@ def is_valid_id(id):
     return False
 
 
+def get_tuned_config(model_full_path, device):
+    """
+    Return the throughput configuration tuned for the model on device, tuning it first with --autotune.
+    """
+    tuned = load_tuned_config(model_full_path, device, "throughput")
+    if tuned is None and args.autotune:
+        logging.info(f"Tuning the OpenVINO configuration of {model_full_path} on {device}, this takes a few minutes...")
+        try:
+            tune(model_full_path, device)
+        except Exception as e:
+            logging.warning(f"Tuning {model_full_path} on {device} failed, using the default configuration: {e}")
+        tuned = load_tuned_config(model_full_path, device, "throughput")
+    if tuned is not None:
+        logging.info(f"Using the configuration tuned for {device}: {tuned['config']}, {tuned['num_requests']} requests")
+    return tuned
+
+
+def run_density_search():
+    """
+    Search the stream density of the running pipeline, then keep running at the density found.
+    """
+
+    def on_report(report):
+        global density_report
+        density_report = report
+
+    report = find_stream_density(
+        set_stream_count=pipeline_runner.set_stream_count,
+        read_metrics=lambda: dict(app.state.pipeline_metrics),
+        target_fps=args.density_target_fps,
+        max_streams=args.density_max_streams,
+        report_path=args.density_report,
+        report_info={
+            "worker": "dlstreamer",
+            "model": args.model,
+            "device": args.device,
+            "decode_device": args.decode_device,
+            "inference_mode": args.inference_mode,
+        },
+        on_report=on_report,
+    )
+    pipeline_runner.set_stream_count(max(report["max_streams"], 1))
+
+
 def main():
     """
     Main function to start the GStreamer pipeline.
     """
+    global pipeline_runner
     logging.info(
         f"View stream at url: http://localhost:{args.port}/result/{args.tcp_port}"
     )
 
+    if args.pipeline_runner == "gst" and Gst is None:
+        logging.error(
+            "The gst pipeline runner requires PyGObject with the GStreamer bindings. Use --pipeline_runner subprocess instead."
+        )
+        update_payload_status(args.id, status="failed")
+        exit(1)
+
+    if args.density_target_fps > 0 and args.pipeline_runner != "gst":
+        logging.error(
+            "The stream density search changes the number of streams at runtime and requires --pipeline_runner gst."
+        )
+        update_payload_status(args.id, status="failed")
+        exit(1)
+
     if os.path.realpath(args.input) != os.path.abspath(
         args.input
     ):  # Check if the model path is a symlink
@@ -649,7 +1254,10 @@ def main():
         if not custom_model_path.exists():
             # predefined model
             model_status = export_yolo_model(
-                model_name=args.model, model_parent_dir=args.model_parent_dir
+                model_name=args.model,
+                model_parent_dir=args.model_parent_dir,
+                precision=args.model_precision,
+                device=args.device,
             )
 
             if not model_status:
@@ -672,23 +1280,54 @@ def main():
             if label_files:
                 model_label_path = label_files[0]
 
-    # Build the pipeline
-    pipeline = build_pipeline(
-        tcp_port=args.tcp_port,
-        inference_mode=args.inference_mode,
-        input=args.input,
-        model_full_path=model_full_path,
-        model_label_path=model_label_path,
-        device=args.device,
-        decode_device=args.decode_device,
-        number_of_streams=args.number_of_streams,
-    )
+    # gvadetect compiles the model inside the pipeline, so the load is timed up to the first inference result
+    model_cache = CompiledModelCache(str(model_full_path), args.device)
+    collector = PipelineMetricsCollector(on_first_frame=model_cache.record_load)
+    tuned_config = get_tuned_config(str(model_full_path), args.device)
 
     # Start the pipeline
     logging.info("Starting the pipeline...")
     try:
-        update_payload_status(args.id, status="active")
-        run_pipeline(pipeline)
+        if args.pipeline_runner == "gst":
+            pipeline_runner = GstPipelineRunner(
+                tcp_port=args.tcp_port,
+                input=args.input,
+                inference_mode=args.inference_mode,
+                model_full_path=model_full_path,
+                model_label_path=model_label_path,
+                device=args.device,
+                decode_device=args.decode_device,
+                collector=collector,
+                width=args.width_limit,
+                height=args.height_limit,
+                cache_dir=model_cache.cache_dir,
+                tuned_config=tuned_config,
+            )
+            update_payload_status(args.id, status="active")
+            if args.density_target_fps > 0:
+                threading.Thread(target=run_density_search, daemon=True).start()
+            pipeline_runner.run(args.number_of_streams)
+        else:
+            metrics_fifos = create_metrics_fifos(args.number_of_streams)
+            for metrics_fifo in metrics_fifos:
+                collector.add_stream(metrics_fifo)
+
+            # Build the pipeline
+            pipeline = build_pipeline(
+                tcp_port=args.tcp_port,
+                inference_mode=args.inference_mode,
+                input=args.input,
+                model_full_path=model_full_path,
+                model_label_path=model_label_path,
+                device=args.device,
+                decode_device=args.decode_device,
+                number_of_streams=args.number_of_streams,
+                metrics_fifos=metrics_fifos,
+                cache_dir=model_cache.cache_dir,
+                tuned_config=tuned_config,
+            )
+            update_payload_status(args.id, status="active")
+            run_pipeline(pipeline, collector)
     except KeyboardInterrupt:
         logging.info("Pipeline interrupted. Exiting...")
     except Exception as e:
@@ -696,44 +1335,117 @@ def main():
         logging.error(f"An error occurred while running the pipeline: {e}")
 
 
-def mjpeg_stream(host: str = "127.0.0.1", port: int = 5000):
+class MjpegRelay:
     """
-    Connect to the GStreamer TCP server and yield MJPEG frames.
+    Share one connection to the multipartmux TCP stream between all /result clients and forward its JPEG parts untouched.
+    The stream is parsed in place in a reusable bytearray, nothing is decoded or re-encoded. Clients always get the
+    most recent frame, a client slower than the pipeline skips frames instead of queueing them.
+    The upstream connection is only kept open while at least one client is connected.
     """
-    # Connect to the TCP server
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as client_socket:
-        client_socket.connect((host, port))
-        buffer = b""
 
-        while True:
-            # Read data from the TCP server
-            data = client_socket.recv(4096)
-            if not data:
+    HEADER_END = b"\r\n\r\n"
+    BOUNDARY = b"\r\n--frame"
+    CONTENT_LENGTH = re.compile(rb"content-length:\s*(\d+)", re.IGNORECASE)
+
+    def __init__(self, host="127.0.0.1", port=5000, buffer_size=1 << 20):
+        self.host = host
+        self.port = port
+        self.buffer = bytearray(buffer_size)
+        self.condition = threading.Condition()
+        self.chunk = None
+        self.seq = 0
+        self.clients = 0
+        self.thread = None
+
+    def __publish(self, payload):
+        chunk = b"".join((b"--frame\r\nContent-Type: image/jpeg\r\n\r\n", payload, b"\r\n"))
+        with self.condition:
+            self.chunk = chunk
+            self.seq += 1
+            self.condition.notify_all()
+
+    def __parse(self, start, end):
+        """
+        Publish every complete part in buffer[start:end] and return the offset of the first unconsumed byte.
+        """
+        view = memoryview(self.buffer)
+        try:
+            while True:
+                header_end = self.buffer.find(self.HEADER_END, start, end)
+                if header_end < 0:
+                    return start
+                payload_start = header_end + len(self.HEADER_END)
+                match = self.CONTENT_LENGTH.search(self.buffer, start, header_end)
+                if match:
+                    payload_end = payload_start + int(match.group(1))
+                    if payload_end > end:
+                        return start
+                else:
+                    # No Content-Length header, the part ends at the next boundary
+                    payload_end = self.buffer.find(self.BOUNDARY, payload_start, end)
+                    if payload_end < 0:
+                        return start
+                self.__publish(view[payload_start:payload_end])
+                start = payload_end
+        finally:
+            view.release()
+
+    def __read(self, client_socket):
+        start = end = 0
+        while self.clients > 0:
+            if end == len(self.buffer):
+                if start == 0:
+                    # A single part does not fit, grow the buffer
+                    self.buffer.extend(bytes(len(self.buffer)))
+                else:
+                    # Move the incomplete part to the front of the buffer
+                    self.buffer[:end - start] = self.buffer[start:end]
+                    start, end = 0, end - start
+            with memoryview(self.buffer) as view:
+                received = client_socket.recv_into(view[end:])
+            if not received:
                 break
+            end += received
+            start = self.__parse(start, end)
+            if start == end:
+                start = end = 0
 
-            buffer += data
-            while b"\r\n\r\n" in buffer:
-                frame, _, buffer = buffer.partition(b"\r\n\r\n")
-
-                try:
-                    # Convert raw frame data to a NumPy array and decode the frame
-                    np_frame = np.frombuffer(frame, dtype=np.uint8)
-                    image = cv2.imdecode(np_frame, cv2.IMREAD_COLOR)
-                    if image is None:
+    def __run(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.clients > 0)
+            try:
+                with socket.create_connection((self.host, self.port)) as client_socket:
+                    self.__read(client_socket)
+            except OSError as e:
+                logging.info(f"MJPEG stream not available on port {self.port}: {e}")
+                time.sleep(1)
+
+    def stream(self):
+        """
+        Yield multipart MJPEG chunks for one client, blocking until a newer frame than the last one sent arrives.
+        """
+        with self.condition:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.__run, daemon=True)
+                self.thread.start()
+            self.clients += 1
+            # The cached chunk is stale when nobody was watching, wait for a fresh one
+            last_seq = self.seq
+            self.condition.notify_all()
+        try:
+            while True:
+                with self.condition:
+                    if not self.condition.wait_for(lambda: self.seq != last_seq, timeout=1.0):
                         continue
+                    last_seq, chunk = self.seq, self.chunk
+                yield chunk
+        finally:
+            with self.condition:
+                self.clients -= 1
 
-                    # Encode the image as JPEG
-                    _, jpeg_frame = cv2.imencode(".jpg", image)
 
-                    # Yield the encoded JPEG frame
-                    yield (
-                        b"--frame\r\n"
-                        b"Content-Type: image/jpeg\r\n\r\n"
-                        + jpeg_frame.tobytes()
-                        + b"\r\n"
-                    )
-                except Exception as e:
-                    logging.info(f"Error processing frame: {e}")
+relay = MjpegRelay(port=args.tcp_port)
 
 
 @app.get("/result")
@@ -743,7 +1455,7 @@ def get_mjpeg_stream():
     """
     try:
         return StreamingResponse(
-            mjpeg_stream(port=args.tcp_port),
+            relay.stream(),
             media_type="multipart/x-mixed-replace; boundary=frame",
         )
     except Exception as e:
@@ -755,6 +1467,47 @@ def get_mjpeg_stream():
         )
 
 
+class StreamsRequest(BaseModel):
+    number_of_streams: int
+
+
+@app.post("/api/streams")
+def set_number_of_streams(request: StreamsRequest):
+    """
+    Attach or detach streams at runtime, only supported by the gst pipeline runner.
+    """
+    if pipeline_runner is None:
+        return JSONResponse(
+            {
+                "status": False,
+                "message": "Changing the number of streams at runtime requires --pipeline_runner gst",
+            }
+        )
+    if request.number_of_streams < 1:
+        return JSONResponse(
+            {"status": False, "message": "number_of_streams must be at least 1"}
+        )
+    pipeline_runner.set_stream_count(request.number_of_streams)
+    return JSONResponse(
+        {"status": "success", "number_of_streams": request.number_of_streams}
+    )
+
+
+@app.get("/api/density")
+def get_density_report():
+    """
+    Return the stream density report, updated after every step of the search.
+    """
+    if density_report is None:
+        return JSONResponse(
+            {
+                "status": False,
+                "message": "No stream density search has run, start the worker with --density_target_fps",
+            }
+        )
+    return JSONResponse({"data": density_report, "status": "success"})
+
+
 @app.get("/api/metrics")
 def get_pipeline_metrics():
     """
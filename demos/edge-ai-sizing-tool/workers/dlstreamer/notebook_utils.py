@@ -4,6 +4,8 @@
 # In[ ]:
 
 
+import collections
+import logging
 import platform
 import sys
 import threading
@@ -239,23 +241,195 @@ def to_bgr(image_data):
 # In[ ]:
 
 
+class FrameRing:
+    """
+    Fixed set of frame buffers that are decoded into and handed out with reference counts.
+    A buffer is only written while no reference to it is held, so a frame never changes under its readers,
+    and buffers are only allocated when the frame size changes.
+
+    :param num_buffers: Number of buffers in the ring.
+    """
+
+    def __init__(self, num_buffers):
+        self.buffers = [None] * num_buffers
+        self.views = [None] * num_buffers
+        self.refcounts = [0] * num_buffers
+        self.condition = threading.Condition()
+        self.allocations = 0
+
+    def acquire_free(self, shape, timeout=None):
+        """
+        Reserve a buffer of the given shape that nobody references, returns its index or None on timeout.
+        """
+        import numpy as np
+
+        with self.condition:
+            if not self.condition.wait_for(lambda: 0 in self.refcounts, timeout):
+                return None
+            index = self.refcounts.index(0)
+            self.refcounts[index] = 1
+            if self.buffers[index] is None or self.buffers[index].shape != shape:
+                self.adopt(index, np.empty(shape, dtype=np.uint8))
+            return index
+
+    def adopt(self, index, buffer):
+        """
+        Replace the buffer at index, used when the decoder had to allocate a frame of another size.
+        """
+        self.buffers[index] = buffer
+        view = buffer.view()
+        view.flags.writeable = False
+        self.views[index] = view
+        self.allocations += 1
+
+    def retain(self, index):
+        with self.condition:
+            self.refcounts[index] += 1
+
+    def release(self, index):
+        with self.condition:
+            self.refcounts[index] -= 1
+            if self.refcounts[index] == 0:
+                self.condition.notify()
+
+    def is_exclusive(self, index):
+        with self.condition:
+            return self.refcounts[index] == 1
+
+
+class Frame:
+    """
+    Reference to a decoded frame. image is a read-only view of the frame buffer and seq the decode sequence number,
+    call release() or use the frame as a context manager when done with it. Frames not backed by a ring, like resized
+    copies, use from_array.
+    """
+
+    __slots__ = ("ring", "index", "seq", "image", "released")
+
+    def __init__(self, ring, index, seq=None):
+        self.ring = ring
+        self.index = index
+        self.seq = seq
+        self.image = ring.views[index] if ring is not None else None
+        self.released = False
+
+    @classmethod
+    def from_array(cls, array, seq=None):
+        frame = cls(None, None, seq)
+        frame.image = array
+        return frame
+
+    def retain(self):
+        """
+        Return a new reference to the same frame, released independently.
+        """
+        if self.ring is None:
+            return Frame.from_array(self.image, self.seq)
+        self.ring.retain(self.index)
+        return Frame(self.ring, self.index, self.seq)
+
+    def shared_image(self):
+        """
+        Return the frame buffer itself, for consumers like OpenVINO that only share memory flagged writable and copy
+        read-only views. The caller only reads it and holds this reference until done, so the buffer is not decoded
+        into meanwhile.
+        """
+        if self.ring is None:
+            return self.image
+        return self.ring.buffers[self.index]
+
+    def writable_image(self):
+        """
+        Return the frame for drawing on: the buffer itself when this is its only reference, a copy otherwise.
+        """
+        if self.ring is None:
+            return self.image
+        if self.ring.is_exclusive(self.index):
+            return self.ring.buffers[self.index]
+        return self.image.copy()
+
+    def release(self):
+        if not self.released and self.ring is not None:
+            self.ring.release(self.index)
+        self.released = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+# Hardware decode APIs tried in order on a GPU decode device, VIDEO_ACCELERATION_ANY lets FFmpeg pick the
+# platform's API, like D3D11 on Windows. Sources no hardware decoder takes are decoded in software.
+HW_ACCELERATION_CHAIN = ("VIDEO_ACCELERATION_VAAPI", "VIDEO_ACCELERATION_ANY")
+
+
+def open_video_capture(source, decode_device="CPU"):
+    """
+    Open a cv2.VideoCapture on source, decoding on decode_device: CPU decodes in software, GPU or GPU.<index>
+    requests hardware decode through CAP_PROP_HW_ACCELERATION and falls back along HW_ACCELERATION_CHAIN,
+    then to software decode. Camera indices are always opened in software.
+
+    :param source: Video source. It could be either camera device or video file.
+    :param decode_device: CPU, GPU or GPU.<index>.
+    :return: The capture and the name of the decode acceleration in use, "none" for software decode.
+    """
+    import cv2
+
+    if "CPU" not in decode_device and "GPU" not in decode_device:
+        raise ValueError(f"Unsupported decode device {decode_device}, expected CPU or GPU")
+    if "GPU" in decode_device and not isinstance(source, int):
+        _, _, index = decode_device.partition(".")
+        hw_device = int(index) if index.isdigit() else -1
+        for name in HW_ACCELERATION_CHAIN:
+            params = [cv2.CAP_PROP_HW_ACCELERATION, getattr(cv2, name), cv2.CAP_PROP_HW_DEVICE, hw_device]
+            # Pinned to FFmpeg, other backends open the source and ignore the hardware acceleration request
+            cap = cv2.VideoCapture(source, cv2.CAP_FFMPEG, params)
+            acceleration = int(cap.get(cv2.CAP_PROP_HW_ACCELERATION)) if cap.isOpened() else cv2.VIDEO_ACCELERATION_NONE
+            if acceleration > cv2.VIDEO_ACCELERATION_NONE:
+                names = {getattr(cv2, n): n for n in dir(cv2) if n.startswith("VIDEO_ACCELERATION_")}
+                return cap, names.get(acceleration, str(acceleration))[len("VIDEO_ACCELERATION_"):].lower()
+            cap.release()
+            logging.info(f"Hardware decode with {name} is not available for {source}")
+        logging.warning(f"No hardware decoder available for {source}, decoding on CPU")
+    return cv2.VideoCapture(source), "none"
+
+
+# How VideoPlayer hands decoded frames to the consumer:
+# latest: decode at the input FPS and keep only the newest frame, frames replaced before they are read are dropped
+# all: decode at the target FPS into a bounded queue, decoding waits while the queue is full so no frame is dropped
+# unpaced: like all, but decode as fast as the decoder allows, for benchmark runs
+PLAYBACK_POLICIES = ("latest", "all", "unpaced")
+
+
 class VideoPlayer:
     """
     Custom video player to fulfill FPS requirements. You can set target FPS and output size,
     flip the video horizontally or skip first N frames.
+    Frames are decoded into a ring of reused buffers, next_frame hands them out without copying.
+    Every frame is handed out at most once, in decode order, and carries its sequence number.
 
     :param source: Video source. It could be either camera device or video file.
     :param size: Output frame size.
     :param flip: Flip source horizontally.
     :param fps: Target FPS.
     :param skip_first_frames: Skip first N frames.
+    :param num_buffers: Frame buffers in the ring, at least the number of frames the consumer holds at once plus two.
+    :param policy: One of PLAYBACK_POLICIES.
+    :param decode_device: CPU, GPU or GPU.<index>, see open_video_capture.
     """
 
-    def __init__(self, source, size=None, flip=False, fps=None, skip_first_frames=0, width=1280, height=720):
+    def __init__(
+        self, source, size=None, flip=False, fps=None, skip_first_frames=0, width=1280, height=720, num_buffers=4,
+        policy="latest", decode_device="CPU",
+    ):
         import cv2
 
+        if policy not in PLAYBACK_POLICIES:
+            raise ValueError(f"Unknown playback policy {policy}, expected one of {', '.join(PLAYBACK_POLICIES)}")
         self.cv2 = cv2  # This is done to access the package in class methods
-        self.__cap = cv2.VideoCapture(source)
+        self.__cap, self.__acceleration = open_video_capture(source, decode_device)
         # try HD by default to get better video quality
         self.__cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
         self.__cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
@@ -277,11 +451,25 @@ class VideoPlayer:
             self.__size = size
             # AREA better for shrinking, LINEAR better for enlarging
             self.__interpolation = cv2.INTER_AREA if size[0] < self.__cap.get(cv2.CAP_PROP_FRAME_WIDTH) else cv2.INTER_LINEAR
-        # first frame
-        _, self.__frame = self.__cap.read()
-        self.__lock = threading.Lock()
+        self.__policy = policy
+        self.__ring = FrameRing(max(num_buffers, 3))
+        # Frames decoded but not handed out yet, the ring also holds the frame being decoded and the consumer's one
+        self.__queue = collections.deque()
+        self.__queue_size = 1 if policy == "latest" else max(num_buffers - 2, 1)
+        self.__condition = threading.Condition()
+        self.__ended = False
+        self.__decoded = 0
+        self.__delivered = 0
+        self.__dropped = 0
+        # Decode times [s] of the last 200 frames
+        self.__decode_times = collections.deque(maxlen=200)
+        # Resized or flipped frames are decoded into a scratch buffer and transformed into the ring
+        self.__decode_buffer = None
+        self.__decode_allocations = 0
         self.__thread = None
         self.__stop = False
+        # first frame
+        self.__read_frame(publish=True)
 
     """
     Start playing.
@@ -297,51 +485,214 @@ class VideoPlayer:
     """
 
     def stop(self):
-        self.__stop = True
+        with self.__condition:
+            self.__stop = True
+            self.__condition.notify_all()
         if self.__thread is not None:
             self.__thread.join()
+        self.__end()
+        with self.__condition:
+            queued, self.__queue = list(self.__queue), collections.deque()
+        for frame in queued:
+            frame.release()
         self.__cap.release()
 
+    @property
+    def policy(self):
+        return self.__policy
+
+    @property
+    def acceleration(self):
+        """
+        Name of the hardware decode acceleration in use, "none" for software decode.
+        """
+        return self.__acceleration
+
+    @property
+    def decode_time_ms(self):
+        """
+        Mean time in milliseconds to decode a frame over the last 200 frames, including resizing and flipping,
+        or None before the first frame.
+        """
+        decode_times = list(self.__decode_times)
+        if not decode_times:
+            return None
+        return sum(decode_times) / len(decode_times) * 1000
+
+    @property
+    def buffer_allocations(self):
+        """
+        Number of frame buffers allocated so far, stays constant while the frame size does not change.
+        """
+        return self.__ring.allocations + self.__decode_allocations
+
+    @property
+    def decoded_frames(self):
+        """
+        Number of frames decoded so far.
+        """
+        return self.__decoded
+
+    @property
+    def delivered_frames(self):
+        """
+        Number of frames handed out by next_frame or next so far.
+        """
+        return self.__delivered
+
+    @property
+    def dropped_frames(self):
+        """
+        Number of decoded frames that were never handed out, either replaced by a newer frame before they were read
+        with the latest policy or skipped to reach a target FPS below the input FPS.
+        """
+        return self.__dropped
+
+    def __read_frame(self, publish):
+        """
+        Decode the next frame into a free ring buffer, or into the scratch buffer when it is resized or flipped.
+        Returns False at the end of the source or when no buffer was freed in time.
+        """
+        if self.__size is None and not self.__flip:
+            shape = self.__ring.buffers[0].shape if self.__ring.buffers[0] is not None else None
+            index = self.__ring.acquire_free(shape, timeout=1.0) if shape is not None else self.__acquire_first()
+            if index is None:
+                return not self.__stop
+            start_time = time.perf_counter()
+            ret, image = self.__cap.read(image=self.__ring.buffers[index])
+            if not ret:
+                self.__ring.release(index)
+                return False
+            self.__decode_times.append(time.perf_counter() - start_time)
+            if image is not self.__ring.buffers[index]:
+                self.__ring.adopt(index, image)
+            frame = Frame(self.__ring, index, self.__decoded)
+            self.__decoded += 1
+            if publish:
+                self.__publish(frame)
+            else:
+                self.__drop(frame)
+            return True
+
+        start_time = time.perf_counter()
+        ret, image = self.__cap.read(image=self.__decode_buffer)
+        if not ret:
+            return False
+        if image is not self.__decode_buffer:
+            self.__decode_buffer = image
+            self.__decode_allocations += 1
+        seq = self.__decoded
+        self.__decoded += 1
+        if not publish:
+            self.__decode_times.append(time.perf_counter() - start_time)
+            self.__drop(None)
+            return True
+
+        shape = (self.__size[1], self.__size[0], image.shape[2]) if self.__size is not None else image.shape
+        decode_time = time.perf_counter() - start_time
+        index = self.__ring.acquire_free(shape, timeout=1.0)
+        if index is None:
+            self.__drop(None)
+            return not self.__stop
+        start_time = time.perf_counter()
+        buffer = self.__ring.buffers[index]
+        if self.__size is not None:
+            self.cv2.resize(image, self.__size, dst=buffer, interpolation=self.__interpolation)
+            image = buffer
+        if self.__flip:
+            self.cv2.flip(image, 1, dst=buffer)
+        self.__decode_times.append(decode_time + time.perf_counter() - start_time)
+        self.__publish(Frame(self.__ring, index, seq))
+        return True
+
+    def __acquire_first(self):
+        # The frame size is only known once the first frame is decoded, let the decoder allocate it
+        self.__ring.refcounts[0] = 1
+        return 0
+
+    def __drop(self, frame):
+        with self.__condition:
+            self.__dropped += 1
+        if frame is not None:
+            frame.release()
+
+    def __publish(self, frame):
+        """
+        Queue a decoded frame for the consumer. The latest policy replaces a frame that was not read yet,
+        the other policies wait until the consumer makes room in the queue.
+        """
+        dropped = None
+        with self.__condition:
+            if self.__policy == "latest":
+                if self.__queue:
+                    dropped = self.__queue.popleft()
+                    self.__dropped += 1
+            else:
+                self.__condition.wait_for(lambda: len(self.__queue) < self.__queue_size or self.__stop)
+                if self.__stop:
+                    dropped = frame
+                    frame = None
+                    self.__dropped += 1
+            if frame is not None:
+                self.__queue.append(frame)
+                self.__condition.notify_all()
+        if dropped is not None:
+            dropped.release()
+
+    def __end(self):
+        with self.__condition:
+            self.__ended = True
+            self.__condition.notify_all()
+
     def __run(self):
+        # latest decodes at the input FPS and publishes at the target FPS, all decodes every frame at the target FPS
+        decode_interval = {"latest": 1 / self.__input_fps, "all": 1 / self.__output_fps, "unpaced": 0}[self.__policy]
         prev_time = 0
         while not self.__stop:
             t1 = time.time()
-            ret, frame = self.__cap.read()
-            if not ret:
-                break
-
             # fulfill target fps
-            if 1 / self.__output_fps < time.time() - prev_time:
+            publish = self.__policy != "latest" or 1 / self.__output_fps < time.time() - prev_time
+            if publish:
                 prev_time = time.time()
-                # replace by current frame
-                with self.__lock:
-                    self.__frame = frame
+            if not self.__read_frame(publish):
+                break
 
             t2 = time.time()
             # time to wait [s] to fulfill input fps
-            wait_time = 1 / self.__input_fps - (t2 - t1)
+            wait_time = decode_interval - (t2 - t1)
             # wait until
             time.sleep(max(0, wait_time))
 
-        self.__frame = None
+        self.__end()
 
     """
     Get current frame.
     """
 
-    def next(self):
-        import cv2
-
-        with self.__lock:
-            if self.__frame is None:
+    def next_frame(self, timeout=None):
+        """
+        Return a reference to the next frame without copying it, waiting until one is decoded. Returns None when
+        the source ended, or on timeout. A frame is never returned twice, frame.seq is its decode sequence number.
+        The caller releases it when done, the buffer is not decoded into again before that.
+        """
+        with self.__condition:
+            self.__condition.wait_for(lambda: self.__queue or self.__ended or self.__stop, timeout)
+            if not self.__queue:
                 return None
-            # need to copy frame, because can be cached and reused if fps is low
-            frame = self.__frame.copy()
-        if self.__size is not None:
-            frame = self.cv2.resize(frame, self.__size, interpolation=self.__interpolation)
-        if self.__flip:
-            frame = self.cv2.flip(frame, 1)
-        return frame
+            frame = self.__queue.popleft()
+            self.__delivered += 1
+            self.__condition.notify_all()
+            return frame
+
+    def next(self, timeout=None):
+        """
+        Return a copy of the next frame, or None when the source ended.
+        """
+        frame = self.next_frame(timeout)
+        if frame is None:
+            return None
+        with frame:
+            return frame.image.copy()
 
 
 # ## Visualization
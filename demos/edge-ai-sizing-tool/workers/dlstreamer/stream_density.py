@@ -0,0 +1,331 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Stream density search: find the largest number of streams a device sustains at a target FPS per stream.
+
+The stream count is doubled until a step misses the target and then binary-searched between the last passing and the
+first failing count. Every step records total and per-stream FPS, CPU, GPU and NPU utilization and memory use, and the
+JSON report is rewritten after each step so it can be charted while the search runs.
+"""
+
+import glob
+import json
+import logging
+import os
+import shutil
+import subprocess as sp
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+NPU_BUSY_TIME_PATHS = [
+    "/sys/class/accel/accel*/device/npu_busy_time_us",
+    "/sys/devices/pci0000:00/0000:00:0b.0/npu_busy_time_us",
+]
+
+
+def read_cpu_times():
+    """
+    Return (idle, total) CPU time over all cores, or None when it cannot be read.
+    """
+    if psutil is not None:
+        times = psutil.cpu_times()
+        return times.idle, sum(times)
+    try:
+        with open("/proc/stat") as f:
+            values = [int(x) for x in f.readline().split()[1:]]
+    except OSError:
+        return None
+    # idle + iowait count as idle time
+    return values[3] + values[4], sum(values)
+
+
+def read_memory():
+    """
+    Return (used MB, used percent), or (None, None) when it cannot be read.
+    """
+    if psutil is not None:
+        memory = psutil.virtual_memory()
+        return (memory.total - memory.available) / 2**20, memory.percent
+    try:
+        with open("/proc/meminfo") as f:
+            meminfo = {line.split(":")[0]: int(line.split()[1]) for line in f}
+    except OSError:
+        return None, None
+    used = meminfo["MemTotal"] - meminfo["MemAvailable"]
+    return used / 1024, 100 * used / meminfo["MemTotal"]
+
+
+def find_npu_busy_time_path():
+    for pattern in NPU_BUSY_TIME_PATHS:
+        paths = glob.glob(pattern)
+        if paths:
+            return paths[0]
+    return None
+
+
+def read_npu_busy_time(path):
+    try:
+        with open(path) as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def parse_intel_gpu_top(output):
+    """
+    Return the mean over samples of the busiest engine utilization from intel_gpu_top -J output, None without samples.
+    """
+    decoder = json.JSONDecoder()
+    busy = []
+    index = 0
+    while True:
+        # Samples are objects of a JSON array that is never closed
+        index = output.find("{", index)
+        if index < 0:
+            break
+        try:
+            sample, index = decoder.raw_decode(output, index)
+        except ValueError:
+            break
+        engines = sample.get("engines", {})
+        if engines:
+            busy.append(max(engine.get("busy", 0.0) for engine in engines.values()))
+    return sum(busy) / len(busy) if busy else None
+
+
+class SystemSampler:
+    """
+    Measure CPU, GPU and NPU utilization and memory use between start() and stop().
+    GPU utilization comes from intel_gpu_top and NPU utilization from the driver busy time, both are None when not
+    available.
+    """
+
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self.npu_busy_time_path = find_npu_busy_time_path()
+        self.intel_gpu_top = shutil.which("intel_gpu_top")
+        self.memory_samples = []
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.gpu_process = None
+
+    def __sample_memory(self):
+        while not self.stop_event.wait(self.interval):
+            used, percent = read_memory()
+            if used is not None:
+                self.memory_samples.append((used, percent))
+
+    def start(self):
+        self.start_time = time.time()
+        self.cpu_start = read_cpu_times()
+        self.npu_start = read_npu_busy_time(self.npu_busy_time_path) if self.npu_busy_time_path else None
+        self.memory_samples = []
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.__sample_memory, daemon=True)
+        self.thread.start()
+        self.gpu_process = None
+        if self.intel_gpu_top:
+            try:
+                self.gpu_process = sp.Popen(
+                    [self.intel_gpu_top, "-J", "-s", str(int(self.interval * 1000))],
+                    stdout=sp.PIPE,
+                    stderr=sp.DEVNULL,
+                    text=True,
+                )
+            except OSError as e:
+                logging.info(f"intel_gpu_top is not usable: {e}")
+
+    def stop(self):
+        """
+        Return the utilization and memory averaged since start().
+        """
+        elapsed = time.time() - self.start_time
+        self.stop_event.set()
+        self.thread.join()
+
+        cpu_utilization = None
+        cpu_end = read_cpu_times()
+        if self.cpu_start is not None and cpu_end is not None:
+            idle = cpu_end[0] - self.cpu_start[0]
+            total = cpu_end[1] - self.cpu_start[1]
+            cpu_utilization = 100 * (1 - idle / total) if total > 0 else None
+
+        npu_utilization = None
+        if self.npu_start is not None:
+            npu_end = read_npu_busy_time(self.npu_busy_time_path)
+            if npu_end is not None and elapsed > 0:
+                npu_utilization = min(100.0, (npu_end - self.npu_start) / (elapsed * 1e6) * 100)
+
+        gpu_utilization = None
+        if self.gpu_process is not None:
+            self.gpu_process.terminate()
+            try:
+                output, _ = self.gpu_process.communicate(timeout=5)
+                gpu_utilization = parse_intel_gpu_top(output)
+            except sp.TimeoutExpired:
+                self.gpu_process.kill()
+
+        memory_used_mb = memory_percent = None
+        if self.memory_samples:
+            memory_used_mb = max(used for used, _ in self.memory_samples)
+            memory_percent = max(percent for _, percent in self.memory_samples)
+
+        return {
+            "cpu_utilization": cpu_utilization,
+            "gpu_utilization": gpu_utilization,
+            "npu_utilization": npu_utilization,
+            "memory_used_mb": memory_used_mb,
+            "memory_percent": memory_percent,
+        }
+
+
+def write_report(report, report_path):
+    """
+    Write the report atomically so a reader never sees a partial file.
+    """
+    temp_path = f"{report_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    os.replace(temp_path, report_path)
+
+
+def measure_step(set_stream_count, read_metrics, number_of_streams, target_fps, settle_time, measure_time, sampler):
+    """
+    Run number_of_streams streams and average the pipeline metrics over measure_time seconds after settle_time.
+    A step passes when every stream reaches target_fps on average.
+    """
+    set_stream_count(number_of_streams)
+    time.sleep(settle_time)
+
+    sampler.start()
+    start_time = time.time()
+    total_fps = []
+    fps_streams = {}
+    last_timestamp = None
+    while time.time() - start_time < measure_time:
+        time.sleep(1)
+        metrics = read_metrics()
+        timestamp = metrics.get("timestamp")
+        if timestamp is None or timestamp == last_timestamp or not metrics.get("fps_streams"):
+            continue
+        if metrics.get("number_streams") != number_of_streams:
+            continue
+        last_timestamp = timestamp
+        total_fps.append(metrics["total_fps"])
+        for stream, fps in metrics["fps_streams"].items():
+            fps_streams.setdefault(stream, []).append(fps)
+    system = sampler.stop()
+
+    fps_streams = {stream: sum(values) / len(values) for stream, values in fps_streams.items()}
+    min_fps = min(fps_streams.values()) if len(fps_streams) == number_of_streams else 0.0
+    step = {
+        "number_streams": number_of_streams,
+        "total_fps": sum(total_fps) / len(total_fps) if total_fps else 0.0,
+        "average_fps_per_stream": sum(fps_streams.values()) / number_of_streams,
+        "min_fps_per_stream": min_fps,
+        "fps_streams": fps_streams,
+        "passed": min_fps >= target_fps,
+        "timestamp": time.time(),
+    }
+    step.update(system)
+    logging.info(
+        f"Density step: {number_of_streams} streams, {step['total_fps']:.1f} total fps, "
+        f"{min_fps:.1f} fps on the slowest stream, {'passed' if step['passed'] else 'failed'}"
+    )
+    return step
+
+
+def find_stream_density(
+    set_stream_count,
+    read_metrics,
+    target_fps=30.0,
+    max_streams=64,
+    settle_time=10.0,
+    measure_time=10.0,
+    report_path=None,
+    report_info=None,
+    on_report=None,
+):
+    """
+    Search the largest stream count at which every stream still reaches target_fps.
+
+    Args:
+        set_stream_count (callable): Runs the given number of streams.
+        read_metrics (callable): Returns the current pipeline metrics with total_fps, number_streams, fps_streams and timestamp.
+        target_fps (float): Minimum FPS each stream must reach.
+        max_streams (int): Upper bound of the search.
+        settle_time (float): Seconds to wait after changing the stream count before measuring.
+        measure_time (float): Seconds over which the metrics of a step are averaged.
+        report_path (str): JSON report written after every step when given.
+        report_info (dict): Extra fields for the report, e.g. model and device.
+        on_report (callable): Called with the report after every step.
+
+    Returns:
+        dict: The report, max_streams is the stream density, 0 when a single stream misses the target.
+    """
+    report = dict(report_info or {})
+    report.update(
+        {
+            "status": "running",
+            "target_fps": target_fps,
+            "max_streams_searched": max_streams,
+            "max_streams": None,
+            "steps": [],
+        }
+    )
+    sampler = SystemSampler()
+    results = {}
+
+    def run_step(number_of_streams):
+        step = measure_step(
+            set_stream_count, read_metrics, number_of_streams, target_fps, settle_time, measure_time, sampler
+        )
+        results[number_of_streams] = step["passed"]
+        report["steps"].append(step)
+        if report_path:
+            write_report(report, report_path)
+        if on_report:
+            on_report(report)
+        return step["passed"]
+
+    # Double the stream count until a step fails
+    best, failed = 0, None
+    number_of_streams = 1
+    while number_of_streams <= max_streams:
+        if not run_step(number_of_streams):
+            failed = number_of_streams
+            break
+        best = number_of_streams
+        number_of_streams *= 2
+    if failed is None and best < max_streams:
+        if run_step(max_streams):
+            best = max_streams
+        else:
+            failed = max_streams
+
+    # Binary search between the last passing and the first failing count
+    if failed is not None:
+        low, high = best, failed
+        while high - low > 1:
+            middle = (low + high) // 2
+            if run_step(middle):
+                low = middle
+            else:
+                high = middle
+        best = low
+
+    report["status"] = "completed"
+    report["max_streams"] = best
+    report["timestamp"] = time.time()
+    if report_path:
+        write_report(report, report_path)
+    if on_report:
+        on_report(report)
+    logging.info(f"Stream density: {best} streams at {target_fps} fps per stream")
+    return report
@@ -89,9 +89,10 @@ def model_files_exist_and_safe(model_path_fp32: Path, model_path_fp16: Path) ->
         return True
 
 
-def export_yolo_model(model_name, model_parent_dir=MODELS_DIR):
+def export_yolo_model(model_name, model_parent_dir=MODELS_DIR, precision="FP16", device="CPU"):
     """
     Download and convert YOLO models to OpenVINO format.
+    FP32 and FP16 models are always written, an INT8 model is quantized from the FP32 one when precision is INT8.
     """
 
     # Validate the model name
@@ -109,9 +110,10 @@ def export_yolo_model(model_name, model_parent_dir=MODELS_DIR):
     model_dir_fp16 = base_dir / f"{model_name}-FP16"
     model_path_fp32 = model_dir_fp32 / f"{model_name}.xml"
     model_path_fp16 = model_dir_fp16 / f"{model_name}.xml"
+    model_path_int8 = base_dir / f"{model_name}-INT8" / f"{model_name}.xml"
 
     # Validate all paths are within the base directory
-    for p in [model_dir_fp32, model_dir_fp16, model_path_fp32, model_path_fp16]:
+    for p in [model_dir_fp32, model_dir_fp16, model_path_fp32, model_path_fp16, model_path_int8]:
         if not is_path_safe(base_dir, p):
             logging.error(f"Unsafe model path detected: {p}")
             sys.exit(1)
@@ -120,7 +122,7 @@ def export_yolo_model(model_name, model_parent_dir=MODELS_DIR):
     is_model_exist = model_files_exist_and_safe(model_path_fp32, model_path_fp16)
     if is_model_exist:
         logging.info(f"Model already exists: {model_path_fp32} and {model_path_fp16}")
-        return True
+        return precision != "INT8" or quantize_model(model_name, model_type, model_path_fp32, model_path_fp16, model_path_int8, device)
 
     logging.info(f"Downloading and converting: {model_name}")
 
@@ -161,7 +163,24 @@ def export_yolo_model(model_name, model_parent_dir=MODELS_DIR):
 
     logging.info(f"Model saved: {model_path_fp32} and {model_path_fp16}")
 
-    return True
+    return precision != "INT8" or quantize_model(model_name, model_type, model_path_fp32, model_path_fp16, model_path_int8, device)
+
+
+def quantize_model(model_name, model_type, model_path_fp32, model_path_fp16, model_path_int8, device):
+    """
+    Quantize the model to INT8 with NNCF unless the INT8 model already exists.
+    """
+    if model_path_int8.exists():
+        if os.path.realpath(model_path_int8) != os.path.abspath(model_path_int8):
+            logging.error(f"Error: Model file {model_path_int8} is a symlink or contains a symlink in its path.")
+            return False
+        logging.info(f"Model already exists: {model_path_int8}")
+        return True
+
+    # nncf is only needed for INT8, import it with the quantization code on demand
+    from yolo_quantize import quantize_yolo_model
+
+    return quantize_yolo_model(model_name, model_type, model_path_fp32, model_path_fp16, model_path_int8, device)
 
 
 def parse_arguments():
@@ -176,6 +195,19 @@ def parse_arguments():
         type=str,
         help="The name of the YOLO model to download and convert.",
     )
+    parser.add_argument(
+        "--precision",
+        type=str,
+        choices=["FP32", "FP16", "INT8"],
+        default="FP16",
+        help="Precision of the model to use, INT8 is quantized with NNCF (default: FP16)",
+    )
+    parser.add_argument(
+        "--device",
+        type=str,
+        default="CPU",
+        help="Device the INT8 model is benchmarked on against FP16 (default: CPU)",
+    )
     args = parser.parse_args()
     # Validate model_name
     if args.model_name not in YOLO_MODELS:
@@ -190,4 +222,4 @@ if __name__ == "__main__":
     args = parse_arguments()
 
     # Export the specified model
-    export_yolo_model(args.model_name, YOLO_MODELS[args.model_name])
+    export_yolo_model(args.model_name, YOLO_MODELS[args.model_name], precision=args.precision, device=args.device)
@@ -0,0 +1,251 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+OpenVINO configuration autotuner.
+
+Sweeps the compile properties that decide how a model is scheduled on a device, PERFORMANCE_HINT, NUM_STREAMS,
+INFERENCE_NUM_THREADS and INFERENCE_PRECISION_HINT, together with the number of infer requests, and measures the
+throughput and the p99 latency of each configuration on synthetic input. The full grid is too large to run, so the
+sweep is a coordinate descent: every property is swept in turn with the best values found so far for the others.
+It runs once for the throughput objective, highest FPS, and once for the latency objective, lowest p99 latency,
+configurations measured for both are only run once.
+
+The best configuration of each objective is saved per model and device under TUNING_DIR, default workers/tuning,
+keyed by the model fingerprint so a re-exported model is tuned again. Workers load it with load_tuned_config.
+
+Usage: python autotune.py models/yolo11n-FP16/yolo11n.xml --device CPU
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+import numpy as np
+import openvino as ov
+
+from model_cache import fingerprint_model, get_openvino_version
+
+DEFAULT_TUNING_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tuning")
+OBJECTIVES = ("throughput", "latency")
+HINTS = ("LATENCY", "THROUGHPUT", "CUMULATIVE_THROUGHPUT")
+PRECISION_HINTS = {"FP32": "f32", "FP16": "f16", "BF16": "bf16"}
+# Dynamic dimensions of the synthetic input, the spatial ones take the usual YOLO input size
+DYNAMIC_DIM_SIZE = 640
+
+
+def get_tuning_path(model_path, device, tuning_dir=None):
+    tuning_dir = os.path.abspath(tuning_dir or os.environ.get("TUNING_DIR", DEFAULT_TUNING_DIR))
+    key = hashlib.sha256(f"{fingerprint_model(model_path)}|{device}|{get_openvino_version()}".encode()).hexdigest()[:16]
+    model_name = re.sub(r"[^A-Za-z0-9_.-]", "_", os.path.splitext(os.path.basename(str(model_path)))[0])
+    device_name = re.sub(r"[^A-Za-z0-9_.-]", "_", device)
+    return os.path.join(tuning_dir, f"{model_name}-{device_name}-{key}.json")
+
+
+def load_tuned_config(model_path, device, objective, tuning_dir=None):
+    """
+    Return the tuned {"config": compile properties, "num_requests": n} of a model on device for objective,
+    or None when the model was not tuned for this device.
+    """
+    try:
+        with open(get_tuning_path(model_path, device, tuning_dir), encoding="utf-8") as f:
+            tuning = json.load(f)
+    except (OSError, ValueError):
+        return None
+    best = tuning["best"].get(objective)
+    if best is None:
+        return None
+    return {"config": best["config"], "num_requests": best["num_requests"]}
+
+
+def make_synthetic_inputs(compiled_model):
+    """
+    Return random input tensors for every model input, dynamic dimensions are set to 1 for the batch and
+    DYNAMIC_DIM_SIZE otherwise.
+    """
+    inputs = {}
+    for i, model_input in enumerate(compiled_model.inputs):
+        partial_shape = model_input.get_partial_shape()
+        shape = [
+            dim.get_length() if dim.is_static else (1 if axis == 0 else DYNAMIC_DIM_SIZE)
+            for axis, dim in enumerate(partial_shape)
+        ]
+        dtype = model_input.get_element_type().to_dtype()
+        if np.issubdtype(dtype, np.integer):
+            data = np.random.randint(0, 256, shape).astype(dtype)
+        else:
+            data = np.random.rand(*shape).astype(dtype)
+        inputs[i] = data
+    return inputs
+
+
+def measure(core, ov_model, device, config, num_requests, duration_s):
+    """
+    Return the FPS and the mean and p99 latency in ms of num_requests asynchronous infer requests over duration_s,
+    0 requests uses the optimal number for the device. Returns None when the device rejects the configuration.
+    """
+    try:
+        compiled_model = core.compile_model(ov_model, device, config)
+    except Exception as e:
+        logging.info(f"Skipping {config}: {e}")
+        return None
+
+    infer_queue = ov.AsyncInferQueue(compiled_model, num_requests)
+    inputs = make_synthetic_inputs(compiled_model)
+    latencies = []
+    lock = threading.Lock()
+
+    def on_done(request, start_time):
+        with lock:
+            latencies.append(time.perf_counter() - start_time)
+
+    infer_queue.set_callback(on_done)
+    # Warm up every request once, the first inferences include allocations
+    for _ in range(len(infer_queue)):
+        infer_queue.start_async(inputs, time.perf_counter())
+    infer_queue.wait_all()
+    latencies.clear()
+
+    start_time = time.perf_counter()
+    while time.perf_counter() - start_time < duration_s:
+        infer_queue.start_async(inputs, time.perf_counter())
+    infer_queue.wait_all()
+    elapsed = time.perf_counter() - start_time
+    return {
+        "config": config,
+        "num_requests": len(infer_queue),
+        "fps": round(len(latencies) / elapsed, 2),
+        "mean_latency_ms": round(float(np.mean(latencies)) * 1000, 2),
+        "p99_latency_ms": round(float(np.percentile(latencies, 99)) * 1000, 2),
+    }
+
+
+def get_candidates(core, device):
+    """
+    Return the values swept for every property on device, None leaves the property to the device default.
+    """
+    device_type = device.split(":")[0].split(".")[0]
+    candidates = {"PERFORMANCE_HINT": list(HINTS)}
+
+    try:
+        capabilities = core.get_property(device_type, "OPTIMIZATION_CAPABILITIES")
+    except Exception:
+        capabilities = []
+    candidates["INFERENCE_PRECISION_HINT"] = [None] + [
+        hint for capability, hint in PRECISION_HINTS.items() if capability in capabilities
+    ]
+
+    streams = [None]
+    try:
+        _, max_streams = core.get_property(device_type, "RANGE_FOR_STREAMS")
+        streams += [n for n in (1, 2, 4, 8, 16) if n <= max_streams]
+    except Exception:
+        pass
+    candidates["NUM_STREAMS"] = streams
+
+    candidates["INFERENCE_NUM_THREADS"] = [None]
+    if device_type == "CPU":
+        cores = os.cpu_count() or 1
+        candidates["INFERENCE_NUM_THREADS"] += sorted({max(1, cores // 4), max(1, cores // 2), cores})
+    return candidates
+
+
+def tune(model_path, device, duration_s=3.0, max_requests=16, tuning_dir=None):
+    """
+    Tune model_path on device for both objectives, save the result and return it.
+    """
+    core = ov.Core()
+    ov_model = core.read_model(str(model_path))
+    candidates = get_candidates(core, device)
+    results = {}
+
+    def run(config, num_requests):
+        config = {name: value for name, value in config.items() if value is not None}
+        key = json.dumps([config, num_requests], sort_keys=True)
+        if key not in results:
+            results[key] = measure(core, ov_model, device, config, num_requests, duration_s)
+            if results[key] is not None:
+                result = results[key]
+                logging.info(
+                    f"{config} with {result['num_requests']} requests: {result['fps']} FPS, "
+                    f"p99 latency {result['p99_latency_ms']} ms"
+                )
+        return results[key]
+
+    def score(result, objective):
+        if result is None:
+            return float("-inf")
+        return result["fps"] if objective == "throughput" else -result["p99_latency_ms"]
+
+    start_time = time.perf_counter()
+    best = {}
+    for objective in OBJECTIVES:
+        config = {"PERFORMANCE_HINT": "THROUGHPUT" if objective == "throughput" else "LATENCY"}
+        num_requests = 0
+        best_result = run(config, num_requests)
+        for name, values in candidates.items():
+            for value in values:
+                result = run({**config, name: value}, num_requests)
+                if score(result, objective) > score(best_result, objective):
+                    best_result, config = result, {**config, name: value}
+
+        # Infer requests beyond the optimal number only queue up, sweep around it
+        optimal_requests = best_result["num_requests"] if best_result is not None else 1
+        for requests in sorted({1, max(1, optimal_requests // 2), optimal_requests * 2} - {optimal_requests}):
+            if requests > max_requests:
+                continue
+            result = run(config, requests)
+            if score(result, objective) > score(best_result, objective):
+                best_result = result
+        if best_result is not None:
+            best[objective] = best_result
+            logging.info(
+                f"Best {objective} configuration of {model_path} on {device}: {best_result['config']} with "
+                f"{best_result['num_requests']} requests, {best_result['fps']} FPS, "
+                f"p99 latency {best_result['p99_latency_ms']} ms"
+            )
+
+    tuning = {
+        "model_path": os.path.abspath(str(model_path)),
+        "device": device,
+        "openvino_version": get_openvino_version(),
+        "created": time.time(),
+        "tuning_time_s": round(time.perf_counter() - start_time, 1),
+        "best": best,
+        "results": [result for result in results.values() if result is not None],
+    }
+    tuning_path = get_tuning_path(model_path, device, tuning_dir)
+    os.makedirs(os.path.dirname(tuning_path), exist_ok=True)
+    temp_path = f"{tuning_path}.tmp-{os.getpid()}"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(tuning, f, indent=2)
+    os.replace(temp_path, tuning_path)
+    logging.info(f"Saved the tuned configurations to {tuning_path}")
+    return tuning
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Tune the OpenVINO configuration of a model on a device.")
+    parser.add_argument("model", type=str, help="Path of the model .xml file")
+    parser.add_argument("--device", type=str, default="CPU", help="Device to tune for (default: CPU)")
+    parser.add_argument(
+        "--duration", type=float, default=3.0, help="Seconds each configuration is measured for (default: 3)"
+    )
+    parser.add_argument(
+        "--max_requests", type=int, default=16, help="Largest number of infer requests tried (default: 16)"
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+    )
+    args = parse_arguments()
+    tune(args.model, args.device, args.duration, args.max_requests)
@@ -0,0 +1,136 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Microbenchmark of the per-frame YOLO postprocess (NMS + scale_boxes) latency.
+
+Compares the NumPy-only path in yolo_postprocess with the torch path from utils.general, when torch is installed,
+on synthetic model outputs with a growing number of candidate boxes above the confidence threshold.
+
+Usage: python benchmark_postprocess.py --box_counts 10 100 1000 5000 --iterations 200
+"""
+
+import argparse
+import logging
+import time
+
+import numpy as np
+
+import yolo_postprocess
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+)
+
+INPUT_SHAPE = (1, 3, 640, 640)
+IMAGE_SHAPE = (720, 1280, 3)
+
+
+def make_predictions(num_boxes, num_classes=80, num_anchors=8400, conf_thres=0.25, seed=0):
+    """
+    Build a synthetic raw YOLO output of shape (1, 4 + num_classes, num_anchors) where exactly num_boxes anchors
+    have a class score above conf_thres. Boxes are clustered so NMS has overlaps to suppress.
+    """
+    rng = np.random.default_rng(seed)
+    prediction = np.zeros((1, 4 + num_classes, num_anchors), dtype=np.float32)
+    prediction[0, 4:] = rng.uniform(0, conf_thres, (num_classes, num_anchors))
+
+    centers = rng.uniform(64, 576, (max(num_boxes // 8, 1), 2))
+    for anchor in rng.choice(num_anchors, size=num_boxes, replace=False):
+        cx, cy = centers[rng.integers(len(centers))] + rng.normal(0, 12, 2)
+        w, h = rng.uniform(20, 160, 2)
+        prediction[0, :4, anchor] = (cx, cy, w, h)
+        prediction[0, 4 + rng.integers(num_classes), anchor] = rng.uniform(conf_thres + 0.01, 1.0)
+    return prediction
+
+
+def postprocess_numpy(prediction):
+    detections = yolo_postprocess.non_max_suppression(prediction, 0.25, 0.45)[0]
+    detections[:, :4] = yolo_postprocess.scale_boxes(INPUT_SHAPE[2:], detections[:, :4], IMAGE_SHAPE).round()
+    return detections
+
+
+def postprocess_torch(prediction):
+    import torch
+    from utils.general import non_max_suppression, scale_boxes
+
+    detections = non_max_suppression(torch.from_numpy(prediction), 0.25, 0.45)[0]
+    detections[:, :4] = scale_boxes(INPUT_SHAPE[2:], detections[:, :4], IMAGE_SHAPE).round()
+    return detections.numpy()
+
+
+def same_detections(a, b):
+    """
+    Compare two (n,6) detection arrays. torch sorts with an unstable argsort, so detections with exactly equal
+    scores may come out in a different order, rows are sorted before comparing.
+    """
+    return a.shape == b.shape and np.array_equal(a[np.lexsort(a.T[::-1])], b[np.lexsort(b.T[::-1])])
+
+
+def measure(postprocess, prediction, iterations):
+    """
+    Return the detections and the mean / p99 latency in milliseconds of postprocess over iterations runs.
+    """
+    detections = postprocess(prediction)  # warm-up
+    latencies = []
+    for _ in range(iterations):
+        start_time = time.perf_counter()
+        postprocess(prediction)
+        latencies.append((time.perf_counter() - start_time) * 1000)
+    return detections, np.mean(latencies), np.percentile(latencies, 99)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the NumPy and torch YOLO postprocess paths"
+    )
+    parser.add_argument(
+        "--box_counts",
+        type=int,
+        nargs="+",
+        default=[10, 100, 1000, 5000],
+        help="Number of candidate boxes above the confidence threshold (default: 10 100 1000 5000)",
+    )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=200,
+        help="Number of timed runs per box count (default: 200)",
+    )
+    parser.add_argument(
+        "--num_classes",
+        type=int,
+        default=80,
+        help="Number of classes in the synthetic model output (default: 80)",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    try:
+        import torch  # noqa: F401
+        has_torch = True
+    except ImportError:
+        logging.info("torch is not installed, only the NumPy path is measured")
+        has_torch = False
+
+    header = f"{'boxes':>8} {'kept':>6} {'numpy mean ms':>14} {'numpy p99 ms':>13}"
+    if has_torch:
+        header += f" {'torch mean ms':>14} {'torch p99 ms':>13} {'identical':>10}"
+    print(header)
+
+    for num_boxes in args.box_counts:
+        prediction = make_predictions(num_boxes, num_classes=args.num_classes)
+        np_detections, np_mean, np_p99 = measure(postprocess_numpy, prediction, args.iterations)
+        row = f"{num_boxes:>8} {len(np_detections):>6} {np_mean:>14.3f} {np_p99:>13.3f}"
+        if has_torch:
+            torch_detections, torch_mean, torch_p99 = measure(postprocess_torch, prediction, args.iterations)
+            identical = same_detections(np_detections, torch_detections)
+            row += f" {torch_mean:>14.3f} {torch_p99:>13.3f} {str(identical):>10}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
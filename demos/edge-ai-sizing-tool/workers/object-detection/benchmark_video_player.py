@@ -0,0 +1,101 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Microbenchmark of the per-frame memory traffic of reading frames from VideoPlayer.
+
+Compares VideoPlayer.next, which returns a copy of every frame, with next_frame, which hands out a read-only view of
+a ring buffer, followed by the np.array copy the worker used to make. Reports the bytes allocated per frame, the
+frame buffers allocated and the garbage collections during the run. The player decodes unpaced, so every frame is
+read once.
+
+Usage: python benchmark_video_player.py --input video.mp4 --frames 300
+"""
+
+import argparse
+import gc
+import logging
+import time
+import tracemalloc
+
+import numpy as np
+
+from notebook_utils import VideoPlayer
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+)
+
+
+def read_copies(player):
+    frame = player.next()
+    if frame is None:
+        return False
+    # The worker copied the frame once more before inference
+    np.array(frame)
+    return True
+
+
+def read_views(player):
+    frame = player.next_frame()
+    if frame is None:
+        return False
+    with frame:
+        frame.image.sum(dtype=np.uint64)
+    return True
+
+
+def measure(source, read, num_frames):
+    player = VideoPlayer(source, policy="unpaced")
+    player.start()
+    gc.collect()
+    collections_before = sum(stats["collections"] for stats in gc.get_stats())
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    allocated = 0
+    frames = 0
+    start_time = time.perf_counter()
+    try:
+        while frames < num_frames:
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            if not read(player):
+                break
+            _, peak = tracemalloc.get_traced_memory()
+            allocated += max(peak - before, 0)
+            frames += 1
+    finally:
+        elapsed = time.perf_counter() - start_time
+        tracemalloc.stop()
+        player.stop()
+    collections = sum(stats["collections"] for stats in gc.get_stats()) - collections_before
+    return {
+        "frames": frames,
+        "allocated_mb_per_frame": allocated / max(frames, 1) / 2**20,
+        "buffer_allocations": player.buffer_allocations,
+        "gc_collections": collections,
+        "reads_per_s": frames / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark the per-frame memory traffic of VideoPlayer.")
+    parser.add_argument("--input", type=str, required=True, help="Video file to read")
+    parser.add_argument("--frames", type=int, default=300, help="Number of frames read per run (default: 300)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    for name, read in (("next + np.array", read_copies), ("next_frame", read_views)):
+        result = measure(args.input, read, args.frames)
+        logging.info(
+            f"{name:>16}: {result['allocated_mb_per_frame']:.2f} MB allocated per frame, "
+            f"{result['buffer_allocations']} frame buffers allocated, {result['gc_collections']} GC collections, "
+            f"{result['reads_per_s']:.0f} reads/s over {result['frames']} frames"
+        )
+
+
+if __name__ == "__main__":
+    main()
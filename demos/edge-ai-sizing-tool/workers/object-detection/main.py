@@ -25,25 +25,59 @@ import platform
 from fastapi import FastAPI
 from fastapi.responses import StreamingResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel
 from contextlib import asynccontextmanager
 from pathlib import Path
 from yolo_download import export_yolo_model
+from stream_density import find_stream_density
+from model_cache import CompiledModelCache
+from autotune import load_tuned_config, tune
+from model_pool import ModelPool, get_model_size
 
 import openvino as ov
-import torch
-from utils.augmentations import letterbox
+from openvino.preprocess import PrePostProcessor, ResizeAlgorithm, ColorFormat, PaddingMode
 from PIL import Image
-from utils.plots import Annotator, colors
-from notebook_utils import VideoPlayer
+from notebook_utils import VideoPlayer, Frame, PLAYBACK_POLICIES
 import collections
 from typing import List, Tuple
-from utils.general import scale_boxes, non_max_suppression
+
+try:
+    import torch
+    from utils.augmentations import letterbox
+    from utils.plots import Annotator, colors
+    from utils.general import scale_boxes, non_max_suppression
+except ImportError:
+    # torch/torchvision are not installed, use the NumPy-only postprocessing
+    torch = None
+    from yolo_postprocess import letterbox, Annotator, colors, scale_boxes, non_max_suppression
 
 
 core=ov.Core()
 
 latest_frame = None
+# Reference to the ring buffer latest_frame lives in, held until the next frame is published
+latest_frame_owner = None
 lock = threading.Lock()
+# Notified with lock held every time latest_frame is replaced, frame_seq counts the published frames
+frame_ready = threading.Condition(lock)
+frame_seq = 0
+stream_fps = {}
+# Number of running streams, results of removed streams that are still in flight are dropped
+active_streams = 0
+grid_layout = None
+grid_canvas = None
+stream_preprocess_ms = {}
+# Frames decoded, inferred and dropped by the video player of every stream
+stream_frame_counts = {}
+stream_decode_ms = {}
+stream_inference_ms = {}
+stream_decode_acceleration = {}
+# Set when the letterbox preprocessing is embedded in the compiled model
+embedded_input_shape = None
+embedded_frame_size = None
+python_preprocess_ms = None
+stream_pool = None
+density_report = None
 
 logging.basicConfig(
     level=logging.DEBUG,
@@ -107,6 +141,17 @@ async def lifespan(app: FastAPI):
         "number_streams": None,
         "average_fps_per_stream": None,
         "fps_streams": None,
+        "infer_queue_depth": None,
+        "in_flight_requests": None,
+        "preprocess_time_ms": None,
+        "preprocess_time_saved_ms": None,
+        "decode_time_ms": None,
+        "inference_time_ms": None,
+        "decode_acceleration": None,
+        "frames_decoded": None,
+        "frames_inferred": None,
+        "frames_dropped": None,
+        "frame_counts_streams": None,
         "timestamp": None,
     }
     thread = threading.Thread(target=main, daemon=True)
@@ -134,7 +179,7 @@ def parse_arguments():
         "--input",
         type=str,
         default=f"{VIDEO_DIR}/people-detection.mp4",
-        help="Input source e.g. /dev/video0, videofile.mp4, etc",
+        help="Input source e.g. /dev/video0, videofile.mp4, etc. Separate several sources with commas to run one stream per source",
     )
     parser.add_argument(
         "--inference_mode",
@@ -154,8 +199,9 @@ def parse_arguments():
     parser.add_argument(
         "--model_precision",
         type=str,
+        choices=["FP32", "FP16", "INT8"],
         default="FP16",
-        help="Model precision (default: FP16)",
+        help="Model precision, INT8 is quantized with NNCF on frames of the bundled media on first use (default: FP16)",
     )
     parser.add_argument(
         "--device",
@@ -167,7 +213,7 @@ def parse_arguments():
         "--decode_device",
         type=str,
         default="CPU",
-        help="Device to run decode on (default: CPU)",
+        help="Device to run decode on: CPU, or GPU or GPU.<index> for hardware decode with VAAPI or any other available API, falling back to CPU (default: CPU)",
     )
     parser.add_argument(
         "--batch_size",
@@ -194,7 +240,7 @@ def parse_arguments():
         "--number_of_streams",
         type=int,
         default=1,
-        help="Number of streams to run (default: 1)",
+        help="Number of streams to run, a single input is repeated for every stream (default: 1)",
     )
     parser.add_argument(
         "--width_limit",
@@ -208,10 +254,62 @@ def parse_arguments():
         default=480,
         help="Height limit for the video stream (default: 480)",
     )
+    parser.add_argument(
+        "--num_requests",
+        type=int,
+        default=1,
+        help="Number of asynchronous infer requests kept in flight, 1 runs synchronous inference and 0 uses the optimal number for the device (default: 1)",
+    )
+    parser.add_argument(
+        "--preprocessing",
+        type=str,
+        default="python",
+        choices=["python", "model"],
+        help="Where frames are letterboxed and normalized: python on the host or model to embed it in the compiled model (default: python)",
+    )
+    parser.add_argument(
+        "--density_target_fps",
+        type=float,
+        default=0,
+        help="Search the maximum number of streams that each reach this FPS, 0 disables the search (default: 0)",
+    )
+    parser.add_argument(
+        "--density_max_streams",
+        type=int,
+        default=64,
+        help="Upper bound of the stream density search (default: 64)",
+    )
+    parser.add_argument(
+        "--density_report",
+        type=str,
+        default="./stream_density.json",
+        help="Path of the stream density JSON report (default: ./stream_density.json)",
+    )
+    parser.add_argument(
+        "--model_pool_size_gb",
+        type=float,
+        default=2.0,
+        help="Memory budget in GB of the models kept loaded after switching models through /api/model (default: 2)",
+    )
+    parser.add_argument(
+        "--playback_policy",
+        type=str,
+        default="latest",
+        choices=PLAYBACK_POLICIES,
+        help="How decoded frames reach inference: latest drops the frames inference is too slow for, all queues every frame and slows decoding down to inference, unpaced decodes every frame as fast as possible for benchmark runs (default: latest)",
+    )
+    parser.add_argument(
+        "--autotune",
+        action="store_true",
+        help="Tune the OpenVINO configuration of models not tuned yet for the device before running them, configurations tuned earlier are always used",
+    )
     return parser.parse_args()
 
 
 args = parse_arguments()
+model_pool = ModelPool(args.model_pool_size_gb)
+# Serializes model switches
+model_switch_lock = threading.Lock()
 
 def stop_signal_handler(sig, frame):
     """
@@ -346,30 +444,35 @@ def opencv_server_image(
     conn.close()
     server_socket.close()
     
-def main():
-
+def parse_input_sources(input, number_of_streams=1):
     """
-    Main function to start the GStreamer pipeline.
+    Split a comma-separated --input into one source per stream.
+    A single input is repeated number_of_streams times, a list of inputs is cycled when fewer than number_of_streams are given.
     """
-    logging.info(
-        f"View stream at url: http://localhost:{args.port}/result/{args.tcp_port}"
-    )
+    inputs = [x.strip() for x in input.split(",") if x.strip()]
+    num_streams = max(number_of_streams, len(inputs))
+    return [inputs[i % len(inputs)] for i in range(num_streams)]
 
-    if os.path.realpath(args.input) != os.path.abspath(
-        args.input
+
+def validate_input_source(input_source):
+    """
+    Make sure an input source is a webcam index or a valid, non-symlinked video file. Exits the worker otherwise.
+    """
+    if os.path.realpath(input_source) != os.path.abspath(
+        input_source
     ):  # Check if the model path is a symlink
         logging.info(
-            f"Error: Input file {args.input} is a symlink or contains a symlink in its path. Refusing to open for security reasons."
+            f"Error: Input file {input_source} is a symlink or contains a symlink in its path. Refusing to open for security reasons."
         )
         update_payload_status(args.id, status="failed")
         sys.exit(1)
 
     # Ensure the video file exists
-    if not os.path.exists(args.input):
-        if args.input.isdigit():
-            # args.input = "/dev/video" + args.input
+    if not os.path.exists(input_source):
+        if input_source.isdigit():
+            # input_source = "/dev/video" + input_source
             logging.info(
-                f"Input is a device index or webcam: {args.input}. Skipping file download."
+                f"Input is a device index or webcam: {input_source}. Skipping file download."
             )
         else:
             logging.error(
@@ -378,36 +481,37 @@ def main():
             update_payload_status(args.id, status="failed")
             exit(1)
     else:
-        if not is_valid_video_file(args.input):
+        if not is_valid_video_file(input_source):
             logging.error(
-                f"Input file '{args.input}' is not a valid video file. Please provide a valid video file."
+                f"Input file '{input_source}' is not a valid video file. Please provide a valid video file."
             )
             update_payload_status(args.id, status="failed")
             exit(1)
-    
-    
+
+
+def prepare_model(model_name):
+    """
+    Return the .xml file of the model and its label file, extracting or exporting the model first when needed.
+    Raises RuntimeError when the model cannot be prepared.
+    """
     model_label_path = None
 
-    if args.model.endswith(".zip"):
-        model_zipfile_name = Path(args.model).stem
+    if model_name.endswith(".zip"):
+        model_zipfile_name = Path(model_name).stem
         model_extract_dir = MODEL_DIR / model_zipfile_name
         if not model_extract_dir.exists():
-            logging.info(f"Extracting {args.model} to {model_extract_dir}")
+            logging.info(f"Extracting {model_name} to {model_extract_dir}")
             try:
-                with zipfile.ZipFile(args.model, 'r') as zip_ref:
+                with zipfile.ZipFile(model_name, 'r') as zip_ref:
                     zip_ref.extractall(model_extract_dir)
             except Exception as e:
-                logging.error(f"Failed to extract zip file {args.model}: {e}")
-                update_payload_status(args.id, status="failed")
-                exit(1)
+                raise RuntimeError(f"Failed to extract zip file {model_name}: {e}") from e
         else:
             logging.info(f"Model directory {model_extract_dir} already exists, skipping extraction.")
         # Find for .xml file
         model_files = list(model_extract_dir.glob("*.xml"))
         if not model_files:
-            logging.error(f"No model XML files found in {model_extract_dir}.")
-            update_payload_status(args.id, status="failed")
-            exit(1)
+            raise RuntimeError(f"No model XML files found in {model_extract_dir}.")
         model_full_path = model_files[0]
         
         # Find model label file
@@ -416,43 +520,74 @@ def main():
             model_label_path = label_files[0]
     else:
         # handle custom model uploaded to directory
-        custom_model_path = CUSTOM_MODELS_DIR / args.model
+        custom_model_path = CUSTOM_MODELS_DIR / model_name
         if not custom_model_path.exists():
             # predefined model
             model_status = export_yolo_model(
-                model_name=args.model, model_parent_dir=args.model_parent_dir
+                model_name=model_name,
+                model_parent_dir=args.model_parent_dir,
+                precision=args.model_precision,
+                device=args.device,
             )
             
             if not model_status:
-                update_payload_status(args.id, status="failed")
-                exit(1)
+                raise RuntimeError(f"Failed to export model {model_name}")
                 
             model_full_path = (
                 Path(args.model_parent_dir)
-                / f"{args.model}-{args.model_precision}"
-                / f"{args.model}.xml"
+                / f"{model_name}-{args.model_precision}"
+                / f"{model_name}.xml"
             )
         else:
             custom_model_files = list(custom_model_path.glob("*.xml"))
             if not custom_model_files:
-                logging.error(f"No model XML files found in {custom_model_path}.")
-                update_payload_status(args.id, status="failed")
-                exit(1)
+                raise RuntimeError(f"No model XML files found in {custom_model_path}.")
             model_full_path = custom_model_files[0]
             label_files = list(custom_model_path.glob("*.txt"))
             if label_files:
                 model_label_path = label_files[0]
+    return model_full_path, model_label_path
+
+
+def main():
+
+    """
+    Main function to start the GStreamer pipeline.
+    """
+    logging.info(
+        f"View stream at url: http://localhost:{args.port}/result/{args.tcp_port}"
+    )
+
+    input_sources = parse_input_sources(args.input, args.number_of_streams)
+    for input_source in dict.fromkeys(input_sources):
+        validate_input_source(input_source)
+    if "CPU" not in args.decode_device and "GPU" not in args.decode_device:
+        logging.error("Incorrect parameter --decode_device. Supported values: CPU, GPU")
+        update_payload_status(args.id, status="failed")
+        sys.exit(1)
     
+    
+    try:
+        model_full_path, model_label_path = prepare_model(args.model)
+    except Exception as e:
+        logging.error(f"Failed to prepare model: {e}")
+        update_payload_status(args.id, status="failed")
+        sys.exit(1)
+
     # Start the pipeline
     logging.info("Starting the pipeline...")
     try:
         update_payload_status(args.id, status="active")
-        run_object_detection( source= int(args.input) if args.input.isdigit() else args.input,
+        run_object_detection( sources=[int(x) if x.isdigit() else x for x in input_sources],
                                  flip=False,
                                  skip_first_frames=0,
                                  model=model_full_path,
                                  model_label_path=model_label_path,
-                                 device=args.device)
+                                 device=args.device,
+                                 num_requests=args.num_requests,
+                                 preprocessing=args.preprocessing,
+                                 playback_policy=args.playback_policy,
+                                 decode_device=args.decode_device)
         
         # opencv_server_image(tcp_port=args.tcp_port,
         #                     input=args.input,
@@ -573,6 +708,92 @@ def preprocess_image(img0: np.ndarray):
     img = np.ascontiguousarray(img)
     return img, img0
 
+
+def embed_preprocessing(ov_model: ov.Model, frame_height: int, frame_width: int):
+    """
+    Embed the YOLO letterbox preprocessing in the model with PrePostProcessor, so a uint8 HWC BGR frame of
+    frame_height x frame_width is fed to the device as is. Resize, padding, BGR to RGB, HWC to CHW and the
+    [0, 1] scaling run inside the compiled model instead of in Python.
+    Note that PrePostProcessor modifies ov_model in place.
+
+    Parameters:
+      ov_model (ov.Model): model with a 1x3xHxW float input
+      frame_height (int): height of the frames that will be inferred
+      frame_width (int): width of the frames that will be inferred
+    Returns:
+      model (ov.Model): model with the preprocessing embedded
+      input_shape (Tuple[int]): shape of the original model input, can be used for output rescaling
+    """
+    partial_shape = ov_model.input(0).get_partial_shape()
+    input_shape = tuple(partial_shape.to_shape()) if partial_shape.is_static else (1, 3, 640, 640)
+    model_height, model_width = input_shape[2:]
+
+    # Same geometry as letterbox(auto=False)
+    r = min(model_height / frame_height, model_width / frame_width)
+    new_width, new_height = int(round(frame_width * r)), int(round(frame_height * r))
+    dw, dh = (model_width - new_width) / 2, (model_height - new_height) / 2
+    top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+    left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+
+    ppp = PrePostProcessor(ov_model)
+    ppp.input().tensor() \
+        .set_element_type(ov.Type.u8) \
+        .set_layout(ov.Layout("NHWC")) \
+        .set_color_format(ColorFormat.BGR) \
+        .set_shape([1, frame_height, frame_width, 3])
+    ppp.input().model().set_layout(ov.Layout("NCHW"))
+    ppp.input().preprocess() \
+        .convert_element_type(ov.Type.f32) \
+        .convert_color(ColorFormat.RGB) \
+        .resize(ResizeAlgorithm.RESIZE_LINEAR, new_height, new_width) \
+        .pad([0, top, left, 0], [0, bottom, right, 0], 114.0, PaddingMode.CONSTANT) \
+        .scale(255.0)
+    return ppp.build(), input_shape
+
+
+def prepare_frame(image: np.ndarray):
+    """
+    Turn a BGR frame into the model input. With embedded preprocessing the frame is passed without copies,
+    only frames of another size than the one the model was built for are resized first. The input shares the memory
+    of image, which has to be writable (Frame.shared_image) and must not change until the inference completed.
+    Returns:
+      input_tensor (ov.Tensor): model input
+      input_shape (Tuple[int]): shape of the model input the predictions refer to
+    """
+    if embedded_input_shape is None:
+        preprocessed_img, _ = preprocess_image(image[:, :, ::-1])
+        input_tensor = prepare_input_tensor(preprocessed_img)
+        return ov.Tensor(input_tensor, shared_memory=True), input_tensor.shape
+
+    if image.shape[1::-1] != embedded_frame_size:
+        image = cv2.resize(image, embedded_frame_size, interpolation=cv2.INTER_LINEAR)
+    return ov.Tensor(image[None], shared_memory=True), embedded_input_shape
+
+
+def read_first_frame(source):
+    """
+    Read one frame of a source, used to size the embedded preprocessing.
+    """
+    cap = cv2.VideoCapture(source)
+    try:
+        ret, frame = cap.read()
+    finally:
+        cap.release()
+    if not ret:
+        raise RuntimeError(f"Cannot read a frame from {source}")
+    return frame
+
+
+def measure_python_preprocessing(frame: np.ndarray, iterations: int = 20):
+    """
+    Return the mean time in milliseconds of the Python letterbox preprocessing of a frame.
+    """
+    start_time = time.time()
+    for _ in range(iterations):
+        preprocessed_img, _ = preprocess_image(frame[:, :, ::-1])
+        prepare_input_tensor(preprocessed_img)
+    return (time.time() - start_time) / iterations * 1000
+
 def detect(
     model: ov.Model,
     image_path: Path,
@@ -601,11 +822,33 @@ def detect(
         img = np.array(Image.open(image_path))
     preprocessed_img, orig_img = preprocess_image(img)
     input_tensor = prepare_input_tensor(preprocessed_img)
-    predictions = torch.from_numpy(model(input_tensor)[0])
-    pred = non_max_suppression(predictions, conf_thres, iou_thres, classes=classes, agnostic=agnostic_nms)
+    pred = postprocess_predictions(model(input_tensor)[0], conf_thres, iou_thres, classes=classes, agnostic_nms=agnostic_nms)
     return pred, orig_img, input_tensor.shape
 
 
+def postprocess_predictions(
+    predictions: np.ndarray,
+    conf_thres: float = 0.25,
+    iou_thres: float = 0.45,
+    classes: List[int] = None,
+    agnostic_nms: bool = False,
+):
+    """
+    Run NMS on the raw model output, with torch when it is installed and with the NumPy implementation otherwise.
+    Parameters:
+        predictions (np.ndarray): raw model output
+        conf_thres (float, *optional*, 0.25): minimal accepted confidence for object filtering
+        iou_thres (float, *optional*, 0.45): minimal overlap score for removing objects duplicates in NMS
+        classes (List[int], *optional*, None): labels for prediction filtering, if not provided all predicted labels will be used
+        agnostic_nms (bool, *optional*, False): apply class agnostic NMS approach or not
+    Returns:
+       pred (List): list of detections with (n,6) shape, where n - number of detected boxes in format [x1, y1, x2, y2, score, label]
+    """
+    if torch is not None:
+        predictions = torch.from_numpy(predictions)
+    return non_max_suppression(predictions, conf_thres, iou_thres, classes=classes, agnostic=agnostic_nms)
+
+
 def load_labels_to_dict(model_label_path):
     labels_dict = {}
     with open(model_label_path, 'r', encoding='utf-8') as f:
@@ -649,123 +892,661 @@ def draw_boxes(
         annotator.box_label(xyxy, label, color=colors(int(cls), True))
     return image
 
-def run_object_detection(
-    source=0,
+def build_grid_layout(num_streams, final_width, final_height):
+    """
+    Method to dynamically split a single final_width * final_height output window into a grid of N sub-windows.
+    Returns a list of (xpos, ypos, width, height) tuples, one per stream.
+    """
+    # Determine how many columns and rows a square-ish grid would need
+    grid_cols = math.ceil(math.sqrt(num_streams))
+    grid_rows = math.ceil(num_streams / grid_cols)
+
+    # Calculate each sub-window width and height
+    sub_width = final_width // grid_cols
+    sub_height = final_height // grid_rows
+
+    layout = []
+    for i in range(num_streams):
+        row = i // grid_cols
+        col = i % grid_cols
+        layout.append((col * sub_width, row * sub_height, sub_width, sub_height))
+    return layout
+
+
+def publish_frame(stream_id: int, frame: np.ndarray, owner: Frame = None):
+    """
+    Publish an annotated frame on /result. With several streams the frame is drawn into its tile of the grid.
+    owner is the reference keeping the buffer of frame alive, publish_frame releases it when the frame is replaced.
+    """
+    global latest_frame, latest_frame_owner, frame_seq
+    if grid_layout is None:
+        if stream_id > 0:
+            if owner is not None:
+                owner.release()
+            return
+        with lock:
+            latest_frame = frame
+            previous_owner, latest_frame_owner = latest_frame_owner, owner
+            frame_seq += 1
+            frame_ready.notify_all()
+        if previous_owner is not None:
+            previous_owner.release()
+        return
+
+    # The grid is rebuilt when the number of streams changes
+    layout = grid_layout
+    if stream_id >= len(layout):
+        if owner is not None:
+            owner.release()
+        return
+    xpos, ypos, width, height = layout[stream_id]
+    tile = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+    if owner is not None:
+        owner.release()
+    with lock:
+        if grid_layout is not layout:
+            return
+        grid_canvas[ypos:ypos + height, xpos:xpos + width] = tile
+        latest_frame = grid_canvas
+        frame_seq += 1
+        frame_ready.notify_all()
+
+
+def get_frame_counts(stream_id: int):
+    return stream_frame_counts.setdefault(f"stream_id {stream_id + 1}", {"decoded": 0, "inferred": 0, "dropped": 0})
+
+
+def update_decode_metrics(stream_id: int, decoded: int, dropped: int, decode_time: float, acceleration: str):
+    """
+    Record the number of frames the video player of one stream decoded and dropped so far, its mean decode time
+    in milliseconds and the decode acceleration it uses.
+    """
+    with lock:
+        if stream_id >= active_streams:
+            return
+        frame_counts = get_frame_counts(stream_id)
+        frame_counts["decoded"] = decoded
+        frame_counts["dropped"] = dropped
+        if decode_time is not None:
+            stream_decode_ms[stream_id] = decode_time
+        stream_decode_acceleration[f"stream_id {stream_id + 1}"] = acceleration
+
+
+def update_stream_metrics(
+    stream_id: int, fps: float, queue_depth: int, in_flight: int, preprocess_time: float, inference_time: float
+):
+    """
+    Record the FPS, mean host-side preprocessing time and mean inference time in milliseconds of one stream and
+    refresh the aggregated pipeline metrics. Called once per inferred frame.
+    """
+    with lock:
+        if stream_id >= active_streams:
+            return
+        stream_fps[f"stream_id {stream_id + 1}"] = fps
+        stream_preprocess_ms[stream_id] = preprocess_time
+        stream_inference_ms[stream_id] = inference_time
+        get_frame_counts(stream_id)["inferred"] += 1
+        fps_streams = dict(stream_fps)
+        preprocess_time_ms = sum(stream_preprocess_ms.values()) / len(stream_preprocess_ms)
+        inference_time_ms = sum(stream_inference_ms.values()) / len(stream_inference_ms)
+        decode_time_ms = sum(stream_decode_ms.values()) / len(stream_decode_ms) if stream_decode_ms else None
+        decode_acceleration = dict(stream_decode_acceleration)
+        frame_counts_streams = {key: dict(frame_counts) for key, frame_counts in stream_frame_counts.items()}
+
+    total_fps = sum(fps_streams.values())
+    preprocess_time_saved_ms = None
+    if python_preprocess_ms is not None:
+        preprocess_time_saved_ms = python_preprocess_ms - preprocess_time_ms
+    app.state.pipeline_metrics.update({
+        "total_fps": total_fps,
+        "number_streams": len(fps_streams),
+        "average_fps_per_stream": total_fps / len(fps_streams),
+        "fps_streams": fps_streams,
+        "infer_queue_depth": queue_depth,
+        "in_flight_requests": in_flight,
+        "preprocess_time_ms": preprocess_time_ms,
+        "preprocess_time_saved_ms": preprocess_time_saved_ms,
+        "decode_time_ms": decode_time_ms,
+        "inference_time_ms": inference_time_ms,
+        "decode_acceleration": decode_acceleration,
+        "frames_decoded": sum(frame_counts["decoded"] for frame_counts in frame_counts_streams.values()),
+        "frames_inferred": sum(frame_counts["inferred"] for frame_counts in frame_counts_streams.values()),
+        "frames_dropped": sum(frame_counts["dropped"] for frame_counts in frame_counts_streams.values()),
+        "frame_counts_streams": frame_counts_streams,
+        "timestamp": time.time(),
+    })
+
+
+class AsyncDetector:
+    """
+    Share one AsyncInferQueue between all streams so several infer requests are in flight at once.
+    Completion callbacks run NMS and drawing, and each stream's frames are published in capture order.
+
+    :param compiled_model: OpenVINO compiled model.
+    :param names: Mapping between class index and label.
+    :param num_requests: Number of infer requests, 0 uses the optimal number for the device.
+    """
+
+    def __init__(self, compiled_model, names, num_requests=0):
+        self.infer_queue = ov.AsyncInferQueue(compiled_model, num_requests)
+        self.queue_depth = len(self.infer_queue)
+        self.names = names
+        self.in_flight = 0
+        self.lock = threading.Lock()
+        self.submit_lock = threading.Lock()
+        self.submitted_frame_ids = collections.defaultdict(int)
+        self.next_frame_ids = collections.defaultdict(int)
+        self.finished_frames = collections.defaultdict(dict)
+        self.completion_times = collections.defaultdict(lambda: collections.deque(maxlen=200))
+        self.preprocess_times = collections.defaultdict(lambda: collections.deque(maxlen=200))
+        self.inference_times = collections.defaultdict(lambda: collections.deque(maxlen=200))
+        self.infer_queue.set_callback(self.__on_complete)
+        logging.info(f"Running asynchronous inference with {self.queue_depth} infer requests")
+
+    def submit(self, stream_id, frame):
+        """
+        Preprocess a BGR frame and start an infer request for it. Blocks until one of the requests is idle.
+        Takes over the frame reference, it is released once the frame is published or dropped, so the ring buffer
+        the request reads from is not decoded into before the request completed.
+        Frame ids are numbered per stream here, so a stream that is stopped and started again keeps its order.
+        """
+        start_time = time.time()
+        input_tensor, input_shape = prepare_frame(frame.shared_image())
+        preprocess_time = time.time() - start_time
+        with self.lock:
+            self.in_flight += 1
+            frame_id = self.submitted_frame_ids[stream_id]
+            self.submitted_frame_ids[stream_id] += 1
+        with self.submit_lock:
+            # Wait for an idle request first, the preprocessing time covers handing the input to it but not the wait
+            self.infer_queue.get_idle_request_id()
+            start_time = time.time()
+            self.infer_queue.start_async({0: input_tensor}, (stream_id, frame_id, frame, input_shape), share_inputs=True)
+            preprocess_time += time.time() - start_time
+        with self.lock:
+            self.preprocess_times[stream_id].append(preprocess_time)
+
+    def wait_all(self):
+        self.infer_queue.wait_all()
+
+    def __on_complete(self, request, userdata):
+        stream_id, frame_id, frame, input_shape = userdata
+        image = frame.image
+        try:
+            detections = postprocess_predictions(request.get_output_tensor(0).data)
+            if len(detections[0]):
+                image = draw_boxes(detections[0], input_shape, frame.writable_image(), self.names)
+        except Exception as e:
+            logging.error(f"Error processing inference result: {e}")
+
+        with self.lock:
+            self.in_flight -= 1
+            in_flight = self.in_flight
+            completion_times = self.completion_times[stream_id]
+            completion_times.append(time.time())
+            elapsed = completion_times[-1] - completion_times[0]
+            fps = (len(completion_times) - 1) / elapsed if elapsed > 0 else 0.0
+            # The first request of a stream can complete before its preprocessing time is recorded
+            preprocess_times = self.preprocess_times[stream_id]
+            preprocess_time = np.mean(preprocess_times) * 1000 if preprocess_times else 0.0
+            # Latency of the request on the device in ms, without the time spent waiting for an idle request
+            self.inference_times[stream_id].append(request.latency)
+            inference_time = np.mean(self.inference_times[stream_id])
+
+            # Requests may complete out of order, only release frames in capture order
+            finished_frames = self.finished_frames[stream_id]
+            finished_frames[frame_id] = (image, frame)
+            ready_frames = []
+            while self.next_frame_ids[stream_id] in finished_frames:
+                ready_frames.append(finished_frames.pop(self.next_frame_ids[stream_id]))
+                self.next_frame_ids[stream_id] += 1
+
+        update_stream_metrics(stream_id, fps, self.queue_depth, in_flight, preprocess_time, inference_time)
+        if ready_frames:
+            # Only the newest ready frame is shown, the older ones are released
+            for _, skipped_frame in ready_frames[:-1]:
+                skipped_frame.release()
+            publish_frame(stream_id, *ready_frames[-1])
+
+
+def run_stream(
+    stream_id: int,
+    source,
+    compiled_model,
+    names,
+    detector: AsyncDetector = None,
     flip=False,
     skip_first_frames=0,
-    model="",
-    model_label_path: str = None,
-    device=args.device,
-    video_width: int = None,  # if not set the original size is used
+    video_width: int = None,
+    playback_policy: str = "latest",
+    decode_device: str = "CPU",
+    stop_event: threading.Event = None,
 ):
-    global latest_frame
+    """
+    Read frames from one source and run them through the shared compiled model, restarting the source when it ends.
+    Every decoded frame is inferred at most once, playback_policy decides whether frames are dropped when inference
+    falls behind. Runs until stop_event is set.
+    """
+    # Each stream needs its own infer request when inferring synchronously from several threads
+    infer_request = compiled_model.create_infer_request() if detector is None else None
+    stop_event = stop_event or threading.Event()
     player = None
-    
-    ov_model = core.read_model(model)
-    
-    NAMES=NONE
-    
-    compiled_model = core.compile_model(ov_model, device)
-
-    
-    if model_label_path is None:
-
-        if("model_info" in ov_model.rt_info and "labels" in ov_model.rt_info["model_info"]):
-           labels_list = ov_model.rt_info["model_info"]["labels"].value.split()
-           NAMES = {idx: label for idx, label in enumerate(labels_list)}
-        # elif("model_info" in model.rt_info and "labels" in model.rt_info["model_info"]):
-        #     labels_list = ov_model.rt_info["model_info"]["labels"].value.split()
-        #     NAMES = {idx: label for idx, label in enumerate(labels_list)}   
-        pass   
-    else:
-        NAMES=load_labels_to_dict(model_label_path)
-    
+    # Frame counts of the players of the previous runs of the source
+    decoded_frames = dropped_frames = 0
+    acceleration = None
     try:
-        while True:
+        while not stop_event.is_set():
             # Create a video player to play with target fps.
             # player = VideoPlayer(source=source, flip=flip, fps=30, skip_first_frames=skip_first_frames)
-            player = VideoPlayer(source=source, flip=flip, fps=60, skip_first_frames=skip_first_frames)
+            # The ring holds the frames in flight, the published frame, the current frame and the one being decoded
+            num_buffers = (detector.queue_depth if detector is not None else 1) + 3
+            # The all policy plays every frame at the source FPS
+            player = VideoPlayer(
+                source=source,
+                flip=flip,
+                fps=60 if playback_policy == "latest" else None,
+                skip_first_frames=skip_first_frames,
+                num_buffers=num_buffers,
+                policy=playback_policy,
+                decode_device=decode_device,
+            )
+            if player.acceleration != acceleration:
+                acceleration = player.acceleration
+                logging.info(f"Stream {stream_id + 1} decodes {source} with hardware acceleration {acceleration}")
+            if acceleration == "none":
+                # No hardware decoder takes this source, do not try again every time the source restarts
+                decode_device = "CPU"
 
             # Start capturing.
             player.start()
     
             processing_times = collections.deque()
-            while True:
-                # Grab the frame.
-                frame = player.next()
+            preprocess_times = collections.deque(maxlen=200)
+            inference_times = collections.deque(maxlen=200)
+            while not stop_event.is_set():
+                # Grab the next frame, a read-only view of the player's buffer. Waits until a new frame is decoded.
+                frame = player.next_frame()
+                update_decode_metrics(
+                    stream_id,
+                    decoded_frames + player.decoded_frames,
+                    dropped_frames + player.dropped_frames,
+                    player.decode_time_ms,
+                    player.acceleration,
+                )
                 if frame is None:
-                    print("Source ended")
-                    # player.start()
-                    # continue
+                    print(f"Source ended: {source}")
                     break
     
                 if video_width:
                     # If the frame is larger than video_width, reduce size to improve the performance.
                     # If more, increase size for better demo expirience.
     
-                    scale = video_width / max(frame.shape)
-                    frame = cv2.resize(
-                        src=frame,
-                        dsize=None,
-                        fx=scale,
-                        fy=scale,
-                        interpolation=cv2.INTER_AREA,
-                    )
+                    with frame:
+                        scale = video_width / max(frame.image.shape)
+                        resized = cv2.resize(
+                            src=frame.image,
+                            dsize=None,
+                            fx=scale,
+                            fy=scale,
+                            interpolation=cv2.INTER_AREA,
+                        )
+                    frame = Frame.from_array(resized, frame.seq)
     
                 # Get the results.
-                input_image = np.array(frame)
+                if detector is not None:
+                    detector.submit(stream_id, frame)
+                    continue
     
                 start_time = time.time()
-                detections, _, input_shape = detect(compiled_model, input_image[:, :, ::-1])
+                input_tensor, input_shape = prepare_frame(frame.shared_image())
+                # Handing the input to the request is part of the preprocessing time
+                infer_request.set_input_tensor(input_tensor)
+                preprocess_times.append(time.time() - start_time)
+                infer_request.infer()
+                predictions = infer_request.get_output_tensor(0).data
+                inference_times.append(infer_request.latency)
+                detections = postprocess_predictions(predictions)
                 stop_time = time.time()
                 
-                image_with_boxes = draw_boxes(detections[0], input_shape, input_image, NAMES)
-    
-                frame = image_with_boxes
+                image_with_boxes = frame.image
+                if len(detections[0]):
+                    image_with_boxes = draw_boxes(detections[0], input_shape, frame.writable_image(), names)
 
                 processing_times.append(stop_time - start_time)
                 # Use processing times from last 200 frames.
                 if len(processing_times) > 200:
                     processing_times.popleft()
 
-                _, f_width = frame.shape[:2]
                 # Mean processing time [ms].
                 processing_time = np.mean(processing_times) * 1000
                 fps = 1000 / processing_time
-                
-                app.state.pipeline_metrics.update({
-                "total_fps": fps,
-                "number_streams": 1,
-                "average_fps_per_stream": fps,
-                "fps_streams": fps,
-                "timestamp": time.time(),
-                })
-                with lock:
-                    latest_frame = frame
-            if player is not None:
+
+                update_stream_metrics(stream_id, fps, queue_depth=1, in_flight=1,
+                                      preprocess_time=np.mean(preprocess_times) * 1000,
+                                      inference_time=np.mean(inference_times))
+                publish_frame(stream_id, image_with_boxes, frame)
+
             # Stop capturing.
-                player.stop()
-                
+            player.stop()
+            decoded_frames += player.decoded_frames
+            dropped_frames += player.dropped_frames
+            player = None
+    # any different error
+    except RuntimeError as e:
+        logging.error(f"Stream {stream_id + 1} stopped: {e}")
+        if player is not None:
+            player.stop()
+
+
+def run_density_search():
+    """
+    Search the stream density of the running pipeline, then keep running at the density found.
+    """
+
+    def on_report(report):
+        global density_report
+        density_report = report
+
+    report = find_stream_density(
+        set_stream_count=stream_pool.set_stream_count,
+        read_metrics=lambda: dict(app.state.pipeline_metrics),
+        target_fps=args.density_target_fps,
+        max_streams=args.density_max_streams,
+        report_path=args.density_report,
+        report_info={
+            "worker": "object-detection",
+            "model": args.model,
+            "device": args.device,
+            "num_requests": args.num_requests,
+            "preprocessing": args.preprocessing,
+            "playback_policy": args.playback_policy,
+            "decode_device": args.decode_device,
+        },
+        on_report=on_report,
+    )
+    stream_pool.set_stream_count(max(report["max_streams"], 1))
+
+
+class StreamPool:
+    """
+    Run one run_stream thread per stream and attach or detach streams at runtime.
+    Stream i reads sources[i % len(sources)], the /result grid and the metrics follow the number of streams.
+    """
+
+    def __init__(
+        self, sources, compiled_model, names, detector=None, flip=False, skip_first_frames=0, video_width=None,
+        playback_policy="latest", decode_device="CPU",
+    ):
+        self.sources = sources
+        self.compiled_model = compiled_model
+        self.names = names
+        self.detector = detector
+        self.flip = flip
+        self.skip_first_frames = skip_first_frames
+        self.video_width = video_width
+        self.playback_policy = playback_policy
+        self.decode_device = decode_device
+        self.streams = []
+        self.lock = threading.Lock()
+        self.switch_lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    def set_stream_count(self, number_of_streams):
+        """
+        Start or stop streams until number_of_streams are running. Safe to call from any thread.
+        """
+        global grid_layout, grid_canvas, active_streams
+        with self.lock:
+            removed = []
+            while len(self.streams) > number_of_streams:
+                removed.append(self.streams.pop())
+            for thread, stop_event in removed:
+                stop_event.set()
+            for thread, _ in removed:
+                thread.join()
+
+            with lock:
+                active_streams = number_of_streams
+                if number_of_streams > 1:
+                    grid_layout = build_grid_layout(number_of_streams, args.width_limit, args.height_limit)
+                    grid_canvas = np.zeros((args.height_limit, args.width_limit, 3), dtype=np.uint8)
+                else:
+                    grid_layout = grid_canvas = None
+                for stream_id in range(number_of_streams, number_of_streams + len(removed)):
+                    stream_fps.pop(f"stream_id {stream_id + 1}", None)
+                    stream_preprocess_ms.pop(stream_id, None)
+                    stream_frame_counts.pop(f"stream_id {stream_id + 1}", None)
+                    stream_decode_ms.pop(stream_id, None)
+                    stream_inference_ms.pop(stream_id, None)
+                    stream_decode_acceleration.pop(f"stream_id {stream_id + 1}", None)
+
+            while len(self.streams) < number_of_streams:
+                stream_id = len(self.streams)
+                stop_event = threading.Event()
+                thread = threading.Thread(
+                    target=run_stream,
+                    args=(
+                        stream_id,
+                        self.sources[stream_id % len(self.sources)],
+                        self.compiled_model,
+                        self.names,
+                        self.detector,
+                        self.flip,
+                        self.skip_first_frames,
+                        self.video_width,
+                        self.playback_policy,
+                        self.decode_device,
+                        stop_event,
+                    ),
+                    daemon=True,
+                )
+                thread.start()
+                self.streams.append((thread, stop_event))
+        if number_of_streams > 1:
+            logging.info(f"Compositing {number_of_streams} streams into a {args.width_limit}x{args.height_limit} grid")
+
+    def switch_model(self, loaded):
+        """
+        Restart the running streams on another model loaded by load_detection_model.
+        """
+        global embedded_input_shape
+        with self.switch_lock:
+            number_of_streams = len(self.streams)
+            self.set_stream_count(0)
+            if self.detector is not None:
+                self.detector.wait_all()
+            self.compiled_model = loaded["compiled_model"]
+            self.names = loaded["names"]
+            self.detector = loaded["detector"]
+            embedded_input_shape = loaded["embedded_input_shape"]
+            self.set_stream_count(number_of_streams)
+
+    def wait(self):
+        self.stopped.wait()
+
+
+def load_detection_model(model, model_label_path, device, num_requests, throughput):
+    """
+    Read and compile the detection model, with the preprocessing embedded when embedded_frame_size is set.
+    Returns the compiled model with its labels, its AsyncDetector and the input shape of the embedded preprocessing.
+    """
+    ov_model = core.read_model(model)
+    
+    NAMES=NONE
+    
+    if model_label_path is None:
+
+        if("model_info" in ov_model.rt_info and "labels" in ov_model.rt_info["model_info"]):
+           labels_list = ov_model.rt_info["model_info"]["labels"].value.split()
+           NAMES = {idx: label for idx, label in enumerate(labels_list)}
+        # elif("model_info" in model.rt_info and "labels" in model.rt_info["model_info"]):
+        #     labels_list = ov_model.rt_info["model_info"]["labels"].value.split()
+        #     NAMES = {idx: label for idx, label in enumerate(labels_list)}   
+        pass   
+    else:
+        NAMES=load_labels_to_dict(model_label_path)
+
+    input_shape = None
+    if embedded_frame_size is not None:
+        frame_width, frame_height = embedded_frame_size
+        ov_model, input_shape = embed_preprocessing(ov_model, frame_height, frame_width)
+
+    model_cache = CompiledModelCache(model, device)
+    config = dict(model_cache.properties)
+    tuned = get_tuned_config(model, device, "throughput" if throughput else "latency")
+    if tuned is not None:
+        config.update(tuned["config"])
+        if num_requests == 0:
+            num_requests = tuned["num_requests"]
+    elif throughput:
+        # Let the device size its streams for several concurrent infer requests
+        config["PERFORMANCE_HINT"] = "THROUGHPUT"
+    start_time = time.perf_counter()
+    compiled_model = core.compile_model(ov_model, device, config)
+    model_cache.record_load(time.perf_counter() - start_time)
+
+    return {
+        "compiled_model": compiled_model,
+        "names": NAMES,
+        "detector": AsyncDetector(compiled_model, NAMES, num_requests) if num_requests != 1 else None,
+        "embedded_input_shape": input_shape,
+    }
+
+
+def get_tuned_config(model, device, objective):
+    """
+    Return the configuration tuned for the model on device, tuning it first with --autotune.
+    """
+    tuned = load_tuned_config(model, device, objective)
+    if tuned is None and args.autotune:
+        logging.info(f"Tuning the OpenVINO configuration of {model} on {device}, this takes a few minutes...")
+        try:
+            tune(model, device)
+        except Exception as e:
+            logging.warning(f"Tuning {model} on {device} failed, using the default configuration: {e}")
+        tuned = load_tuned_config(model, device, objective)
+    if tuned is not None:
+        logging.info(f"Using the {objective} configuration tuned for {device}: {tuned['config']}, {tuned['num_requests']} requests")
+    return tuned
+
+
+def get_pooled_model(model_name, model_full_path, model_label_path, device, num_requests, throughput):
+    return model_pool.get(
+        model_name,
+        lambda: load_detection_model(model_full_path, model_label_path, device, num_requests, throughput),
+        get_model_size(model_full_path),
+    )
+
+
+def run_object_detection(
+    sources=(0,),
+    flip=False,
+    skip_first_frames=0,
+    model="",
+    model_label_path: str = None,
+    device=args.device,
+    video_width: int = None,  # if not set the original size is used
+    num_requests: int = 1,
+    preprocessing: str = "python",
+    playback_policy: str = "latest",
+    decode_device: str = "CPU",
+):
+    global stream_pool, embedded_input_shape, embedded_frame_size, python_preprocess_ms
+
+    if preprocessing == "model":
+        # Size the embedded preprocessing from the first source, frames of other sizes are resized to it
+        frame = read_first_frame(sources[0])
+        python_preprocess_ms = measure_python_preprocessing(frame)
+        frame_height, frame_width = frame.shape[:2]
+        embedded_frame_size = (frame_width, frame_height)
+        logging.info(
+            f"Preprocessing embedded in the model for {frame_width}x{frame_height} frames, "
+            f"Python preprocessing took {python_preprocess_ms:.2f} ms per frame"
+        )
+
+    throughput = num_requests != 1 or len(sources) != 1 or args.density_target_fps > 0
+    loaded, _ = get_pooled_model(args.model, model, model_label_path, device, num_requests, throughput)
+    embedded_input_shape = loaded["embedded_input_shape"]
+
+    stream_pool = StreamPool(
+        sources,
+        loaded["compiled_model"],
+        loaded["names"],
+        loaded["detector"],
+        flip,
+        skip_first_frames,
+        video_width,
+        playback_policy,
+        decode_device,
+    )
+    stream_pool.set_stream_count(len(sources))
+
+    try:
+        if args.density_target_fps > 0:
+            run_density_search()
+        stream_pool.wait()
     # ctrl-c
     except KeyboardInterrupt:
         print("Interrupted")
-    # any different error
-    except RuntimeError as e:
-        print(e)
 
-        
-def mjpeg_generator():
-    global latest_frame
-    while True:
-        with lock:
-            if latest_frame is None:
-                continue
-            ret, jpeg = cv2.imencode('.jpg', latest_frame)
+
+class MjpegBroadcaster:
+    """
+    JPEG-encode every published frame once and fan the same multipart chunk out to all /result clients.
+    Clients always get the most recent frame, a client slower than the pipeline skips frames instead of queueing them.
+    Nothing is encoded while no client is connected.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.chunk = None
+        self.seq = 0
+        self.clients = 0
+        self.thread = None
+
+    def __run(self):
+        encoded_seq = 0
+        while True:
+            with frame_ready:
+                while frame_seq == encoded_seq or self.clients == 0:
+                    frame_ready.wait(timeout=1.0)
+                # The grid canvas keeps being drawn into, encode a snapshot outside the lock
+                frame = latest_frame.copy()
+                encoded_seq = frame_seq
+
+            ret, jpeg = cv2.imencode(".jpg", frame)
             if not ret:
                 continue
-            frame_bytes = jpeg.tobytes()
-        yield (b"--frame\r\n"
-               b"Content-Type: image/jpeg\r\n\r\n" + frame_bytes + b"\r\n")
+            chunk = b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + jpeg.tobytes() + b"\r\n"
+            with self.condition:
+                self.chunk = chunk
+                self.seq = encoded_seq
+                self.condition.notify_all()
+
+    def stream(self):
+        """
+        Yield multipart MJPEG chunks for one client, blocking until a newer frame than the last one sent is encoded.
+        """
+        with self.condition:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.__run, daemon=True)
+                self.thread.start()
+            self.clients += 1
+            # The cached chunk is stale when nobody was watching, wait for a fresh one
+            last_seq = self.seq
+        try:
+            while True:
+                with self.condition:
+                    if not self.condition.wait_for(lambda: self.seq != last_seq, timeout=1.0):
+                        continue
+                    last_seq, chunk = self.seq, self.chunk
+                yield chunk
+        finally:
+            with self.condition:
+                self.clients -= 1
+
+
+broadcaster = MjpegBroadcaster()
 
 
 @app.get("/video")
@@ -781,7 +1562,7 @@ def get_mjpeg_stream():
     
     try:
         return StreamingResponse(
-            mjpeg_generator(),
+            broadcaster.stream(),
             media_type="multipart/x-mixed-replace; boundary=frame",
         )
     except Exception as e:
@@ -811,6 +1592,89 @@ def get_mjpeg_stream():
 #         )
 
 
+class StreamsRequest(BaseModel):
+    number_of_streams: int
+
+
+@app.post("/api/streams")
+def set_number_of_streams(request: StreamsRequest):
+    """
+    Attach or detach streams at runtime.
+    """
+    if stream_pool is None:
+        return JSONResponse({"status": False, "message": "The pipeline is not running yet"})
+    if request.number_of_streams < 1:
+        return JSONResponse(
+            {"status": False, "message": "number_of_streams must be at least 1"}
+        )
+    stream_pool.set_stream_count(request.number_of_streams)
+    return JSONResponse(
+        {"status": "success", "number_of_streams": request.number_of_streams}
+    )
+
+
+class ModelRequest(BaseModel):
+    model_name: str
+
+
+@app.post("/api/model")
+def switch_model(request: ModelRequest):
+    """
+    Switch the running streams to another model without restarting the worker. Models loaded before are kept in the
+    model pool within --model_pool_size_gb, switching back to one of them does not compile it again.
+    """
+    if stream_pool is None:
+        return JSONResponse({"status": False, "message": "The pipeline is not running yet"})
+    with model_switch_lock:
+        start_time = time.perf_counter()
+        try:
+            model_full_path, model_label_path = prepare_model(request.model_name)
+            throughput = args.num_requests != 1 or len(stream_pool.sources) != 1 or args.density_target_fps > 0
+            loaded, cached = get_pooled_model(
+                request.model_name, model_full_path, model_label_path, args.device, args.num_requests, throughput
+            )
+        except Exception as e:
+            # The streams keep running on the current model
+            logging.error(f"Failed to switch to model {request.model_name}: {e}")
+            return JSONResponse({"status": False, "message": f"Failed to load model {request.model_name}"})
+        stream_pool.switch_model(loaded)
+        args.model = request.model_name
+        switch_time_s = time.perf_counter() - start_time
+    logging.info(f"Switched to model {request.model_name} in {switch_time_s:.2f} s ({'pooled' if cached else 'loaded'})")
+    update_payload_status(args.id, status="active")
+    return JSONResponse(
+        {
+            "data": {"model_name": request.model_name, "pooled": cached, "switch_time_s": round(switch_time_s, 2)},
+            "status": "success",
+        }
+    )
+
+
+@app.get("/api/models")
+def get_loaded_models():
+    """
+    Return the models kept loaded in the model pool, the active one last.
+    """
+    return JSONResponse(
+        {
+            "data": {"models": model_pool.describe(), "max_memory_gb": args.model_pool_size_gb},
+            "status": "success",
+        }
+    )
+
+
+@app.get("/api/density")
+def get_density_report():
+    """
+    Return the stream density report, updated after every step of the search.
+    """
+    if density_report is None:
+        return JSONResponse(
+            {"status": False, "message": "No stream density search has run, start the worker with --density_target_fps"}
+        )
+    return JSONResponse({"data": density_report, "status": "success"})
+
+
 @app.get("/api/metrics")
 def get_pipeline_metrics():
     """
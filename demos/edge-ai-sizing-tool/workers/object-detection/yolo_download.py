@@ -10,7 +10,6 @@ import logging
 
 import time
 
-from ultralytics import YOLO
 from pathlib import Path
 
 logging.basicConfig(
@@ -91,9 +90,10 @@ def model_files_exist_and_safe(model_path_fp32: Path, model_path_fp16: Path) ->
         return True
 
 
-def export_yolo_model(model_name, model_parent_dir=MODELS_DIR):
+def export_yolo_model(model_name, model_parent_dir=MODELS_DIR, precision="FP16", device="CPU"):
     """
     Download and convert YOLO models to OpenVINO format.
+    FP32 and FP16 models are always written, an INT8 model is quantized from the FP32 one when precision is INT8.
     """
     
     # Validate the model name
@@ -111,9 +111,10 @@ def export_yolo_model(model_name, model_parent_dir=MODELS_DIR):
     model_dir_fp16 = base_dir / f"{model_name}-FP16"
     model_path_fp32 = model_dir_fp32 / f"{model_name}.xml"
     model_path_fp16 = model_dir_fp16 / f"{model_name}.xml"
+    model_path_int8 = base_dir / f"{model_name}-INT8" / f"{model_name}.xml"
 
     # Validate all paths are within the base directory
-    for p in [model_dir_fp32, model_dir_fp16, model_path_fp32, model_path_fp16]:
+    for p in [model_dir_fp32, model_dir_fp16, model_path_fp32, model_path_fp16, model_path_int8]:
         if not is_path_safe(base_dir, p):
             logging.error(f"Unsafe model path detected: {p}")
             sys.exit(1)
@@ -122,10 +123,13 @@ def export_yolo_model(model_name, model_parent_dir=MODELS_DIR):
     is_model_exist = model_files_exist_and_safe(model_path_fp32, model_path_fp16)
     if is_model_exist:
         logging.info(f"Model already exists: {model_path_fp32} and {model_path_fp16}")
-        return True
+        return precision != "INT8" or quantize_model(model_name, model_type, model_path_fp32, model_path_fp16, model_path_int8, device)
 
     logging.info(f"Downloading and converting: {model_name}")
 
+    # ultralytics pulls in torch, only import it when a model actually needs exporting
+    from ultralytics import YOLO
+
     # Create directories for the model
     model_dir_fp32.mkdir(parents=True, exist_ok=True)
     model_dir_fp16.mkdir(parents=True, exist_ok=True)
@@ -172,7 +176,24 @@ def export_yolo_model(model_name, model_parent_dir=MODELS_DIR):
 
     logging.info(f"Model saved: {model_path_fp32} and {model_path_fp16}")
 
-    return True
+    return precision != "INT8" or quantize_model(model_name, model_type, model_path_fp32, model_path_fp16, model_path_int8, device)
+
+
+def quantize_model(model_name, model_type, model_path_fp32, model_path_fp16, model_path_int8, device):
+    """
+    Quantize the model to INT8 with NNCF unless the INT8 model already exists.
+    """
+    if model_path_int8.exists():
+        if os.path.realpath(model_path_int8) != os.path.abspath(model_path_int8):
+            logging.error(f"Error: Model file {model_path_int8} is a symlink or contains a symlink in its path.")
+            return False
+        logging.info(f"Model already exists: {model_path_int8}")
+        return True
+
+    # nncf is only needed for INT8, import it with the quantization code on demand
+    from yolo_quantize import quantize_yolo_model
+
+    return quantize_yolo_model(model_name, model_type, model_path_fp32, model_path_fp16, model_path_int8, device)
 
 
 def parse_arguments():
@@ -187,6 +208,19 @@ def parse_arguments():
         type=str,
         help="The name of the YOLO model to download and convert.",
     )
+    parser.add_argument(
+        "--precision",
+        type=str,
+        choices=["FP32", "FP16", "INT8"],
+        default="FP16",
+        help="Precision of the model to use, INT8 is quantized with NNCF (default: FP16)",
+    )
+    parser.add_argument(
+        "--device",
+        type=str,
+        default="CPU",
+        help="Device the INT8 model is benchmarked on against FP16 (default: CPU)",
+    )
     args = parser.parse_args()
     # Validate model_name
     if args.model_name not in YOLO_MODELS:
@@ -201,4 +235,4 @@ if __name__ == "__main__":
     args = parse_arguments()
 
     # Export the specified model
-    export_yolo_model(args.model_name, YOLO_MODELS[args.model_name])
+    export_yolo_model(args.model_name, YOLO_MODELS[args.model_name], precision=args.precision, device=args.device)
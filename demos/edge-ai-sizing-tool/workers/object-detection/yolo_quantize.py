@@ -0,0 +1,319 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+INT8 post-training quantization of the YOLO models with NNCF.
+
+The FP32 IR is calibrated on frames sampled evenly from the videos and images in assets/media, so the activation
+ranges match the scenes the tool runs on. The box decoding of the detection head stays in floating point, as in the
+ultralytics INT8 export, since quantizing it costs accuracy for no speed-up.
+
+After quantization the INT8 model is compared with the FP16 model on the target device: throughput, latency and the
+mAP of the INT8 detections against the FP16 detections on frames that were not used for calibration. The bundled
+media has no annotations, so the FP16 detections are the ground truth and the mAP measures the loss of accuracy
+caused by quantization. The report is printed and saved next to the INT8 model.
+"""
+
+import json
+import logging
+import os
+import re
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+import openvino as ov
+
+MEDIA_DIR = Path(os.getenv("ASSETS_PATH", "../assets/media"))
+VIDEO_EXTENSIONS = {".mp4", ".avi", ".mkv", ".mov", ".webm"}
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp"}
+NUM_CALIBRATION_FRAMES = 300
+NUM_EVALUATION_FRAMES = 100
+NUM_THROUGHPUT_INFERENCES = 200
+REPORT_NAME = "quantization_report.json"
+
+# Model types whose raw output is [1, 4 + classes, anchors], and the end-to-end YOLOv10 output [1, detections, 6]
+ANCHOR_OUTPUT_TYPES = {"YOLOv8", "yolo_v11"}
+END_TO_END_OUTPUT_TYPES = {"yolo_v10"}
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+
+
+def collect_frames(media_dir, num_frames, offset=0.0):
+    """
+    Return up to num_frames BGR frames sampled evenly across the videos and images in media_dir.
+    offset in [0, 1) shifts the sampled video positions, so calls with different offsets return different frames.
+    """
+    media_dir = Path(media_dir)
+    if not media_dir.is_dir():
+        return []
+    files = sorted(path for path in media_dir.iterdir() if path.is_file())
+    videos = [path for path in files if path.suffix.lower() in VIDEO_EXTENSIONS]
+    images = [path for path in files if path.suffix.lower() in IMAGE_EXTENSIONS]
+
+    frames = [frame for frame in (cv2.imread(str(path)) for path in images) if frame is not None]
+    frames_per_video = max(1, (num_frames - len(frames)) // len(videos)) if videos else 0
+    for video in videos:
+        cap = cv2.VideoCapture(str(video))
+        try:
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            num_samples = min(frames_per_video, max(frame_count, 0))
+            for i in range(num_samples):
+                cap.set(cv2.CAP_PROP_POS_FRAMES, int((i + offset) * frame_count / num_samples))
+                ret, frame = cap.read()
+                if ret:
+                    frames.append(frame)
+        finally:
+            cap.release()
+    return frames[:num_frames]
+
+
+def get_input_size(ov_model):
+    """
+    Return the (height, width) of the model input, 640x640 for dynamic models.
+    """
+    partial_shape = ov_model.input(0).get_partial_shape()
+    return tuple(partial_shape.to_shape())[2:] if partial_shape.is_static else (640, 640)
+
+
+def preprocess(frame, input_size):
+    """
+    Letterbox a BGR frame into a 1x3xHxW RGB float input in [0, 1], the same input the worker feeds the model.
+    """
+    height, width = input_size
+    r = min(height / frame.shape[0], width / frame.shape[1])
+    new_width, new_height = int(round(frame.shape[1] * r)), int(round(frame.shape[0] * r))
+    dw, dh = (width - new_width) / 2, (height - new_height) / 2
+    top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+    left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+    image = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    image = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+    image = image[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+    return np.ascontiguousarray(image[None])
+
+
+def get_ignored_scope(ov_model):
+    """
+    Keep the box decoding of the detection head, the last module of the model, in floating point.
+    """
+    import nncf
+
+    module_indices = [
+        int(match.group(1))
+        for op in ov_model.get_ops()
+        for match in [re.search(r"model\.(\d+)", op.get_friendly_name())]
+        if match
+    ]
+    if not module_indices:
+        return nncf.IgnoredScope(types=["Sigmoid"])
+    head = rf"model\.{max(module_indices)}"
+    return nncf.IgnoredScope(
+        patterns=[rf".*{head}/.*/Add", rf".*{head}/.*/Sub.*", rf".*{head}/.*/Mul.*", rf".*{head}/.*/Div.*", rf".*{head}\.dfl.*"],
+        types=["Sigmoid"],
+        validate=False,
+    )
+
+
+def get_detections(output, model_type, conf_thres, iou_thres=0.7, max_det=300):
+    """
+    Return the detections of one raw model output as an (n, 6) array of [x1, y1, x2, y2, score, label]
+    in model input coordinates, or None for model types whose output is not plain boxes.
+    """
+    if model_type in END_TO_END_OUTPUT_TYPES:
+        detections = output[0]
+        return detections[detections[:, 4] >= conf_thres]
+    if model_type not in ANCHOR_OUTPUT_TYPES:
+        return None
+
+    prediction = output[0].T
+    scores = prediction[:, 4:].max(axis=1)
+    labels = prediction[:, 4:].argmax(axis=1)
+    keep = np.flatnonzero(scores >= conf_thres)
+    keep = keep[np.argsort(-scores[keep])][:30000]
+    if len(keep) == 0:
+        return np.zeros((0, 6), dtype=np.float32)
+    xywh = prediction[keep, :4]
+    boxes = np.concatenate([xywh[:, :2] - xywh[:, 2:] / 2, xywh[:, :2] + xywh[:, 2:] / 2], axis=1)
+    indices = cv2.dnn.NMSBoxesBatched(
+        np.concatenate([boxes[:, :2], xywh[:, 2:]], axis=1).tolist(),
+        scores[keep].tolist(),
+        labels[keep].tolist(),
+        conf_thres,
+        iou_thres,
+    )
+    indices = np.asarray(indices, dtype=np.int64).reshape(-1)[:max_det]
+    return np.concatenate(
+        [boxes[indices], scores[keep][indices, None], labels[keep][indices, None].astype(np.float32)], axis=1
+    )
+
+
+def box_iou(a, b):
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:4], b[None, :, 2:4])
+    intersection = np.clip(rb - lt, 0, None).prod(axis=2)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return intersection / (area_a[:, None] + area_b[None, :] - intersection + 1e-9)
+
+
+def match_detections(detections, references):
+    """
+    Return an (n, 10) bool array telling which detections match a reference box of the same label at each IoU
+    threshold from 0.5 to 0.95, every reference box is matched at most once.
+    """
+    correct = np.zeros((len(detections), len(IOU_THRESHOLDS)), dtype=bool)
+    if len(detections) == 0 or len(references) == 0:
+        return correct
+    iou = box_iou(references[:, :4], detections[:, :4]) * (references[:, None, 5] == detections[None, :, 5])
+    for i, threshold in enumerate(IOU_THRESHOLDS):
+        matches = np.argwhere(iou >= threshold)
+        if len(matches) == 0:
+            continue
+        matches = matches[np.argsort(-iou[matches[:, 0], matches[:, 1]])]
+        matches = matches[np.unique(matches[:, 1], return_index=True)[1]]
+        matches = matches[np.unique(matches[:, 0], return_index=True)[1]]
+        correct[matches[:, 1], i] = True
+    return correct
+
+
+def mean_average_precision(all_detections, all_references):
+    """
+    Return the COCO-style mAP50 and mAP50-95 of detections against reference boxes, one array of each per frame.
+    """
+    correct = np.concatenate([match_detections(d, r) for d, r in zip(all_detections, all_references)])
+    scores = np.concatenate([d[:, 4] for d in all_detections])
+    labels = np.concatenate([d[:, 5] for d in all_detections])
+    reference_labels = np.concatenate([r[:, 5] for r in all_references])
+    if len(reference_labels) == 0:
+        return 1.0 if len(scores) == 0 else 0.0, 1.0 if len(scores) == 0 else 0.0
+
+    recall_points = np.linspace(0, 1, 101)
+    average_precisions = []
+    for label in np.unique(reference_labels):
+        if not np.any(labels == label):
+            average_precisions.append(np.zeros(len(IOU_THRESHOLDS)))
+            continue
+        order = np.argsort(-scores[labels == label], kind="stable")
+        true_positives = np.cumsum(correct[labels == label][order], axis=0)
+        false_positives = np.cumsum(~correct[labels == label][order], axis=0)
+        recall = true_positives / np.count_nonzero(reference_labels == label)
+        precision = true_positives / np.maximum(true_positives + false_positives, 1)
+        ap = []
+        for i in range(len(IOU_THRESHOLDS)):
+            # Precision envelope sampled at 101 recall points
+            envelope = np.maximum.accumulate(np.concatenate([[1.0], precision[:, i], [0.0]])[::-1])[::-1]
+            positions = np.searchsorted(np.concatenate([[0.0], recall[:, i], [1.0]]), recall_points, side="left")
+            ap.append(envelope[np.minimum(positions, len(envelope) - 1)].mean())
+        average_precisions.append(ap)
+    average_precisions = np.array(average_precisions)
+    return float(average_precisions[:, 0].mean()), float(average_precisions.mean())
+
+
+def benchmark_model(core, model_path, device, inputs):
+    """
+    Return the throughput in FPS, the median latency in ms and the raw outputs of a model on the inputs.
+    """
+    compiled_model = core.compile_model(str(model_path), device, {"PERFORMANCE_HINT": "LATENCY"})
+    request = compiled_model.create_infer_request()
+    request.infer(inputs[0])
+    outputs, latencies = [], []
+    for input_tensor in inputs:
+        start_time = time.perf_counter()
+        request.infer(input_tensor)
+        latencies.append(time.perf_counter() - start_time)
+        outputs.append(request.get_output_tensor(0).data.copy())
+    del request, compiled_model
+
+    compiled_model = core.compile_model(str(model_path), device, {"PERFORMANCE_HINT": "THROUGHPUT"})
+    infer_queue = ov.AsyncInferQueue(compiled_model)
+    num_inferences = max(NUM_THROUGHPUT_INFERENCES, len(infer_queue))
+    for i in range(len(infer_queue)):
+        infer_queue.start_async(inputs[i % len(inputs)])
+    infer_queue.wait_all()
+    start_time = time.perf_counter()
+    for i in range(num_inferences):
+        infer_queue.start_async(inputs[i % len(inputs)])
+    infer_queue.wait_all()
+    fps = num_inferences / (time.perf_counter() - start_time)
+    return fps, float(np.median(latencies)) * 1000, outputs
+
+
+def compare_precisions(model_paths, model_type, device, media_dir):
+    """
+    Benchmark the FP16 and INT8 models on frames not used for calibration and return the report.
+    """
+    core = ov.Core()
+    input_size = get_input_size(core.read_model(str(model_paths["FP16"])))
+    frames = collect_frames(media_dir, NUM_EVALUATION_FRAMES, offset=0.5)
+    inputs = [preprocess(frame, input_size) for frame in frames]
+
+    report = {"device": device, "num_frames": len(inputs), "precisions": {}}
+    outputs = {}
+    for precision, model_path in model_paths.items():
+        fps, latency, outputs[precision] = benchmark_model(core, model_path, device, inputs)
+        report["precisions"][precision] = {"fps": round(fps, 1), "latency_ms": round(latency, 2)}
+
+    references = [get_detections(output, model_type, conf_thres=0.25) for output in outputs["FP16"]]
+    if references and references[0] is not None:
+        detections = [get_detections(output, model_type, conf_thres=0.001) for output in outputs["INT8"]]
+        map50, map50_95 = mean_average_precision(detections, references)
+        report["precisions"]["INT8"]["map50_vs_fp16"] = round(map50, 4)
+        report["precisions"]["INT8"]["map50_95_vs_fp16"] = round(map50_95, 4)
+    return report
+
+
+def print_report(model_name, report):
+    fp16, int8 = report["precisions"]["FP16"], report["precisions"]["INT8"]
+    print(f"\n{model_name} INT8 vs FP16 on {report['device']}, {report['num_frames']} frames")
+    print(f"{'':<14}{'FP16':>10}{'INT8':>10}{'change':>10}")
+    print(f"{'FPS':<14}{fp16['fps']:>10.1f}{int8['fps']:>10.1f}{int8['fps'] / fp16['fps']:>9.2f}x")
+    print(
+        f"{'Latency (ms)':<14}{fp16['latency_ms']:>10.2f}{int8['latency_ms']:>10.2f}"
+        f"{int8['latency_ms'] / fp16['latency_ms']:>9.2f}x"
+    )
+    if "map50_vs_fp16" in int8:
+        for name, key in (("mAP50", "map50_vs_fp16"), ("mAP50-95", "map50_95_vs_fp16")):
+            print(f"{name:<14}{1.0:>10.4f}{int8[key]:>10.4f}{int8[key] - 1.0:>+10.4f}")
+        print("mAP is measured against the FP16 detections\n")
+    else:
+        print("mAP is only measured for detection models\n")
+
+
+def quantize_yolo_model(model_name, model_type, model_path_fp32, model_path_fp16, model_path_int8, device="CPU", media_dir=MEDIA_DIR):
+    """
+    Quantize the FP32 IR of a YOLO model to INT8 and report its speed-up and accuracy against FP16 on device.
+    Returns False when there is no media to calibrate on.
+    """
+    import nncf
+
+    frames = collect_frames(media_dir, NUM_CALIBRATION_FRAMES)
+    if not frames:
+        logging.error(f"No videos or images found in {media_dir} to calibrate the INT8 model on")
+        return False
+
+    core = ov.Core()
+    ov_model = core.read_model(str(model_path_fp32))
+    input_size = get_input_size(ov_model)
+    logging.info(f"Quantizing {model_name} to INT8 with {len(frames)} calibration frames from {media_dir}")
+    start_time = time.perf_counter()
+    quantized_model = nncf.quantize(
+        ov_model,
+        nncf.Dataset(frames, lambda frame: preprocess(frame, input_size)),
+        preset=nncf.QuantizationPreset.MIXED,
+        subset_size=len(frames),
+        ignored_scope=get_ignored_scope(ov_model),
+    )
+    quantized_model.set_rt_info(model_type, ["model_info", "model_type"])
+    Path(model_path_int8).parent.mkdir(parents=True, exist_ok=True)
+    ov.save_model(quantized_model, str(model_path_int8), compress_to_fp16=False)
+    logging.info(f"Model saved: {model_path_int8}, quantization took {time.perf_counter() - start_time:.1f} s")
+
+    try:
+        report = compare_precisions({"FP16": model_path_fp16, "INT8": model_path_int8}, model_type, device, media_dir)
+    except Exception as e:
+        logging.warning(f"Could not compare the INT8 and FP16 models on {device}: {e}")
+        return True
+    print_report(model_name, report)
+    with open(Path(model_path_int8).parent / REPORT_NAME, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return True
@@ -0,0 +1,447 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Load generator for the text-generation worker.
+
+Sends requests to /infer (or /infer/stream) with Poisson arrivals at a given rate, at most concurrency of them in
+flight, and prompt and output lengths drawn uniformly around a mean. Records TTFT, TPOT and end-to-end latency of
+every request and reports p50/p90/p99, throughput, error rate and goodput, the rate of requests meeting the latency
+SLO. With --mock the requests go to an in-process simulated pipeline instead, so the harness runs without a model.
+
+Usage:
+    python benchmark_load.py --url http://127.0.0.1:5997 --num-requests 200 --request-rate 4 --concurrency 16
+    python benchmark_load.py --mock --num-requests 50 --slo-ttft 0.5 --slo-tpot 0.05
+
+Python API:
+    report = asyncio.run(run_benchmark(HttpBackend(url), num_requests=100, request_rate=2.0, concurrency=8))
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+)
+
+# Prompts are built from these words, English text is close to one token per word
+PROMPT_WORDS = (
+    "the edge device runs a model on camera streams and reports latency throughput memory and power for each "
+    "configuration so that the user can choose hardware which meets the service level of the application"
+).split()
+
+PERCENTILES = (50, 90, 99)
+
+
+def make_prompt(num_words, rng):
+    words = rng.choice(PROMPT_WORDS, size=max(num_words, 1))
+    return "Summarize the following text: " + " ".join(words)
+
+
+def sample_lengths(rng, mean, range_ratio, count):
+    """
+    Draw count lengths uniformly from [mean * (1 - range_ratio), mean * (1 + range_ratio)].
+    """
+    low = max(int(mean * (1 - range_ratio)), 1)
+    high = max(int(mean * (1 + range_ratio)), low)
+    return rng.integers(low, high + 1, size=count)
+
+
+def sample_arrival_times(rng, request_rate, count):
+    """
+    Return the send offsets in seconds of a Poisson process with request_rate requests/s, all 0 for an infinite rate.
+    """
+    if math.isinf(request_rate):
+        return np.zeros(count)
+    return np.cumsum(rng.exponential(1.0 / request_rate, size=count))
+
+
+class HttpBackend:
+    """
+    Send requests to a running text-generation worker. With stream=True /infer/stream is used and TTFT is measured
+    on the client when the first chunk arrives. Otherwise TTFT is derived from /infer as the end-to-end latency minus
+    the server-side decode time, so it includes the time the request waited for the pipeline, and TPOT is the
+    server-side value. TTFT and end-to-end latency count from the scheduled send time, so they include the time
+    the request waited for a concurrency slot or a client thread.
+    """
+
+    def __init__(self, url, stream=False, timeout=600.0, max_workers=64):
+        self.url = url.rstrip("/")
+        self.stream = stream
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    async def send(self, prompt, max_tokens, send_time):
+        loop = asyncio.get_running_loop()
+        send = self.__send_stream if self.stream else self.__send
+        return await loop.run_in_executor(self.executor, send, prompt, max_tokens, send_time)
+
+    def __send(self, prompt, max_tokens, send_time):
+        start_time = send_time
+        response = requests.post(
+            f"{self.url}/infer", json={"prompt": prompt, "max_tokens": max_tokens}, timeout=self.timeout
+        )
+        e2e = time.perf_counter() - start_time
+        response.raise_for_status()
+        data = response.json()
+        if data.get("status") is False:
+            raise RuntimeError(data.get("message", "request failed"))
+        decode_time = max(data["generation_time_s"] - data["time_to_token_s"], 0.0)
+        return {
+            "ttft_s": max(e2e - decode_time, 0.0),
+            "tpot_s": data.get("time_per_output_token_s"),
+            "e2e_s": e2e,
+            "output_tokens": data.get("num_tokens"),
+        }
+
+    def __send_stream(self, prompt, max_tokens, send_time):
+        start_time = send_time
+        first_chunk_time = None
+        summary = None
+        with requests.post(
+            f"{self.url}/infer/stream",
+            json={"prompt": prompt, "max_tokens": max_tokens},
+            stream=True,
+            timeout=self.timeout,
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line.startswith(b"data: "):
+                    continue
+                event = json.loads(line[len(b"data: "):])
+                if event.get("done"):
+                    summary = event
+                elif first_chunk_time is None:
+                    first_chunk_time = time.perf_counter()
+        e2e = time.perf_counter() - start_time
+        if summary is None or summary.get("status") is False:
+            raise RuntimeError(summary.get("message", "request failed") if summary else "stream ended early")
+        num_tokens = summary["num_tokens"]
+        ttft = (first_chunk_time or time.perf_counter()) - start_time
+        return {
+            "ttft_s": ttft,
+            "tpot_s": (e2e - ttft) / (num_tokens - 1) if num_tokens > 1 else None,
+            "e2e_s": e2e,
+            "output_tokens": num_tokens,
+        }
+
+
+class MockBackend:
+    """
+    Simulated pipeline for running the harness without a model, e.g. in CI. Prefill takes prefill_s_per_token per
+    prompt word plus ttft_s, every output token takes tpot_s, slowed down by contention for each other request in
+    flight, and error_rate of the requests fail. Like with the worker, TTFT and end-to-end latency count from the
+    scheduled send time, so they include the time the request waited for a concurrency slot.
+    """
+
+    def __init__(self, ttft_s=0.05, tpot_s=0.01, prefill_s_per_token=0.0002, contention=0.1, error_rate=0.0, seed=0):
+        self.ttft_s = ttft_s
+        self.tpot_s = tpot_s
+        self.prefill_s_per_token = prefill_s_per_token
+        self.contention = contention
+        self.error_rate = error_rate
+        self.rng = np.random.default_rng(seed)
+        self.in_flight = 0
+
+    async def send(self, prompt, max_tokens, send_time):
+        self.in_flight += 1
+        try:
+            start_time = send_time
+            slowdown = 1 + self.contention * (self.in_flight - 1)
+            await asyncio.sleep((self.ttft_s + self.prefill_s_per_token * len(prompt.split())) * slowdown)
+            ttft = time.perf_counter() - start_time
+            if self.rng.random() < self.error_rate:
+                raise RuntimeError("simulated failure")
+            await asyncio.sleep(self.tpot_s * slowdown * (max_tokens - 1))
+            e2e = time.perf_counter() - start_time
+            return {
+                "ttft_s": ttft,
+                "tpot_s": (e2e - ttft) / (max_tokens - 1) if max_tokens > 1 else None,
+                "e2e_s": e2e,
+                "output_tokens": max_tokens,
+            }
+        finally:
+            self.in_flight -= 1
+
+
+def summarize(values):
+    values = [value for value in values if value is not None]
+    if not values:
+        return None
+    summary = {"mean": float(np.mean(values))}
+    for percentile in PERCENTILES:
+        summary[f"p{percentile}"] = float(np.percentile(values, percentile))
+    return summary
+
+
+def meets_slo(result, slo_ttft=None, slo_tpot=None, slo_e2e=None):
+    if result.get("error"):
+        return False
+    if slo_ttft is not None and result["ttft_s"] > slo_ttft:
+        return False
+    if slo_tpot is not None and result["tpot_s"] is not None and result["tpot_s"] > slo_tpot:
+        return False
+    if slo_e2e is not None and result["e2e_s"] > slo_e2e:
+        return False
+    return True
+
+
+def build_report(results, duration, slo_ttft=None, slo_tpot=None, slo_e2e=None):
+    """
+    Aggregate the per-request results into latency percentiles, throughput, error rate and goodput.
+    """
+    completed = [result for result in results if not result.get("error")]
+    output_tokens = sum(result["output_tokens"] or 0 for result in completed)
+    good = sum(meets_slo(result, slo_ttft, slo_tpot, slo_e2e) for result in results)
+    return {
+        "num_requests": len(results),
+        "completed": len(completed),
+        "errors": len(results) - len(completed),
+        "error_rate": (len(results) - len(completed)) / len(results) if results else 0.0,
+        "duration_s": duration,
+        "request_throughput": len(completed) / duration if duration > 0 else 0.0,
+        "output_token_throughput": output_tokens / duration if duration > 0 else 0.0,
+        "ttft_s": summarize([result["ttft_s"] for result in completed]),
+        "tpot_s": summarize([result["tpot_s"] for result in completed]),
+        "e2e_s": summarize([result["e2e_s"] for result in completed]),
+        "queue_time_s": summarize([result["queue_time_s"] for result in results]),
+        "slo": {"ttft_s": slo_ttft, "tpot_s": slo_tpot, "e2e_s": slo_e2e},
+        "slo_attainment": good / len(results) if results else 0.0,
+        "goodput": good / duration if duration > 0 else 0.0,
+    }
+
+
+async def run_benchmark(
+    backend,
+    num_requests=100,
+    request_rate=math.inf,
+    concurrency=8,
+    input_len=128,
+    input_len_range=0.0,
+    output_len=128,
+    output_len_range=0.0,
+    slo_ttft=None,
+    slo_tpot=None,
+    slo_e2e=None,
+    seed=0,
+):
+    """
+    Drive backend with num_requests requests and return the report.
+
+    Args:
+        backend: HttpBackend or MockBackend, anything with an async send(prompt, max_tokens, send_time).
+        num_requests (int): Number of requests to send.
+        request_rate (float): Mean arrival rate in requests/s of the Poisson process, inf sends all at once.
+        concurrency (int): Maximum number of requests in flight, later arrivals wait for a free slot.
+        input_len (int): Mean prompt length in words.
+        input_len_range (float): Prompt lengths are uniform in input_len * (1 +- input_len_range).
+        output_len (int): Mean max_tokens of a request.
+        output_len_range (float): max_tokens are uniform in output_len * (1 +- output_len_range).
+        slo_ttft (float): TTFT SLO in seconds for goodput, not checked when None.
+        slo_tpot (float): TPOT SLO in seconds for goodput, not checked when None.
+        slo_e2e (float): End-to-end latency SLO in seconds for goodput, not checked when None.
+        seed (int): Seed of the arrival times and lengths.
+
+    Returns:
+        dict: The report with the per-request results under "requests".
+    """
+    rng = np.random.default_rng(seed)
+    arrival_times = sample_arrival_times(rng, request_rate, num_requests)
+    input_lens = sample_lengths(rng, input_len, input_len_range, num_requests)
+    output_lens = sample_lengths(rng, output_len, output_len_range, num_requests)
+    prompts = [make_prompt(int(length), rng) for length in input_lens]
+    semaphore = asyncio.Semaphore(concurrency)
+    start_time = time.perf_counter()
+
+    async def send(index):
+        # Latencies of both backends count from the scheduled send time
+        send_time = start_time + arrival_times[index]
+        await asyncio.sleep(max(send_time - time.perf_counter(), 0))
+        arrival = time.perf_counter()
+        async with semaphore:
+            result = {
+                "input_len": int(input_lens[index]),
+                "max_tokens": int(output_lens[index]),
+                "queue_time_s": time.perf_counter() - arrival,
+            }
+            try:
+                result.update(await backend.send(prompts[index], int(output_lens[index]), send_time))
+            except Exception as e:
+                result["error"] = str(e)
+            return result
+
+    results = await asyncio.gather(*(send(index) for index in range(num_requests)))
+    duration = time.perf_counter() - start_time
+
+    errors = [result["error"] for result in results if result.get("error")]
+    if errors:
+        logging.warning(f"{len(errors)} requests failed, first error: {errors[0]}")
+    report = build_report(results, duration, slo_ttft, slo_tpot, slo_e2e)
+    report["config"] = {
+        "num_requests": num_requests,
+        "request_rate": None if math.isinf(request_rate) else request_rate,
+        "concurrency": concurrency,
+        "input_len": input_len,
+        "input_len_range": input_len_range,
+        "output_len": output_len,
+        "output_len_range": output_len_range,
+        "seed": seed,
+    }
+    report["requests"] = results
+    return report
+
+
+def print_report(report):
+    print(
+        f"requests {report['completed']}/{report['num_requests']} completed, error rate {report['error_rate']:.1%}, "
+        f"{report['duration_s']:.1f} s"
+    )
+    print(
+        f"throughput {report['request_throughput']:.2f} req/s, {report['output_token_throughput']:.1f} tok/s, "
+        f"goodput {report['goodput']:.2f} req/s ({report['slo_attainment']:.1%} within SLO)"
+    )
+    print(f"{'metric':>10} {'mean ms':>10}" + "".join(f" {f'p{p} ms':>10}" for p in PERCENTILES))
+    for name in ("ttft_s", "tpot_s", "e2e_s", "queue_time_s"):
+        summary = report[name]
+        if summary is None:
+            continue
+        row = f"{name[:-2]:>10} {summary['mean'] * 1000:>10.1f}"
+        row += "".join(f" {summary[f'p{p}'] * 1000:>10.1f}" for p in PERCENTILES)
+        print(row)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Load generator for the text-generation worker"
+    )
+    parser.add_argument(
+        "--url",
+        type=str,
+        default="http://127.0.0.1:5997",
+        help="Base URL of the text-generation worker (default: http://127.0.0.1:5997)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Use /infer/stream and measure TTFT on the client instead of the server-side TTFT of /infer",
+    )
+    parser.add_argument(
+        "--mock",
+        action="store_true",
+        help="Send the requests to a simulated pipeline instead of a worker, no model needed",
+    )
+    parser.add_argument(
+        "--num-requests",
+        type=int,
+        default=100,
+        help="Number of requests to send (default: 100)",
+    )
+    parser.add_argument(
+        "--request-rate",
+        type=float,
+        default=math.inf,
+        help="Mean Poisson arrival rate in requests/s, inf sends all requests at once (default: inf)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Maximum number of requests in flight (default: 8)",
+    )
+    parser.add_argument(
+        "--input-len",
+        type=int,
+        default=128,
+        help="Mean prompt length in words (default: 128)",
+    )
+    parser.add_argument(
+        "--input-len-range",
+        type=float,
+        default=0.0,
+        help="Prompt lengths are uniform in input-len * (1 +- range) (default: 0.0)",
+    )
+    parser.add_argument(
+        "--output-len",
+        type=int,
+        default=128,
+        help="Mean max_tokens of a request (default: 128)",
+    )
+    parser.add_argument(
+        "--output-len-range",
+        type=float,
+        default=0.0,
+        help="max_tokens are uniform in output-len * (1 +- range) (default: 0.0)",
+    )
+    parser.add_argument(
+        "--slo-ttft",
+        type=float,
+        default=None,
+        help="TTFT SLO in seconds for goodput (default: none)",
+    )
+    parser.add_argument(
+        "--slo-tpot",
+        type=float,
+        default=None,
+        help="TPOT SLO in seconds for goodput (default: none)",
+    )
+    parser.add_argument(
+        "--slo-e2e",
+        type=float,
+        default=None,
+        help="End-to-end latency SLO in seconds for goodput (default: none)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Seed of the arrival times and lengths (default: 0)",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="JSON file for the report with the per-request results (default: none)",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    if args.mock:
+        backend = MockBackend(seed=args.seed)
+    else:
+        backend = HttpBackend(args.url, stream=args.stream, max_workers=args.concurrency)
+    report = asyncio.run(
+        run_benchmark(
+            backend,
+            num_requests=args.num_requests,
+            request_rate=args.request_rate,
+            concurrency=args.concurrency,
+            input_len=args.input_len,
+            input_len_range=args.input_len_range,
+            output_len=args.output_len,
+            output_len_range=args.output_len_range,
+            slo_ttft=args.slo_ttft,
+            slo_tpot=args.slo_tpot,
+            slo_e2e=args.slo_e2e,
+            seed=args.seed,
+        )
+    )
+    print_report(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        logging.info(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Benchmark of the time to first token per chat turn with and without KV cache reuse.
+
+Runs the same multi-turn conversation behind a long system prompt four ways:
+  - LLMPipeline, full history: the templated history is prefilled again on every turn
+  - LLMPipeline, chat session: start_chat keeps the KV cache, only the new message is prefilled
+  - ContinuousBatchingPipeline without prefix caching
+  - ContinuousBatchingPipeline with enable_prefix_caching, the blocks of the shared prefix are reused
+Both LLMPipeline modes use the stateful SDPA backend, the default paged attention backend on CPU already caches
+prefixes. Decoding is greedy, so every mode sees the same conversation.
+
+Usage: python benchmark_prefix_cache.py --model models/OpenVINO/Phi-3-mini-4k-instruct-int4-ov --turns 6
+"""
+
+import argparse
+import logging
+import time
+
+import openvino_genai
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+)
+
+SYSTEM_PROMPT = (
+    "You are a helpful, respectful and honest assistant for edge AI sizing. Always answer as helpfully as possible, "
+    "while being safe. Explain trade-offs between CPU, GPU and NPU devices, model precision, batch size and stream "
+    "count, and give concrete numbers where you can. If a question does not make any sense, explain why instead of "
+    "answering something not correct. If you don't know the answer to a question, please don't share false "
+    "information. "
+)
+
+USER_MESSAGES = [
+    "What limits the number of camera streams on a small edge box?",
+    "How does INT8 quantization change that?",
+    "And what if I move the detector to the GPU?",
+    "Which metrics should I watch while sizing?",
+    "How much memory does a 7B LLM need in INT4?",
+    "Summarize the advice in three bullet points.",
+    "What would you change for an NPU?",
+    "Thanks, anything else to keep in mind?",
+]
+
+
+class FirstTokenTimer(openvino_genai.StreamerBase):
+    """
+    Streamer that records when the first token is generated.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.start_time = time.perf_counter()
+        self.first_token_time = None
+
+    def write(self, token):
+        if self.first_token_time is None:
+            self.first_token_time = time.perf_counter()
+        return openvino_genai.StreamingStatus.RUNNING
+
+    def end(self):
+        pass
+
+    def get_ttft(self):
+        return (self.first_token_time - self.start_time) * 1000
+
+
+def make_generation_config(max_new_tokens):
+    config = openvino_genai.GenerationConfig()
+    config.max_new_tokens = max_new_tokens
+    # The prompts are already templated, except in the chat session where the pipeline applies the template itself
+    config.apply_chat_template = False
+    return config
+
+
+def run_full_history(model, device, system_prompt, turns, max_new_tokens):
+    pipe = openvino_genai.LLMPipeline(model, device, ATTENTION_BACKEND="SDPA")
+    tokenizer = pipe.get_tokenizer()
+    config = make_generation_config(max_new_tokens)
+    history = [{"role": "system", "content": system_prompt}]
+    ttft = []
+    for message in USER_MESSAGES[:turns]:
+        history.append({"role": "user", "content": message})
+        prompt = tokenizer.apply_chat_template(history, add_generation_prompt=True)
+        timer = FirstTokenTimer()
+        text = pipe.generate(prompt, config, timer)
+        ttft.append(timer.get_ttft())
+        history.append({"role": "assistant", "content": str(text)})
+    return ttft
+
+
+def run_chat_session(model, device, system_prompt, turns, max_new_tokens):
+    pipe = openvino_genai.LLMPipeline(model, device, ATTENTION_BACKEND="SDPA")
+    config = make_generation_config(max_new_tokens)
+    config.apply_chat_template = True
+    ttft = []
+    pipe.start_chat(system_prompt)
+    for message in USER_MESSAGES[:turns]:
+        timer = FirstTokenTimer()
+        pipe.generate(message, config, timer)
+        ttft.append(timer.get_ttft())
+    pipe.finish_chat()
+    return ttft
+
+
+def run_continuous_batching(model, device, system_prompt, turns, max_new_tokens, cache_size, enable_prefix_caching):
+    scheduler_config = openvino_genai.SchedulerConfig()
+    scheduler_config.cache_size = cache_size
+    scheduler_config.enable_prefix_caching = enable_prefix_caching
+    pipe = openvino_genai.ContinuousBatchingPipeline(model, scheduler_config, device)
+    tokenizer = pipe.get_tokenizer()
+    config = make_generation_config(max_new_tokens)
+    history = [{"role": "system", "content": system_prompt}]
+    ttft = []
+    for message in USER_MESSAGES[:turns]:
+        history.append({"role": "user", "content": message})
+        prompt = tokenizer.apply_chat_template(history, add_generation_prompt=True)
+        timer = FirstTokenTimer()
+        result = pipe.generate([prompt], [config], timer)[0]
+        ttft.append(timer.get_ttft())
+        # Results of string prompts hold the decoded texts
+        history.append({"role": "assistant", "content": result.m_generation_ids[0]})
+    return ttft
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the per-turn TTFT of a chat with and without KV cache reuse"
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        required=True,
+        help="Directory of the OpenVINO model with its tokenizer",
+    )
+    parser.add_argument(
+        "--device",
+        type=str,
+        default="CPU",
+        help="Device to run the model on (default: CPU)",
+    )
+    parser.add_argument(
+        "--turns",
+        type=int,
+        default=6,
+        choices=range(1, len(USER_MESSAGES) + 1),
+        metavar=f"[1-{len(USER_MESSAGES)}]",
+        help="Number of chat turns (default: 6)",
+    )
+    parser.add_argument(
+        "--system-prompt-repeat",
+        type=int,
+        default=8,
+        help="Number of times the system prompt text is repeated to make a long shared prefix (default: 8)",
+    )
+    parser.add_argument(
+        "--max-new-tokens",
+        type=int,
+        default=32,
+        help="Number of tokens generated per turn (default: 32)",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=2,
+        help="KV cache size in GB for continuous batching (default: 2)",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    system_prompt = SYSTEM_PROMPT * args.system_prompt_repeat
+    common = (args.model, args.device, system_prompt, args.turns, args.max_new_tokens)
+
+    results = {}
+    logging.info("Running LLMPipeline with the full history on every turn")
+    results["llm full history"] = run_full_history(*common)
+    logging.info("Running LLMPipeline with a chat session")
+    results["llm chat session"] = run_chat_session(*common)
+    logging.info("Running ContinuousBatchingPipeline without prefix caching")
+    results["cb no prefix cache"] = run_continuous_batching(*common, args.cache_size, False)
+    logging.info("Running ContinuousBatchingPipeline with prefix caching")
+    results["cb prefix cache"] = run_continuous_batching(*common, args.cache_size, True)
+
+    print(f"{'turn':>4} " + " ".join(f"{name + ' ms':>22}" for name in results))
+    for turn in range(args.turns):
+        print(f"{turn + 1:>4} " + " ".join(f"{ttft[turn]:>22.1f}" for ttft in results.values()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Cache of optimum-cli exports.
+
+Every export lives in models/<model id>-<key>, where the key hashes the model id, the export arguments and the
+installed optimum versions, so changing a flag like the weight format or upgrading optimum exports again instead of
+reusing a stale model. The export is written to a temporary directory that is renamed into place only after
+optimum-cli succeeded, so an interrupted export never leaves a half-written model behind. A manifest in the export
+directory records how it was made.
+
+Exports made before the cache existed live in models/<model id> without a key. So that existing installs do not
+export every model again, one is reused while no keyed export of the model exists, but only when the worker asks for
+the arguments the pre-cache code exported with and every file the worker loads is in place. Anything else, a
+different weight format or an export that was interrupted half-way, is exported again under its key.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from importlib import metadata
+
+MANIFEST_NAME = "export_manifest.json"
+TEMP_SUFFIX = ".tmp-"
+# Temporary directories untouched for this long belong to exports that were interrupted
+STALE_TEMP_DIR_AGE_S = 6 * 3600
+
+
+def get_optimum_versions():
+    versions = {}
+    for package in ("optimum", "optimum-intel", "openvino", "nncf"):
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return versions
+
+
+def normalize_args(additional_args):
+    return {arg: None if value is None else str(value) for arg, value in (additional_args or {}).items()}
+
+
+def get_export_key(model_id, additional_args=None, versions=None):
+    """
+    Return the cache key of exporting model_id with additional_args using the given package versions.
+    """
+    description = {
+        "model_id": model_id,
+        "args": normalize_args(additional_args),
+        "versions": versions if versions is not None else get_optimum_versions(),
+    }
+    return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def read_manifest(export_dir):
+    try:
+        with open(os.path.join(export_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def remove_stale_temp_dirs(export_dir):
+    parent, name = os.path.split(export_dir)
+    if not os.path.isdir(parent):
+        return
+    for entry in os.listdir(parent):
+        path = os.path.join(parent, entry)
+        if entry.startswith(name + TEMP_SUFFIX) and time.time() - os.path.getmtime(path) > STALE_TEMP_DIR_AGE_S:
+            logging.info(f"Removing the interrupted export {path}")
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def find_legacy_export(models_dir, model_id, required_files):
+    """
+    Return models/<model id> when it holds a complete export made before the cache existed, None otherwise.
+    The export is complete when every path of required_files, relative to it, exists and every .xml has its .bin.
+    """
+    legacy_dir = os.path.join(models_dir, model_id)
+    if not os.path.isdir(legacy_dir) or read_manifest(legacy_dir) is not None:
+        return None
+    missing = {name for name in required_files if not os.path.isfile(os.path.join(legacy_dir, name))}
+    for root, _, names in os.walk(legacy_dir):
+        for name in names:
+            if name.endswith(".xml") and os.path.splitext(name)[0] + ".bin" not in names:
+                missing.add(os.path.relpath(os.path.join(root, name[:-4] + ".bin"), legacy_dir))
+    if missing:
+        logging.warning(f"Not reusing the export {legacy_dir}, it is incomplete: {', '.join(sorted(missing))} missing")
+        return None
+    return legacy_dir
+
+
+def get_exported_model(model_id, models_dir, export, additional_args=None, legacy_args=None, legacy_files=None):
+    """
+    Return the directory of model_id exported with additional_args, calling export(model_id, output_dir,
+    additional_args) only when this configuration was never exported before.
+
+    legacy_args are the arguments the worker exported with before exports were cached and legacy_files the files it
+    loads from an export. An unkeyed export in models/<model id> is reused only when additional_args equal
+    legacy_args and it holds all of legacy_files, never when legacy_files is None.
+    """
+    versions = get_optimum_versions()
+    key = get_export_key(model_id, additional_args, versions)
+    export_dir = os.path.join(models_dir, f"{model_id}-{key}")
+
+    manifest = read_manifest(export_dir)
+    if manifest is not None:
+        logging.info(f"Using the cached export {export_dir} from {time.ctime(manifest['created'])}")
+        return export_dir
+
+    legacy_dir = None
+    if legacy_files is not None and normalize_args(additional_args) == normalize_args(legacy_args):
+        legacy_dir = find_legacy_export(models_dir, model_id, legacy_files)
+    if legacy_dir is not None and not os.path.exists(export_dir):
+        logging.info(
+            f"Using the export {legacy_dir} made before exports were cached, the optimum versions it was made with "
+            f"are unknown. Remove it to export {model_id} again."
+        )
+        return legacy_dir
+
+    if os.path.exists(export_dir):
+        logging.warning(f"{export_dir} has no export manifest, exporting it again")
+        shutil.rmtree(export_dir)
+    remove_stale_temp_dirs(export_dir)
+    temp_dir = f"{export_dir}{TEMP_SUFFIX}{os.getpid()}"
+    shutil.rmtree(temp_dir, ignore_errors=True)
+    os.makedirs(os.path.dirname(temp_dir), exist_ok=True)
+    logging.info(f"Exporting {model_id} to {export_dir}, this can take several minutes...")
+    start_time = time.perf_counter()
+    try:
+        export(model_id, temp_dir, additional_args)
+        manifest = {
+            "model_id": model_id,
+            "args": additional_args or {},
+            "versions": versions,
+            "export_time_s": round(time.perf_counter() - start_time, 1),
+            "created": time.time(),
+        }
+        with open(os.path.join(temp_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        try:
+            os.rename(temp_dir, export_dir)
+        except OSError:
+            # Another worker finished the same export first
+            if read_manifest(export_dir) is None:
+                raise
+            logging.info(f"{export_dir} was exported concurrently, discarding this export")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    logging.info(f"Exported {model_id} in {manifest['export_time_s']} s")
+    return export_dir
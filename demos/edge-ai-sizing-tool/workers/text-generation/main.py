@@ -3,13 +3,20 @@
 
 import os
 import sys
+import time
+import asyncio
 import subprocess
 import platform
-from typing import Dict
+import json
+import threading
+import collections
+from typing import Dict, Optional
 import logging
+import numpy as np
 import openvino_genai
 from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 import argparse
 from pydantic import BaseModel
 import uvicorn
@@ -19,6 +26,9 @@ import huggingface_hub as hf_hub
 import urllib.parse
 import zipfile
 from huggingface_hub import whoami
+from model_cache import CompiledModelCache
+from export_cache import get_exported_model
+from model_pool import ModelPool, get_model_size
 
 # from optimum.intel import OVModelForCausalLM, OVWeightQuantizationConfig
 # from transformers import AutoTokenizer
@@ -59,9 +69,7 @@ def optimum_cli(model_id, output_dir, additional_args: Dict[str, str] = None):
             env=env,
         )
     except Exception as e:
-        logging.error(f"optimum-cli failed: {e}")
-        update_payload_status(args.id, status="failed")
-        sys.exit(1)
+        raise RuntimeError(f"optimum-cli failed: {e}") from e
         
 # def optimum_cli(model_id, output_dir, additional_args: Dict[str, str] = None):
    
@@ -157,6 +165,60 @@ parser.add_argument(
 parser.add_argument(
     "--id", type=int, default=1, help="Workload ID to update the workload status"
 )
+parser.add_argument(
+    "--pipeline-type",
+    type=str,
+    default="llm",
+    choices=["llm", "continuous-batching"],
+    help="llm serves one request at a time, continuous-batching schedules concurrent requests together with paged attention (default: llm)",
+)
+parser.add_argument(
+    "--cache-size",
+    type=int,
+    default=2,
+    help="KV cache size in GB for continuous batching (default: 2)",
+)
+parser.add_argument(
+    "--max-num-batched-tokens",
+    type=int,
+    default=256,
+    help="Maximum number of tokens scheduled in one continuous batching step (default: 256)",
+)
+parser.add_argument(
+    "--max-num-seqs",
+    type=int,
+    default=256,
+    help="Maximum number of sequences scheduled in one continuous batching step (default: 256)",
+)
+parser.add_argument(
+    "--enable-prefix-caching",
+    action="store_true",
+    help="Reuse the KV cache of prompt prefixes shared between requests, e.g. a long system prompt or earlier chat turns, with continuous batching",
+)
+parser.add_argument(
+    "--draft-model-name",
+    type=str,
+    default=None,
+    help="Name or hugging face ID of a small draft model of the same family for speculative decoding, e.g. TinyLlama/TinyLlama-1.1B-Chat-v1.0 (default: none)",
+)
+parser.add_argument(
+    "--draft-device",
+    type=str,
+    default=None,
+    help="Device to run the draft model on (default: same as --device)",
+)
+parser.add_argument(
+    "--num-assistant-tokens",
+    type=int,
+    default=5,
+    help="Number of tokens the draft model proposes per main model step in speculative decoding (default: 5)",
+)
+parser.add_argument(
+    "--model-pool-size-gb",
+    type=float,
+    default=8.0,
+    help="Memory budget in GB of the models kept loaded after switching models through /api/model (default: 8)",
+)
 
 args = parser.parse_args()
 
@@ -164,62 +226,401 @@ args = parser.parse_args()
 models_dir = "models"
 custom_models_dir = "../custom_models/text-generation"
 os.makedirs(models_dir, exist_ok=True)
+# Exports made in models/<model id> before exports were cached used these arguments
+LEGACY_EXPORT_ARGS = {
+    "weight-format": "int4",
+    "sym": None,
+    "ratio": 1.0,
+    "group-size": -1,
+}
+LEGACY_EXPORT_FILES = (
+    "openvino_model.xml",
+    "openvino_model.bin",
+    "openvino_tokenizer.xml",
+    "openvino_tokenizer.bin",
+    "openvino_detokenizer.xml",
+    "openvino_detokenizer.bin",
+)
 
-# handle custom model in zip format
-if args.model_name.endswith(".zip"):
-    model_zipfile_name = os.path.splitext(os.path.basename(args.model_name))[0]
-    model = os.path.join(models_dir, model_zipfile_name)
-    if not os.path.exists(model):
-        logging.info(f"Extracting {args.model_name} to {model}")
-        try:
-            with zipfile.ZipFile(os.path.abspath(args.model_name), 'r') as zip_ref:
-                zip_ref.extractall(model)
-        except Exception as e:
-            logging.error(f"Failed to extract zip file {args.model_name}: {e}")
-            update_payload_status(args.id, status="failed")
-            sys.exit(1)
-    else:
-        logging.info(f"Model directory {model} already exists and is not empty, skipping extraction.")
-else:
-    # handle custom model uploaded to directory
-    model = os.path.join(custom_models_dir, args.model_name)
-    if not os.path.exists(model):
-        # predefined model or hugging face model id
-        model = os.path.join(models_dir, args.model_name)
-        if platform.system() == "Windows":
-            current_dir = os.getcwd()
-            model = os.path.join(current_dir, model).replace("/", "\\")
-        logging.info(f"Model: {model}")
+def prepare_model(model_name):
+    """
+    Return the directory of the OpenVINO model, extracting, downloading or converting it first when needed.
+    Raises RuntimeError when the model cannot be prepared.
+    """
+    # handle custom model in zip format
+    if model_name.endswith(".zip"):
+        model_zipfile_name = os.path.splitext(os.path.basename(model_name))[0]
+        model = os.path.join(models_dir, model_zipfile_name)
+        if not os.path.exists(model):
+            logging.info(f"Extracting {model_name} to {model}")
+            try:
+                with zipfile.ZipFile(os.path.abspath(model_name), 'r') as zip_ref:
+                    zip_ref.extractall(model)
+            except Exception as e:
+                raise RuntimeError(f"Failed to extract zip file {model_name}: {e}") from e
+        else:
+            logging.info(f"Model directory {model} already exists and is not empty, skipping extraction.")
     else:
-        logging.info(f"Custom Model: {model} exists.")
+        # handle custom model uploaded to directory
+        model = os.path.join(custom_models_dir, model_name)
+        if not os.path.exists(model):
+            if model_name.startswith("OpenVINO/"):
+                # predefined model, already in OpenVINO format
+                model = os.path.join(models_dir, model_name)
+                if not os.path.exists(model):
+                    logging.info(f"Model {model} not found. Downloading...")
+                    hf_hub.snapshot_download(model_name, local_dir=model)
+            else:
+                # hugging face model id, exported once per configuration
+                additional_args = dict(LEGACY_EXPORT_ARGS)
+                model = get_exported_model(
+                    model_name, models_dir, optimum_cli, additional_args, LEGACY_EXPORT_ARGS, LEGACY_EXPORT_FILES
+                )
+            if platform.system() == "Windows":
+                current_dir = os.getcwd()
+                model = os.path.join(current_dir, model).replace("/", "\\")
+            logging.info(f"Model: {model}")
+        else:
+            logging.info(f"Custom Model: {model} exists.")
+
+    if os.path.realpath(model) != os.path.abspath(
+        model
+    ):  # Check if the model path is a symlink
+        raise RuntimeError(
+            f"Model file {model} is a symlink or contains a symlink in its path. Refusing to open for security reasons."
+        )
+    return model
 
-# download model if it doesn't exist
-if not os.path.exists(model):
 
-    logging.info(f"Model {model} not found. Downloading...")
-    if args.model_name.startswith("OpenVINO/"):
-        hf_hub.snapshot_download(args.model_name, local_dir=model)
-    else:
-        additional_args = {
-            "weight-format": "int4",
-            "sym": None,
-            "ratio": 1.0,
-            "group-size": -1,
+try:
+    model = prepare_model(args.model_name)
+    draft_model_path = prepare_model(args.draft_model_name) if args.draft_model_name else None
+except Exception as e:
+    logging.error(f"Failed to prepare model: {e}")
+    update_payload_status(args.id, status="failed")
+    sys.exit(1)
+
+class ContinuousBatchingServer:
+    """
+    Serve concurrent requests with a ContinuousBatchingPipeline. Requests are added to the pipeline as they arrive and
+    one engine thread runs the scheduler steps, so every step batches the tokens of all running requests.
+    Tracks per-request TTFT and TPOT and the aggregate output tokens/s over the last window seconds.
+    """
+
+    def __init__(self, pipe, window=10.0):
+        self.pipe = pipe
+        self.tokenizer = pipe.get_tokenizer()
+        self.window = window
+        self.condition = threading.Condition()
+        self.requests = {}
+        self.next_request_id = 0
+        self.generated_tokens = collections.deque()
+        self.closed = False
+        threading.Thread(target=self.__run, daemon=True).start()
+
+    async def generate(self, prompt, generation_config, streamer=None):
+        """
+        Add a request to the pipeline and wait for it to finish without blocking the event loop.
+        New tokens are written to streamer after every step when given, the request is stopped when it asks to.
+        """
+        loop = asyncio.get_running_loop()
+        state = {
+            "future": loop.create_future(),
+            "loop": loop,
+            "start_time": time.perf_counter(),
+            "token_ids": [],
+            "token_times": [],
+            "tokens_per_step": [],
+            "streamer": streamer,
+        }
+        with self.condition:
+            request_id = self.next_request_id
+            self.next_request_id += 1
+            state["handle"] = self.pipe.add_request(request_id, prompt, generation_config)
+            self.requests[request_id] = state
+            self.condition.notify()
+        return await state["future"]
+
+    def close(self):
+        """
+        Stop the engine thread once the running requests are finished, so the pipeline can be released.
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+
+    def __run(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.requests or self.closed)
+                if not self.requests:
+                    return
+                requests = list(self.requests.items())
+            try:
+                self.pipe.step()
+            except Exception as e:
+                logging.error(f"Continuous batching step failed: {e}")
+                with self.condition:
+                    for request_id, state in requests:
+                        self.requests.pop(request_id, None)
+                        state["loop"].call_soon_threadsafe(state["future"].set_exception, e)
+                continue
+
+            now = time.perf_counter()
+            for request_id, state in requests:
+                handle = state["handle"]
+                status = handle.get_status()
+                # read() returns the tokens generated since the previous read
+                if handle.can_read():
+                    for output in handle.read().values():
+                        if output.generated_ids:
+                            state["tokens_per_step"].append(len(output.generated_ids))
+                        state["token_ids"].extend(output.generated_ids)
+                        state["token_times"].extend([now] * len(output.generated_ids))
+                        self.__count_tokens(now, len(output.generated_ids))
+                        streamer = state["streamer"]
+                        if streamer is not None and output.generated_ids:
+                            if streamer.write(output.generated_ids) != openvino_genai.StreamingStatus.RUNNING:
+                                handle.stop()
+                if status != openvino_genai.GenerationStatus.RUNNING:
+                    with self.condition:
+                        self.requests.pop(request_id, None)
+                    if state["streamer"] is not None:
+                        state["streamer"].end()
+                    result = self.__build_result(state, now)
+                    state["loop"].call_soon_threadsafe(state["future"].set_result, result)
+
+    def __count_tokens(self, now, count):
+        with self.condition:
+            self.generated_tokens.append((now, count))
+            while self.generated_tokens[0][0] < now - self.window:
+                self.generated_tokens.popleft()
+
+    def __build_result(self, state, now):
+        token_times = state["token_times"]
+        num_tokens = len(token_times)
+        generation_time = now - state["start_time"]
+        ttft = token_times[0] - state["start_time"] if token_times else generation_time
+        tpot = (token_times[-1] - token_times[0]) / (num_tokens - 1) if num_tokens > 1 else 0.0
+        return {
+            "text": self.tokenizer.decode(state["token_ids"]),
+            "num_tokens": num_tokens,
+            "generation_time_s": generation_time,
+            "ttft_s": ttft,
+            "tpot_s": tpot,
+            "throughput_tokens_s": num_tokens / generation_time if generation_time > 0 else 0.0,
+            "tokens_per_step": state["tokens_per_step"],
+        }
+
+    def get_metrics(self):
+        """
+        Return the aggregate output tokens/s over the last window and the scheduler state.
+        """
+        now = time.perf_counter()
+        with self.condition:
+            samples = [(timestamp, count) for timestamp, count in self.generated_tokens if timestamp >= now - self.window]
+            running_requests = len(self.requests)
+        # Rate over the span actually covered by tokens, so a short burst is not averaged over the whole window
+        tokens = sum(count for _, count in samples)
+        span = min(max(now - samples[0][0], 1.0), self.window) if samples else self.window
+        pipeline_metrics = self.pipe.get_metrics()
+        return {
+            "aggregate_throughput_tokens_s": tokens / span,
+            "running_requests": running_requests,
+            "scheduled_requests": pipeline_metrics.scheduled_requests,
+            "cache_usage": pipeline_metrics.cache_usage,
         }
-        optimum_cli(args.model_name, model, additional_args)
 
-if os.path.realpath(model) != os.path.abspath(
-    model
-):  # Check if the model path is a symlink
-    logging.error(
-        f"Model file {model} is a symlink or contains a symlink in its path. Refusing to open for security reasons."
+
+class TimedTextStreamer(openvino_genai.StreamerBase):
+    """
+    Streamer that timestamps every generated token and passes the decoded text chunks to on_chunk.
+    Detokenization is delegated to TextStreamer, which holds back incomplete UTF-8 sequences.
+    Generation stops at the next token once stop() is called, e.g. when the client disconnects.
+    """
+
+    def __init__(self, tokenizer, on_chunk):
+        super().__init__()
+        self.on_chunk = on_chunk
+        self.start_time = time.perf_counter()
+        self.token_times = []
+        self.stop_event = threading.Event()
+        self.text_streamer = openvino_genai.TextStreamer(tokenizer, self.__on_text)
+
+    def write(self, token):
+        now = time.perf_counter()
+        self.token_times.extend([now] * (len(token) if isinstance(token, list) else 1))
+        self.text_streamer.write(token)
+        if self.stop_event.is_set():
+            return openvino_genai.StreamingStatus.STOP
+        return openvino_genai.StreamingStatus.RUNNING
+
+    def end(self):
+        self.text_streamer.end()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def __on_text(self, text):
+        now = time.perf_counter()
+        previous = self.token_times[-2] if len(self.token_times) > 1 else self.start_time
+        self.on_chunk(
+            {
+                "text": text,
+                "num_tokens": len(self.token_times),
+                "elapsed_s": round(now - self.start_time, 4),
+                "inter_token_latency_ms": round((self.token_times[-1] - previous) * 1000, 2),
+            }
+        )
+        return openvino_genai.StreamingStatus.RUNNING
+
+    def get_summary(self):
+        """
+        Return TTFT, inter-token latency percentiles and throughput of the streamed tokens.
+        """
+        generation_time = time.perf_counter() - self.start_time
+        num_tokens = len(self.token_times)
+        ttft = self.token_times[0] - self.start_time if num_tokens else generation_time
+        inter_token_latency_ms = np.diff(self.token_times) * 1000 if num_tokens > 1 else np.zeros(1)
+        return {
+            "num_tokens": num_tokens,
+            "generation_time_s": round(generation_time, 2),
+            "time_to_token_s": round(ttft, 4),
+            "inter_token_latency_ms": {
+                "mean": round(float(np.mean(inter_token_latency_ms)), 2),
+                "p50": round(float(np.percentile(inter_token_latency_ms, 50)), 2),
+                "p90": round(float(np.percentile(inter_token_latency_ms, 90)), 2),
+                "p99": round(float(np.percentile(inter_token_latency_ms, 99)), 2),
+            },
+            "throughput_s": round(num_tokens / generation_time, 2) if generation_time > 0 else 0.0,
+        }
+
+
+BASELINE_PROMPT = "Explain in a few sentences what an edge AI system is and where it is used."
+
+
+def measure_baseline_tpot(model_path, device, num_tokens=64):
+    """
+    Measure the TPOT of the main model without speculative decoding, the reference for the reported speedup.
+    The baseline pipeline is released before the speculative one is built, so both are never loaded together.
+    The result is saved in the compiled model cache entry of the plain pipeline, keyed like the compiled model by
+    the model fingerprint, the device and the OpenVINO version, so it is only measured once.
+    """
+    baseline_cache = CompiledModelCache(model_path, device, variant="llm")
+    baseline = baseline_cache.manifest.get("baseline_tpot")
+    if baseline is not None and baseline.get("num_tokens") == num_tokens:
+        logging.info(f"Using the baseline TPOT measured before from {baseline_cache.cache_dir}")
+        return baseline["tpot_s"]
+
+    start_time = time.perf_counter()
+    baseline_pipe = openvino_genai.LLMPipeline(model_path, device, **baseline_cache.properties)
+    load_time_s = time.perf_counter() - start_time
+    config = baseline_pipe.get_generation_config()
+    config.max_new_tokens = num_tokens
+    config.min_new_tokens = num_tokens
+    baseline_pipe.generate([BASELINE_PROMPT], config)  # warm-up
+    res = baseline_pipe.generate([BASELINE_PROMPT], config)
+    tpot_s = res.perf_metrics.get_tpot().mean / 1e3
+    baseline_cache.manifest["baseline_tpot"] = {"num_tokens": num_tokens, "tpot_s": tpot_s}
+    baseline_cache.record_load(load_time_s)
+    return tpot_s
+
+
+def get_speculative_metrics(tokens_per_step, tpot_s):
+    """
+    Return the draft token acceptance rate and the TPOT speedup over the non-speculative baseline.
+    The first main model step is the prompt prefill, every later step validates num_assistant_tokens draft tokens
+    and generates the accepted ones plus one of its own. A step cut short by max_tokens or EOS counts as rejections.
+    """
+    steps = tokens_per_step[1:]
+    proposed = len(steps) * args.num_assistant_tokens
+    accepted = sum(steps) - len(steps)
+    return {
+        "acceptance_rate": round(accepted / proposed, 3) if proposed else 0.0,
+        "tokens_per_step": round(sum(steps) / len(steps), 2) if steps else 0.0,
+        "baseline_time_per_output_token_s": round(baseline_tpot_s, 4),
+        "speedup": round(baseline_tpot_s / tpot_s, 2) if tpot_s > 0 else 0.0,
+    }
+
+
+# LLMPipeline is not safe to call from several threads at once
+pipe_lock = threading.Lock()
+
+
+def load_pipeline(model_path, draft_model_path=None):
+    """
+    Load the pipeline of the model at model_path, with speculative decoding when draft_model_path is given.
+    Returns the pipeline with everything the endpoints need to serve it.
+    """
+    variant = args.pipeline_type
+    if draft_model_path:
+        variant += f"+draft-{os.path.basename(draft_model_path)}-{args.draft_device or args.device}"
+    model_cache = CompiledModelCache(model_path, args.device, variant=variant)
+    properties = dict(model_cache.properties)
+    baseline_tpot_s = None
+    if draft_model_path:
+        baseline_tpot_s = measure_baseline_tpot(model_path, args.device)
+        logging.info(f"Baseline TPOT without speculative decoding: {baseline_tpot_s * 1000:.1f} ms")
+        properties["draft_model"] = openvino_genai.draft_model(
+            draft_model_path, args.draft_device or args.device, **model_cache.properties
+        )
+
+    start_time = time.perf_counter()
+    cb_server = None
+    if args.pipeline_type == "continuous-batching":
+        scheduler_config = openvino_genai.SchedulerConfig()
+        scheduler_config.cache_size = args.cache_size
+        scheduler_config.max_num_batched_tokens = args.max_num_batched_tokens
+        scheduler_config.max_num_seqs = args.max_num_seqs
+        scheduler_config.enable_prefix_caching = args.enable_prefix_caching
+        pipe = openvino_genai.ContinuousBatchingPipeline(model_path, scheduler_config, args.device, properties)
+        cb_server = ContinuousBatchingServer(pipe)
+    else:
+        if args.enable_prefix_caching:
+            logging.warning("--enable-prefix-caching only applies to --pipeline-type continuous-batching")
+        pipe = openvino_genai.LLMPipeline(model_path, args.device, **properties)
+    load_time_s = time.perf_counter() - start_time
+    model_cache.record_load(load_time_s)
+    return {
+        "pipe": pipe,
+        "cb_server": cb_server,
+        "draft_model_path": draft_model_path,
+        "baseline_tpot_s": baseline_tpot_s,
+        "load_time_s": load_time_s,
+    }
+
+
+def release_pipeline(loaded):
+    if loaded["cb_server"] is not None:
+        loaded["cb_server"].close()
+
+
+def activate_pipeline(loaded):
+    """
+    Serve the requests that arrive from now on with a loaded pipeline, requests already running finish on theirs.
+    """
+    global pipe, cb_server, draft_model_path, baseline_tpot_s, model_load_time_s
+    pipe = loaded["pipe"]
+    cb_server = loaded["cb_server"]
+    draft_model_path = loaded["draft_model_path"]
+    baseline_tpot_s = loaded["baseline_tpot_s"]
+    model_load_time_s = loaded["load_time_s"]
+
+
+def get_pooled_pipeline(model_name, model_path, draft_model_name=None, draft_model_path=None):
+    size = get_model_size(model_path) + (get_model_size(draft_model_path) if draft_model_path else 0)
+    return model_pool.get(
+        (model_name, draft_model_name), lambda: load_pipeline(model_path, draft_model_path), size
     )
-    update_payload_status(args.id, status="failed")
-    sys.exit(1)
 
-try:
 
-    pipe = openvino_genai.LLMPipeline(model, args.device)
+model_pool = ModelPool(args.model_pool_size_gb, on_evict=release_pipeline)
+# Serializes model switches
+model_switch_lock = threading.Lock()
+
+try:
+    loaded, _ = get_pooled_pipeline(args.model_name, model, args.draft_model_name, draft_model_path)
+    activate_pipeline(loaded)
     update_payload_status(args.id, status="active")
 except Exception as e:
     logging.error(f"Failed to load model: {e}")
@@ -232,25 +633,72 @@ class Request(BaseModel):
     max_tokens: int = 100
 
 
+def make_generation_config(max_tokens):
+    if cb_server is not None:
+        generation_config = pipe.get_config()
+    else:
+        generation_config = pipe.get_generation_config()
+    generation_config.max_new_tokens = max_tokens
+    if draft_model_path:
+        generation_config.num_assistant_tokens = args.num_assistant_tokens
+    return generation_config
+
+
+def generate_with_lock(prompt, max_tokens, streamer=None):
+    with pipe_lock:
+        return pipe.generate([prompt], make_generation_config(max_tokens), streamer)
+
+
+def format_sse(data):
+    return f"data: {json.dumps(data)}\n\n"
+
+
 @app.post("/infer")
 async def start_chatting(request: Request):
     try:
-        res = pipe.generate([request.prompt], max_new_tokens=request.max_tokens)
+        if cb_server is not None:
+            res = await cb_server.generate(request.prompt, make_generation_config(request.max_tokens))
+            metrics = cb_server.get_metrics()
+            response = {
+                "text": res["text"],
+                "load_time_s": round(model_load_time_s, 2),
+                "generation_time_s": round(res["generation_time_s"], 2),
+                "time_to_token_s": round(res["ttft_s"], 2),
+                "time_per_output_token_s": round(res["tpot_s"], 4),
+                "throughput_s": round(res["throughput_tokens_s"], 2),
+                "num_tokens": res["num_tokens"],
+                "aggregate_throughput_s": round(metrics["aggregate_throughput_tokens_s"], 2),
+                "running_requests": metrics["running_requests"],
+            }
+            if draft_model_path:
+                response.update(get_speculative_metrics(res["tokens_per_step"], res["tpot_s"]))
+            return response
+
+        # Run in a worker thread so the event loop keeps serving other requests
+        res = await run_in_threadpool(generate_with_lock, request.prompt, request.max_tokens)
 
         load_time_s = round((res.perf_metrics.get_load_time() / 1e3), 2)
         generation_time_s = round(
             (res.perf_metrics.get_generate_duration().mean / 1e3), 2
         )
         ttft_s = round((res.perf_metrics.get_ttft().mean / 1e3), 2)
+        tpot_s = round((res.perf_metrics.get_tpot().mean / 1e3), 4)
         throughput_tokens_s = round(res.perf_metrics.get_throughput().mean, 2)
 
-        return {
+        response = {
             "text": str(res),
             "load_time_s": load_time_s,
             "generation_time_s": generation_time_s,
             "time_to_token_s": ttft_s,
+            "time_per_output_token_s": tpot_s,
             "throughput_s": throughput_tokens_s,
+            "num_tokens": res.perf_metrics.get_num_generated_tokens(),
         }
+        if draft_model_path:
+            # With a draft model each entry is the number of tokens of one main model step
+            tokens_per_step = list(res.perf_metrics.raw_metrics.m_batch_sizes)
+            response.update(get_speculative_metrics(tokens_per_step, res.perf_metrics.get_tpot().mean / 1e3))
+        return response
     except Exception as e:
         logging.error(f"Error starting the chat: {e}")
         return JSONResponse(
@@ -258,6 +706,110 @@ async def start_chatting(request: Request):
         )
 
 
+@app.post("/infer/stream")
+async def stream_chatting(request: Request):
+    """
+    Stream the generated text as server-sent events while generation runs in a worker thread.
+    Every event carries a text chunk with its timing, the last one has "done": true and the TTFT,
+    inter-token latency percentiles and throughput of the request.
+    """
+    loop = asyncio.get_running_loop()
+    chunks = asyncio.Queue()
+    streamer = TimedTextStreamer(
+        pipe.get_tokenizer(), lambda chunk: loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+    )
+    if cb_server is not None:
+        task = asyncio.ensure_future(
+            cb_server.generate(request.prompt, make_generation_config(request.max_tokens), streamer)
+        )
+    else:
+        task = asyncio.ensure_future(
+            run_in_threadpool(generate_with_lock, request.prompt, request.max_tokens, streamer)
+        )
+    # Chunks are queued with call_soon_threadsafe before the task completes, so None is always the last item
+    task.add_done_callback(lambda _: chunks.put_nowait(None))
+
+    async def events():
+        try:
+            while (chunk := await chunks.get()) is not None:
+                yield format_sse(chunk)
+            if task.exception() is not None:
+                logging.error(f"Error streaming the chat: {task.exception()}")
+                yield format_sse({"done": True, "status": False, "message": "An error occurred while streaming the chat"})
+                return
+            summary = streamer.get_summary()
+            summary["load_time_s"] = round(model_load_time_s, 2)
+            yield format_sse({"done": True, **summary})
+        finally:
+            # Stops generation early when the client disconnects
+            streamer.stop()
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.get("/api/metrics")
+def get_metrics():
+    """
+    Return the aggregate throughput and scheduler state of the continuous batching pipeline.
+    """
+    if cb_server is None:
+        return JSONResponse(
+            {"status": False, "message": "Metrics are only available with --pipeline-type continuous-batching"}
+        )
+    return JSONResponse({"data": cb_server.get_metrics(), "status": "success"})
+
+
+class ModelRequest(BaseModel):
+    model_name: str
+    draft_model_name: Optional[str] = None
+
+
+@app.post("/api/model")
+def switch_model(request: ModelRequest):
+    """
+    Switch the worker to another model without restarting it. Models loaded before are kept in the model pool within
+    --model-pool-size-gb, switching back to one of them does not load it again.
+    """
+    with model_switch_lock:
+        start_time = time.perf_counter()
+        try:
+            model_path = prepare_model(request.model_name)
+            draft_path = prepare_model(request.draft_model_name) if request.draft_model_name else None
+            loaded, cached = get_pooled_pipeline(request.model_name, model_path, request.draft_model_name, draft_path)
+        except Exception as e:
+            # The worker keeps serving the current model
+            logging.error(f"Failed to switch to model {request.model_name}: {e}")
+            return JSONResponse({"status": False, "message": f"Failed to load model {request.model_name}"})
+        activate_pipeline(loaded)
+        switch_time_s = time.perf_counter() - start_time
+    logging.info(f"Switched to model {request.model_name} in {switch_time_s:.2f} s ({'pooled' if cached else 'loaded'})")
+    update_payload_status(args.id, status="active")
+    return JSONResponse(
+        {
+            "data": {
+                "model_name": request.model_name,
+                "pooled": cached,
+                "switch_time_s": round(switch_time_s, 2),
+                "load_time_s": round(loaded["load_time_s"], 2),
+            },
+            "status": "success",
+        }
+    )
+
+
+@app.get("/api/models")
+def get_loaded_models():
+    """
+    Return the models kept loaded in the model pool, the active one last.
+    """
+    return JSONResponse(
+        {
+            "data": {"models": model_pool.describe(), "max_memory_gb": args.model_pool_size_gb},
+            "status": "success",
+        }
+    )
+
+
 uvicorn.run(
     app,
     host="127.0.0.1",
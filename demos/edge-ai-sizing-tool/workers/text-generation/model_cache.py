@@ -0,0 +1,176 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Compiled model cache shared by all workers.
+
+OpenVINO writes the compiled model to CACHE_DIR and imports it instead of compiling again the next time the same model
+is compiled for the same device, which cuts the cold start on GPU and NPU from tens of seconds to about a second.
+Every worker uses a subdirectory of one shared root, keyed by a fingerprint of the model files, the device and the
+OpenVINO version, so a re-exported model or an OpenVINO upgrade never picks up stale blobs. The least recently used
+subdirectories are evicted when the root grows over its size budget.
+
+The root is MODEL_CACHE_DIR, default workers/model_cache, and the budget MODEL_CACHE_MAX_SIZE_GB, default 20.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import time
+
+DEFAULT_CACHE_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "model_cache")
+DEFAULT_MAX_SIZE_GB = 20.0
+MANIFEST_NAME = "cache_info.json"
+
+
+def get_openvino_version():
+    import openvino
+
+    return openvino.get_version()
+
+
+def fingerprint_model(model_path):
+    """
+    Return a hash of the model at model_path, an .xml file or a directory of them.
+    The .xml topology is hashed by content, the weight files by name, size and modification time, so multi-GB weights
+    are not read on every start.
+    """
+    model_path = str(model_path)
+    if os.path.isdir(model_path):
+        paths = sorted(
+            os.path.join(root, name) for root, _, names in os.walk(model_path) for name in names
+        )
+    else:
+        base = os.path.splitext(model_path)[0]
+        paths = [path for path in (model_path, base + ".bin") if os.path.exists(path)]
+
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.relpath(path, os.path.dirname(model_path)).encode())
+        if path.endswith(".xml"):
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+        else:
+            stat = os.stat(path)
+            digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+def get_directory_size(path):
+    size = 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            try:
+                size += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return size
+
+
+def read_manifest(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_manifest(cache_dir, manifest):
+    path = os.path.join(cache_dir, MANIFEST_NAME)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temp_path, path)
+
+
+def evict_least_recently_used(cache_root, max_size_bytes, keep=None):
+    """
+    Remove the least recently used cache directories until cache_root fits in max_size_bytes, never keep.
+    """
+    entries = []
+    for name in os.listdir(cache_root):
+        path = os.path.join(cache_root, name)
+        if not os.path.isdir(path) or path == keep:
+            continue
+        last_used = read_manifest(path).get("last_used", os.path.getmtime(path))
+        entries.append((last_used, path, get_directory_size(path)))
+    total = sum(size for _, _, size in entries) + (get_directory_size(keep) if keep else 0)
+
+    for _, path, size in sorted(entries):
+        if total <= max_size_bytes:
+            break
+        logging.info(f"Evicting compiled model cache {path} ({size / 2**20:.0f} MB)")
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+
+
+class CompiledModelCache:
+    """
+    CACHE_DIR of one model on one device.
+
+    variant names anything else that changes the compiled graph, like the pipeline type, so it gets its own entry.
+    Pass properties to compile_model or to the openvino_genai pipeline and call record_load with the load time
+    afterwards, it logs the compile time on a miss and the import time with the saving on a hit.
+    """
+
+    def __init__(self, model_path, device, variant="", cache_root=None, max_size_gb=None):
+        self.model_path = str(model_path)
+        self.device = device
+        self.variant = variant
+        self.cache_root = os.path.abspath(cache_root or os.environ.get("MODEL_CACHE_DIR", DEFAULT_CACHE_ROOT))
+        if max_size_gb is None:
+            max_size_gb = float(os.environ.get("MODEL_CACHE_MAX_SIZE_GB", DEFAULT_MAX_SIZE_GB))
+        self.max_size_bytes = int(max_size_gb * 2**30)
+        self.openvino_version = get_openvino_version()
+
+        key = hashlib.sha256(
+            f"{fingerprint_model(self.model_path)}|{device}|{variant}|{self.openvino_version}".encode()
+        ).hexdigest()[:16]
+        model_name = re.sub(r"[^A-Za-z0-9_.-]", "_", os.path.basename(os.path.normpath(self.model_path)))
+        device_name = re.sub(r"[^A-Za-z0-9_.-]", "_", device)
+        self.cache_dir = os.path.join(self.cache_root, f"{model_name}-{device_name}-{key}")
+        self.manifest = read_manifest(self.cache_dir)
+        self.is_warm = self.manifest.get("compile_time_s") is not None
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @property
+    def properties(self):
+        return {"CACHE_DIR": self.cache_dir}
+
+    def record_load(self, load_time_s):
+        """
+        Log the load time against the first compile time, update the manifest and evict old entries.
+        """
+        manifest = self.manifest
+        if self.is_warm:
+            compile_time_s = manifest["compile_time_s"]
+            logging.info(
+                f"Loaded {self.model_path} for {self.device} from the compiled model cache in {load_time_s:.2f} s, "
+                f"compiling took {compile_time_s:.2f} s ({compile_time_s / max(load_time_s, 1e-3):.1f}x faster)"
+            )
+            manifest["cache_hit_time_s"] = load_time_s
+            manifest["hits"] = manifest.get("hits", 0) + 1
+        else:
+            logging.info(
+                f"Compiled {self.model_path} for {self.device} in {load_time_s:.2f} s, cached in {self.cache_dir}"
+            )
+            manifest.update(
+                {
+                    "model_path": os.path.abspath(self.model_path),
+                    "device": self.device,
+                    "variant": self.variant,
+                    "openvino_version": self.openvino_version,
+                    "compile_time_s": load_time_s,
+                    "hits": 0,
+                }
+            )
+        manifest["last_used"] = time.time()
+        try:
+            write_manifest(self.cache_dir, manifest)
+            evict_least_recently_used(self.cache_root, self.max_size_bytes, keep=self.cache_dir)
+        except OSError as e:
+            logging.warning(f"Failed to update the compiled model cache: {e}")
@@ -0,0 +1,114 @@
+# Copyright (C) 2025 Intel Corporation
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Pool of loaded models that keeps a worker warm across model switches.
+
+A worker loads the model of its workload at startup, switching to another model through POST /api/model loads it in
+the running process instead of booting a new one, so the interpreter, the imports and the device plugins are reused.
+Models that were switched away from stay loaded while they fit in the memory budget and are evicted least recently
+used first, switching back to one of them is immediate.
+"""
+
+import collections
+import logging
+import os
+import threading
+import time
+
+
+def get_model_size(model_path):
+    """
+    Return the size in bytes of the model files at model_path, an .xml file or a model directory.
+    The weights dominate the memory of a loaded model, so this is the estimate used for the budget.
+    """
+    model_path = str(model_path)
+    if os.path.isdir(model_path):
+        return sum(
+            os.path.getsize(os.path.join(root, name))
+            for root, _, names in os.walk(model_path)
+            for name in names
+            if name.endswith((".xml", ".bin"))
+        )
+    base = os.path.splitext(model_path)[0]
+    return sum(os.path.getsize(path) for path in (model_path, base + ".bin") if os.path.exists(path))
+
+
+class ModelPool:
+    """
+    Least recently used models within max_memory_gb. The active model is never evicted, even when it alone is over
+    the budget. on_evict is called with every evicted model so the worker can release it.
+    """
+
+    def __init__(self, max_memory_gb, on_evict=None):
+        self.max_memory_bytes = int(max_memory_gb * 2**30)
+        self.on_evict = on_evict
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.load_lock = threading.Lock()
+
+    def get(self, key, load, size):
+        """
+        Return the model of key and whether it was already loaded, calling load() to load it otherwise.
+        The returned model becomes the active one, size is its estimated memory in bytes.
+        """
+        # Loads run one at a time, the pool can still be described while a model loads
+        with self.load_lock:
+            with self.lock:
+                entry = self.entries.get(key)
+                if entry is not None:
+                    self.entries.move_to_end(key)
+                    entry["last_used"] = time.time()
+                    return entry["model"], True
+
+            with self.lock:
+                # Make room first, the active model keeps serving while the new one loads
+                self.__evict(incoming=size)
+            start_time = time.perf_counter()
+            model = load()
+            with self.lock:
+                self.entries[key] = {
+                    "model": model,
+                    "size": size,
+                    "load_time_s": time.perf_counter() - start_time,
+                    "last_used": time.time(),
+                }
+                self.__evict()
+            return model, False
+
+    def unload(self, key):
+        """
+        Evict the model of key, returns False when it is not loaded or is the active model.
+        """
+        with self.lock:
+            if key not in self.entries or key == next(reversed(self.entries)):
+                return False
+            self.__release(key)
+            return True
+
+    def describe(self):
+        """
+        Return the loaded models, the active one last.
+        """
+        with self.lock:
+            return [
+                {
+                    "key": key,
+                    "size_gb": round(entry["size"] / 2**30, 3),
+                    "load_time_s": round(entry["load_time_s"], 2),
+                    "last_used": entry["last_used"],
+                }
+                for key, entry in self.entries.items()
+            ]
+
+    def __evict(self, incoming=0):
+        total = sum(entry["size"] for entry in self.entries.values()) + incoming
+        while len(self.entries) > 1 and total > self.max_memory_bytes:
+            total -= self.entries[next(iter(self.entries))]["size"]
+            self.__release(next(iter(self.entries)))
+
+    def __release(self, key):
+        entry = self.entries.pop(key)
+        logging.info(f"Unloading {key} ({entry['size'] / 2**30:.2f} GB) from the model pool")
+        if self.on_evict is not None:
+            self.on_evict(entry["model"])
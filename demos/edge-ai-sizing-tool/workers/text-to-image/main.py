@@ -11,17 +11,21 @@ import time
 import uvicorn
 import sys
 from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel
 import base64
 import subprocess
 import platform
 import logging
+import threading
 from fastapi.middleware.cors import CORSMiddleware
 import requests
 import urllib.parse
 import zipfile
 from huggingface_hub import whoami
+from model_cache import CompiledModelCache
+from export_cache import get_exported_model
+from model_pool import ModelPool, get_model_size
 
 
 # from optimum.intel import OVModelForCausalLM, OVWeightQuantizationConfig
@@ -65,9 +69,7 @@ def optimum_cli(model_id, output_dir, additional_args: Dict[str, str] = None):
             env=env,
         )
     except Exception as e:
-        logging.error(f"optimum-cli failed: {e}")
-        update_payload_status(args.id, status="failed")
-        sys.exit(1)
+        raise RuntimeError(f"optimum-cli failed: {e}") from e
 
 
 # def optimum_cli(model_id, output_dir, additional_args: Dict[str, str] = None):
@@ -163,6 +165,12 @@ parser.add_argument(
 parser.add_argument(
     "--id", type=int, default=1, help="Workload ID to update the workload status"
 )
+parser.add_argument(
+    "--model-pool-size-gb",
+    type=float,
+    default=8.0,
+    help="Memory budget in GB of the models kept loaded after switching models through /api/model (default: 8)",
+)
 
 args = parser.parse_args()
 
@@ -170,51 +178,72 @@ args = parser.parse_args()
 models_dir = "models"
 custom_models_dir = "../custom_models/text-to-image"
 os.makedirs(models_dir, exist_ok=True)
+# Files of a diffusion export in models/<model id> made before exports were cached that every pipeline loads
+LEGACY_EXPORT_FILES = (
+    "model_index.json",
+    "text_encoder/openvino_model.xml",
+    "vae_decoder/openvino_model.xml",
+    "tokenizer/openvino_tokenizer.xml",
+)
 
-# handle custom model in zip format
-if args.model_name.endswith(".zip"):
-    model_zipfile_name = os.path.splitext(os.path.basename(args.model_name))[0]
-    model = os.path.join(models_dir, model_zipfile_name)
-    if not os.path.exists(model):
-        logging.info(f"Extracting {args.model_name} to {model}")
-        try:
-            with zipfile.ZipFile(os.path.abspath(args.model_name), 'r') as zip_ref:
-                zip_ref.extractall(model)
-        except Exception as e:
-            logging.error(f"Failed to extract zip file {args.model_name}: {e}")
-            update_payload_status(args.id, status="failed")
-            sys.exit(1)
-    else:
-        logging.info(f"Model directory {model} already exists and is not empty, skipping extraction.")
-else:
-    # handle custom model uploaded to directory
-    model = os.path.join(custom_models_dir, args.model_name)
-    if not os.path.exists(model):
-        # predefined model or hugging face model id
-        model = os.path.join(models_dir, args.model_name)
-        if platform.system() == "Windows":
-            current_dir = os.getcwd()
-            model = os.path.join(current_dir, model).replace("/", "\\")
-        logging.info(f"Model: {model}")
+def prepare_model(model_name):
+    """
+    Return the directory of the OpenVINO model, extracting or converting it first when needed.
+    Raises RuntimeError when the model cannot be prepared.
+    """
+    # handle custom model in zip format
+    if model_name.endswith(".zip"):
+        model_zipfile_name = os.path.splitext(os.path.basename(model_name))[0]
+        model = os.path.join(models_dir, model_zipfile_name)
+        if not os.path.exists(model):
+            logging.info(f"Extracting {model_name} to {model}")
+            try:
+                with zipfile.ZipFile(os.path.abspath(model_name), 'r') as zip_ref:
+                    zip_ref.extractall(model)
+            except Exception as e:
+                raise RuntimeError(f"Failed to extract zip file {model_name}: {e}") from e
+        else:
+            logging.info(f"Model directory {model} already exists and is not empty, skipping extraction.")
     else:
-        logging.info(f"Custom Model: {model} exists.")
-
-# download model if it doesn't exist
-if not os.path.exists(model):
-    logging.info(f"Model {model} not found. Downloading...")
-    optimum_cli(args.model_name, model)
-
-if os.path.realpath(model) != os.path.abspath(
-    model
-):  # Check if the model path is a symlink
-    logging.error(
-        f"Model file {model} is a symlink or contains a symlink in its path. Refusing to open for security reasons."
-    )
-    update_payload_status(args.id, status="failed")
-    sys.exit(1)
+        # handle custom model uploaded to directory
+        model = os.path.join(custom_models_dir, model_name)
+        if not os.path.exists(model):
+            # hugging face model id, exported once per configuration
+            model = get_exported_model(model_name, models_dir, optimum_cli, legacy_files=LEGACY_EXPORT_FILES)
+            if platform.system() == "Windows":
+                current_dir = os.getcwd()
+                model = os.path.join(current_dir, model).replace("/", "\\")
+            logging.info(f"Model: {model}")
+        else:
+            logging.info(f"Custom Model: {model} exists.")
+
+    if os.path.realpath(model) != os.path.abspath(
+        model
+    ):  # Check if the model path is a symlink
+        raise RuntimeError(
+            f"Model file {model} is a symlink or contains a symlink in its path. Refusing to open for security reasons."
+        )
+    return model
+
+
+def load_pipeline(model_path):
+    model_cache = CompiledModelCache(model_path, args.device)
+    start_time = time.perf_counter()
+    pipe = openvino_genai.Text2ImagePipeline(model_path, args.device, **model_cache.properties)
+    model_cache.record_load(time.perf_counter() - start_time)
+    return pipe
+
+
+def get_pooled_pipeline(model_name, model_path):
+    return model_pool.get(model_name, lambda: load_pipeline(model_path), get_model_size(model_path))
+
+
+model_pool = ModelPool(args.model_pool_size_gb)
+# Serializes model switches
+model_switch_lock = threading.Lock()
 
 try:
-    pipe = openvino_genai.Text2ImagePipeline(model, args.device)
+    pipe, _ = get_pooled_pipeline(args.model_name, prepare_model(args.model_name))
     update_payload_status(args.id, status="active")
 except Exception as e:
     logging.error(f"Error loading model: {e}")
@@ -227,10 +256,17 @@ class Request(BaseModel):
     inference_step: int = 1
     image_width: int = 256
     image_height: int = 256
+    # "json" returns the PNG as base64 in JSON, "png" and "jpeg" return the encoded image as the response body
+    response_format: str = "json"
+
+
+IMAGE_FORMATS = {"png": ("PNG", "image/png"), "jpeg": ("JPEG", "image/jpeg")}
 
 
 @app.post("/infer")
 async def generate_image(request: Request):
+    if request.response_format != "json" and request.response_format not in IMAGE_FORMATS:
+        return JSONResponse({"status": False, "message": f"Unsupported response format {request.response_format}"})
     try:
         start_time = time.perf_counter()
         image_tensor = pipe.generate(
@@ -244,9 +280,17 @@ async def generate_image(request: Request):
         inference_time = time.perf_counter() - start_time
         image = Image.fromarray(image_tensor.data[0])
         image_byte_arr = io.BytesIO()  # in-memory storage
+        if request.response_format in IMAGE_FORMATS:
+            image_format, media_type = IMAGE_FORMATS[request.response_format]
+            image.save(image_byte_arr, format=image_format, **({"quality": 95} if image_format == "JPEG" else {}))
+            return Response(
+                content=image_byte_arr.getvalue(),
+                media_type=media_type,
+                headers={"X-Generation-Time-S": str(round(inference_time, 1))},
+            )
+
         image.save(image_byte_arr, format="PNG")
-        image_byte_arr.seek(0)
-        image_base64 = base64.b64encode(image_byte_arr.read()).decode("utf-8")
+        image_base64 = base64.b64encode(image_byte_arr.getbuffer()).decode("utf-8")
 
         return {"generation_time_s": round(inference_time, 1), "image": image_base64}
     except Exception as e:
@@ -256,6 +300,49 @@ async def generate_image(request: Request):
         )
 
 
+class ModelRequest(BaseModel):
+    model_name: str
+
+
+@app.post("/api/model")
+def switch_model(request: ModelRequest):
+    """
+    Switch the worker to another model without restarting it. Models loaded before are kept in the model pool within
+    --model-pool-size-gb, switching back to one of them does not load it again.
+    """
+    global pipe
+    with model_switch_lock:
+        start_time = time.perf_counter()
+        try:
+            pipe, cached = get_pooled_pipeline(request.model_name, prepare_model(request.model_name))
+        except Exception as e:
+            # The worker keeps serving the current model
+            logging.error(f"Failed to switch to model {request.model_name}: {e}")
+            return JSONResponse({"status": False, "message": f"Failed to load model {request.model_name}"})
+        switch_time_s = time.perf_counter() - start_time
+    logging.info(f"Switched to model {request.model_name} in {switch_time_s:.2f} s ({'pooled' if cached else 'loaded'})")
+    update_payload_status(args.id, status="active")
+    return JSONResponse(
+        {
+            "data": {"model_name": request.model_name, "pooled": cached, "switch_time_s": round(switch_time_s, 2)},
+            "status": "success",
+        }
+    )
+
+
+@app.get("/api/models")
+def get_loaded_models():
+    """
+    Return the models kept loaded in the model pool, the active one last.
+    """
+    return JSONResponse(
+        {
+            "data": {"models": model_pool.describe(), "max_memory_gb": args.model_pool_size_gb},
+            "status": "success",
+        }
+    )
+
+
 uvicorn.run(
     app,
     host="127.0.0.1",
@@ -8,13 +8,19 @@ import threading
 import numpy as np
 from pathlib import Path
 from typing import List, Tuple
-import torch
-import torchvision
 import yaml
 import ctypes
 from ctypes import *
 import psutil
 
+try:
+    import torch
+    import torchvision
+except ImportError:
+    # torch/torchvision are not installed, use the NumPy-only postprocessing
+    torch = None
+    import yolo_postprocess
+
 core=ov.Core()
 
 class Colors:
@@ -44,7 +50,7 @@ def yaml_load(file='data.yaml'):
 
 def clip_boxes(boxes, shape):
     # Clip boxes (xyxy) to image shape (height, width)
-    if isinstance(boxes, torch.Tensor):  # faster individually
+    if torch is not None and isinstance(boxes, torch.Tensor):  # faster individually
         boxes[:, 0].clamp_(0, shape[1])  # x1
         boxes[:, 1].clamp_(0, shape[0])  # y1
         boxes[:, 2].clamp_(0, shape[1])  # x2
@@ -71,7 +77,7 @@ def scale_boxes(img1_shape, boxes, img0_shape, ratio_pad=None):
 
 def xywh2xyxy(x):
     # Convert nx4 boxes from [x, y, w, h] to [x1, y1, x2, y2] where xy1=top-left, xy2=bottom-right
-    y = x.clone() if isinstance(x, torch.Tensor) else np.copy(x)
+    y = x.clone() if torch is not None and isinstance(x, torch.Tensor) else np.copy(x)
     y[..., 0] = x[..., 0] - x[..., 2] / 2  # top left x
     y[..., 1] = x[..., 1] - x[..., 3] / 2  # top left y
     y[..., 2] = x[..., 0] + x[..., 2] / 2  # bottom right x
@@ -790,6 +796,9 @@ def detect(
         img = np.array(Image.open(image_path))
     preprocessed_img, orig_img = preprocess_image(img)
     input_tensor = prepare_input_tensor(preprocessed_img)
+    if torch is None:
+        pred = yolo_postprocess.non_max_suppression(model(input_tensor)[0], conf_thres, iou_thres, classes=classes, agnostic=agnostic_nms)
+        return pred, orig_img, input_tensor.shape
     predictions = torch.from_numpy(model(input_tensor)[0])
     pred = non_max_suppression(predictions, conf_thres, iou_thres, classes=classes, agnostic=agnostic_nms)
     return pred, orig_img, input_tensor.shape